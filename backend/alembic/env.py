@@ -0,0 +1,53 @@
+"""
+Alembic-miljø for Jaktopplevelsen.
+
+Revisjonene her er den eneste måten skjemaet endres på, også for nye
+databaser. Kjøres enten med `alembic upgrade head` eller fra oppstarten via
+models.migrations.run_migrations(), som sender med en åpen tilkobling i
+config.attributes["connection"].
+"""
+
+from alembic import context
+
+from models import Base, engine
+from models.base import DATABASE_URL
+
+config = context.config
+target_metadata = Base.metadata
+
+
+def run_migrations_offline() -> None:
+    """Skriv SQL-en til stdout i stedet for å kjøre den (`alembic upgrade head --sql`)."""
+    context.configure(
+        url=DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        render_as_batch=DATABASE_URL.startswith("sqlite"),
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def _run(connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        render_as_batch=connection.dialect.name == "sqlite",
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _run(connection)
+        return
+    with engine.begin() as connection:
+        _run(connection)
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
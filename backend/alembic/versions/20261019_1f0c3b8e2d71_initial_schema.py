@@ -0,0 +1,141 @@
+"""Opprinnelig skjema
+
+Revision ID: 1f0c3b8e2d71
+Revises:
+Create Date: 2026-10-19 09:00:00
+
+Tabellene slik create_all() laget dem før Alembic ble tatt i bruk.
+Databaser fra den tiden har dem allerede, så bare manglende tabeller
+opprettes; senere endringer ligger i egne revisjoner.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from models.migrations import table_exists
+
+
+revision = "1f0c3b8e2d71"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _created_updated():
+    return (
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def upgrade() -> None:
+    if not table_exists("users"):
+        op.create_table(
+            "users",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("email", sa.String(255), nullable=False),
+            sa.Column("password_hash", sa.String(255), nullable=False),
+            sa.Column("name", sa.String(100), nullable=False),
+            sa.Column("avatar_url", sa.String(), nullable=True),
+            sa.Column("settings", sa.JSON(), nullable=True),
+            sa.Column("garmin_credentials", sa.JSON(), nullable=True),
+            *_created_updated(),
+        )
+        op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    if not table_exists("dogs"):
+        op.create_table(
+            "dogs",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("user_id", sa.String(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+            sa.Column("name", sa.String(100), nullable=False),
+            sa.Column("breed", sa.String(100), nullable=False),
+            sa.Column("birth_date", sa.Date(), nullable=True),
+            sa.Column("color", sa.String(7), nullable=False),
+            sa.Column("garmin_collar_id", sa.String(100), nullable=True),
+            sa.Column("photo_url", sa.Text(), nullable=True),
+            sa.Column("notes", sa.Text(), nullable=True),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            *_created_updated(),
+        )
+
+    if not table_exists("hunts"):
+        op.create_table(
+            "hunts",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("user_id", sa.String(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+            sa.Column("title", sa.String(255), nullable=False),
+            sa.Column("date", sa.Date(), nullable=False),
+            sa.Column("start_time", sa.Time(), nullable=False),
+            sa.Column("end_time", sa.Time(), nullable=True),
+            sa.Column("location", sa.JSON(), nullable=False),
+            sa.Column("weather", sa.JSON(), nullable=True),
+            sa.Column("game_type", sa.JSON(), nullable=True),
+            sa.Column("game_seen", sa.JSON(), nullable=True),
+            sa.Column("game_harvested", sa.JSON(), nullable=True),
+            sa.Column("notes", sa.Text(), nullable=True),
+            sa.Column("summary", sa.Text(), nullable=True),
+            sa.Column("tags", sa.JSON(), nullable=True),
+            sa.Column("is_favorite", sa.Boolean(), nullable=True),
+            *_created_updated(),
+        )
+
+    if not table_exists("garmin_sync_logs"):
+        op.create_table(
+            "garmin_sync_logs",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("user_id", sa.String(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+            sa.Column("sync_started_at", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("sync_completed_at", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("status", sa.String(50), nullable=False),
+            sa.Column("tracks_imported", sa.Integer(), nullable=True),
+            sa.Column("error_message", sa.Text(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), nullable=True),
+        )
+
+    if not table_exists("hunt_dogs"):
+        op.create_table(
+            "hunt_dogs",
+            sa.Column("hunt_id", sa.String(), sa.ForeignKey("hunts.id", ondelete="CASCADE"), primary_key=True),
+            sa.Column("dog_id", sa.String(), sa.ForeignKey("dogs.id", ondelete="CASCADE"), primary_key=True),
+        )
+
+    if not table_exists("tracks"):
+        op.create_table(
+            "tracks",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("hunt_id", sa.String(), sa.ForeignKey("hunts.id", ondelete="CASCADE"), nullable=False),
+            sa.Column("dog_id", sa.String(), sa.ForeignKey("dogs.id", ondelete="SET NULL"), nullable=True),
+            sa.Column("name", sa.String(255), nullable=False),
+            sa.Column("source", sa.String(50), nullable=False),
+            sa.Column("gpx_data", sa.Text(), nullable=True),
+            sa.Column("geojson", sa.JSON(), nullable=False),
+            sa.Column("statistics", sa.JSON(), nullable=False),
+            sa.Column("color", sa.String(7), nullable=False),
+            sa.Column("start_time", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("end_time", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), nullable=True),
+        )
+
+    if not table_exists("photos"):
+        op.create_table(
+            "photos",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("hunt_id", sa.String(), sa.ForeignKey("hunts.id", ondelete="CASCADE"), nullable=False),
+            sa.Column("filename", sa.String(255), nullable=False),
+            sa.Column("original_filename", sa.String(255), nullable=False),
+            sa.Column("file_size", sa.Integer(), nullable=False),
+            sa.Column("mime_type", sa.String(50), nullable=False),
+            sa.Column("url", sa.Text(), nullable=False),
+            sa.Column("thumbnail_url", sa.Text(), nullable=False),
+            sa.Column("caption", sa.Text(), nullable=True),
+            sa.Column("taken_at", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("location", sa.JSON(), nullable=True),
+            sa.Column("exif_data", sa.JSON(), nullable=True),
+            sa.Column("tags", sa.JSON(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), nullable=True),
+        )
+
+
+def downgrade() -> None:
+    for table in ("photos", "tracks", "hunt_dogs", "garmin_sync_logs", "hunts", "dogs", "users"):
+        op.drop_table(table)
@@ -0,0 +1,37 @@
+"""Faste rowid-er for jaktturer i FTS5-søketabellen
+
+Revision ID: 4a7d9e2b6c35
+Revises: 8d4a6f2c1e90
+Create Date: 2026-10-19 13:00:00
+
+hunt_id er UNINDEXED i FTS5-tabellen, så sletting på hunt_id leser hele
+tabellen. hunt_search_rowids gir hver jakttur en fast rowid som
+søkeraden lagres under. Gamle rader har tilfeldige rowid-er og slettes;
+søkeindeksen fylles på nytt ved oppstart. Gjelder bare SQLite.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from models.migrations import table_exists
+
+
+revision = "4a7d9e2b6c35"
+down_revision = "8d4a6f2c1e90"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "sqlite" or not table_exists("hunt_search"):
+        return
+    if not table_exists("hunt_search_rowids"):
+        op.create_table(
+            "hunt_search_rowids",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("hunt_id", sa.String(), nullable=False, unique=True),
+        )
+    op.execute("DELETE FROM hunt_search")
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS hunt_search_rowids")
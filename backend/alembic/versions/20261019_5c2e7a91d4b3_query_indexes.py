@@ -0,0 +1,36 @@
+"""Indekser for jaktlisten, spor, bilder og hunder
+
+Revision ID: 5c2e7a91d4b3
+Revises: 1f0c3b8e2d71
+Create Date: 2026-10-19 10:00:00
+
+Databaser laget før indeksene ble deklarert i modellene mangler dem.
+IF NOT EXISTS gjør at revisjonen også kan kjøres mot databaser der
+create_all() allerede har laget dem.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "5c2e7a91d4b3"
+down_revision = "1f0c3b8e2d71"
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ("idx_hunts_user_date", "hunts", ["user_id", sa.text("date DESC"), sa.text("id DESC")]),
+    ("idx_tracks_hunt_id", "tracks", ["hunt_id", "start_time"]),
+    ("idx_tracks_dog_id", "tracks", ["dog_id"]),
+    ("idx_photos_hunt_id", "photos", ["hunt_id", "created_at"]),
+    ("idx_dogs_user_id", "dogs", ["user_id"]),
+)
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
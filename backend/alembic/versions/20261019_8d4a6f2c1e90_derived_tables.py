@@ -0,0 +1,157 @@
+"""Tabeller for fasetter, versjoner, statistikk, synkronisering og søk
+
+Revision ID: 8d4a6f2c1e90
+Revises: e3a9c5f07b12
+Create Date: 2026-10-19 12:00:00
+
+Tabellene ble tidligere laget av create_all() ved oppstart, så de kan
+finnes fra før. Innholdet fylles ved oppstart (søkeindeksen og
+fasettene) eller ved første lesing (statistikken).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from models.migrations import table_exists
+
+
+revision = "8d4a6f2c1e90"
+down_revision = "e3a9c5f07b12"
+branch_labels = None
+depends_on = None
+
+
+def _user_id(primary_key=False):
+    return sa.Column(
+        "user_id",
+        sa.String(),
+        sa.ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=primary_key,
+        nullable=False,
+    )
+
+
+def _hunt_id():
+    return sa.Column("hunt_id", sa.String(), sa.ForeignKey("hunts.id", ondelete="CASCADE"), primary_key=True)
+
+
+def _create_search_table() -> None:
+    bind = op.get_bind()
+    dialect = bind.dialect.name
+    if dialect == "sqlite":
+        try:
+            with bind.begin_nested():
+                op.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS hunt_search USING fts5("
+                    "hunt_id UNINDEXED, user_id UNINDEXED, "
+                    "title, notes, summary, tags, location, game, "
+                    "tokenize='unicode61')"
+                )
+        except sa.exc.OperationalError:
+            # SQLite uten FTS5: søk faller tilbake til ILIKE
+            pass
+    elif dialect == "postgresql":
+        op.execute(
+            "CREATE TABLE IF NOT EXISTS hunt_search ("
+            "hunt_id VARCHAR PRIMARY KEY REFERENCES hunts(id) ON DELETE CASCADE, "
+            "user_id VARCHAR NOT NULL, "
+            "title TEXT NOT NULL, "
+            "body TEXT NOT NULL, "
+            "document TSVECTOR NOT NULL)"
+        )
+        op.execute("CREATE INDEX IF NOT EXISTS idx_hunt_search_document ON hunt_search USING GIN(document)")
+        op.execute("CREATE INDEX IF NOT EXISTS idx_hunt_search_user_id ON hunt_search(user_id)")
+    # Andre databaser søker med ILIKE, se services/search.py
+
+
+def upgrade() -> None:
+    if not table_exists("hunt_tags"):
+        op.create_table(
+            "hunt_tags",
+            _hunt_id(),
+            sa.Column("tag", sa.String(100), primary_key=True),
+            _user_id(),
+        )
+    op.create_index("idx_hunt_tags_user_tag", "hunt_tags", ["user_id", "tag", "hunt_id"], if_not_exists=True)
+
+    if not table_exists("hunt_game_types"):
+        op.create_table(
+            "hunt_game_types",
+            _hunt_id(),
+            sa.Column("game_type", sa.String(100), primary_key=True),
+            _user_id(),
+        )
+    op.create_index(
+        "idx_hunt_game_types_user_type",
+        "hunt_game_types",
+        ["user_id", "game_type", "hunt_id"],
+        if_not_exists=True,
+    )
+
+    if not table_exists("hunt_list_versions"):
+        op.create_table(
+            "hunt_list_versions",
+            _user_id(primary_key=True),
+            sa.Column("version", sa.Integer(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        )
+
+    if not table_exists("user_statistics"):
+        op.create_table(
+            "user_statistics",
+            _user_id(primary_key=True),
+            sa.Column("total_hunts", sa.Integer(), nullable=False),
+            sa.Column("total_distance_km", sa.Float(), nullable=False),
+            sa.Column("total_duration_minutes", sa.Float(), nullable=False),
+            sa.Column("total_photos", sa.Integer(), nullable=False),
+            sa.Column("active_dogs", sa.Integer(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        )
+
+    if not table_exists("season_rollups"):
+        op.create_table(
+            "season_rollups",
+            _user_id(primary_key=True),
+            sa.Column("season", sa.Integer(), primary_key=True),
+            sa.Column("dimension", sa.String(20), primary_key=True),
+            sa.Column("key", sa.String(255), primary_key=True),
+            sa.Column("hunts", sa.Integer(), nullable=False),
+            sa.Column("successful_hunts", sa.Integer(), nullable=False),
+            sa.Column("game_seen", sa.Integer(), nullable=False),
+            sa.Column("game_harvested", sa.Integer(), nullable=False),
+            sa.Column("distance_km", sa.Float(), nullable=False),
+        )
+
+    if not table_exists("sync_state"):
+        op.create_table(
+            "sync_state",
+            _user_id(primary_key=True),
+            sa.Column("last_seq", sa.Integer(), nullable=False),
+        )
+
+    if not table_exists("change_log"):
+        op.create_table(
+            "change_log",
+            _user_id(primary_key=True),
+            sa.Column("entity", sa.String(20), primary_key=True),
+            sa.Column("entity_id", sa.String(), primary_key=True),
+            sa.Column("seq", sa.Integer(), nullable=False),
+            sa.Column("deleted", sa.Boolean(), nullable=False),
+            sa.Column("changed_at", sa.DateTime(timezone=True), nullable=True),
+        )
+    op.create_index("idx_change_log_user_seq", "change_log", ["user_id", "seq"], if_not_exists=True)
+
+    _create_search_table()
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS hunt_search")
+    for table in (
+        "change_log",
+        "sync_state",
+        "season_rollups",
+        "user_statistics",
+        "hunt_list_versions",
+        "hunt_game_types",
+        "hunt_tags",
+    ):
+        op.drop_table(table)
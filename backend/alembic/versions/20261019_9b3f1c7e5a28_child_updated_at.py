@@ -0,0 +1,35 @@
+"""updated_at for spor og bilder
+
+Revision ID: 9b3f1c7e5a28
+Revises: 4a7d9e2b6c35
+Create Date: 2026-10-19 13:30:00
+
+ETag-en for en jakttur tar med siste updated_at for spor og bilder, slik
+at endringer i eksisterende spor og bilder også gir ny ETag. Eksisterende
+rader får updated_at = created_at.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from models.migrations import column_exists
+
+
+revision = "9b3f1c7e5a28"
+down_revision = "4a7d9e2b6c35"
+branch_labels = None
+depends_on = None
+
+TABLES = ("tracks", "photos")
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        if not column_exists(table, "updated_at"):
+            op.add_column(table, sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True))
+        op.execute(f"UPDATE {table} SET updated_at = created_at WHERE updated_at IS NULL")
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column("updated_at")
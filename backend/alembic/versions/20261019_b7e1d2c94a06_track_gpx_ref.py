@@ -0,0 +1,29 @@
+"""tracks.gpx_ref for GPX-lageret
+
+Revision ID: b7e1d2c94a06
+Revises: 5c2e7a91d4b3
+Create Date: 2026-10-19 11:00:00
+
+Rå GPX flyttes fra tracks.gpx_data til services/gpx_store.py med
+`python manage.py migrate-gpx`; kolonnen peker på filen.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from models.migrations import column_exists
+
+
+revision = "b7e1d2c94a06"
+down_revision = "5c2e7a91d4b3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if not column_exists("tracks", "gpx_ref"):
+        op.add_column("tracks", sa.Column("gpx_ref", sa.String(64), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("tracks") as batch_op:
+        batch_op.drop_column("gpx_ref")
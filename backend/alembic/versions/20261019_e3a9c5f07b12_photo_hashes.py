@@ -0,0 +1,43 @@
+"""Hasher for dublettsjekk av bilder og bildeversjon per bruker
+
+Revision ID: e3a9c5f07b12
+Revises: b7e1d2c94a06
+Create Date: 2026-10-19 11:30:00
+
+Bilder lastet opp før dublettsjekken får hasher med
+`python manage.py hash-photos`.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from models.migrations import column_exists, table_exists
+
+
+revision = "e3a9c5f07b12"
+down_revision = "b7e1d2c94a06"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if not column_exists("photos", "content_hash"):
+        op.add_column("photos", sa.Column("content_hash", sa.String(64), nullable=True))
+    if not column_exists("photos", "phash"):
+        op.add_column("photos", sa.Column("phash", sa.String(16), nullable=True))
+    op.create_index("idx_photos_content_hash", "photos", ["content_hash"], if_not_exists=True)
+
+    if not table_exists("photo_versions"):
+        op.create_table(
+            "photo_versions",
+            sa.Column("user_id", sa.String(), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+            sa.Column("version", sa.Integer(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("photo_versions")
+    op.drop_index("idx_photos_content_hash", table_name="photos", if_exists=True)
+    with op.batch_alter_table("photos") as batch_op:
+        batch_op.drop_column("phash")
+        batch_op.drop_column("content_hash")
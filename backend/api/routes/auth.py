@@ -4,21 +4,20 @@ Autentiseringsruter for Jaktopplevelsen.
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, EmailStr
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 import os
 from typing import Optional
 
-from models import get_db, User
+from models import get_async_db, User
+from services.passwords import PasswordHasherBusy, hasher, pwd_context
+from services.user_cache import user_cache
 
 router = APIRouter()
 
-# Passord-hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # JWT-konfigurasjon
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", "din-hemmelige-nøkkel-her")
 ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
@@ -59,15 +58,23 @@ class TokenData(BaseModel):
 
 # Hjelpefunksjoner
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verifiser passord mot hash."""
+    """Verifiser passord mot hash. Blokkerer; bruk hasher i async-ruter."""
     return pwd_context.verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    """Hash passord."""
+    """Hash passord. Blokkerer; bruk hasher i async-ruter."""
     return pwd_context.hash(password)
 
 
+def _busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Mange innlogginger akkurat nå, prøv igjen om litt",
+        headers={"Retry-After": "1"},
+    )
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Opprett JWT-token."""
     to_encode = data.copy()
@@ -81,9 +88,14 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 
 async def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)
 ) -> User:
-    """Hent nåværende bruker fra token."""
+    """
+    Hent nåværende bruker fra token.
+
+    Brukeren leses fra user_cache når den finnes der; da er den frakoblet
+    sesjonen og må hentes med db.get() før den endres.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Kunne ikke validere legitimasjon",
@@ -97,18 +109,23 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
 
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await user_cache.get(user_id)
+    if user is not None:
+        return user
+
+    user = await db.scalar(select(User).where(User.id == user_id))
     if user is None:
         raise credentials_exception
+    await user_cache.set(user)
     return user
 
 
 # Endepunkter
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Registrer ny bruker."""
     # Sjekk om e-post allerede er i bruk
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await db.scalar(select(User).where(User.email == user_data.email))
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -116,15 +133,18 @@ async def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
         )
 
     # Opprett bruker
-    hashed_password = get_password_hash(user_data.password)
+    try:
+        hashed_password = await hasher.hash(user_data.password)
+    except PasswordHasherBusy:
+        raise _busy()
     new_user = User(
         email=user_data.email,
         password_hash=hashed_password,
         name=user_data.name,
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
 
     return UserResponse(
         id=str(new_user.id),
@@ -138,17 +158,37 @@ async def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
 
 @router.post("/token", response_model=Token)
 async def login(
-    form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Logg inn og få tilgangstoken."""
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.password_hash):
+    row = (
+        await db.execute(
+            select(User.id, User.password_hash).where(User.email == form_data.username)
+        )
+    ).first()
+    # Avslutt lesetransaksjonen før hashingen, så forbindelsen ikke holdes
+    # mens kallet venter i køen
+    await db.rollback()
+    valid, new_hash = False, None
+    if row:
+        try:
+            valid, new_hash = await hasher.verify_and_update(form_data.password, row.password_hash)
+        except PasswordHasherBusy:
+            raise _busy()
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Feil e-post eller passord",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    user = await db.get(User, row.id)
+    if new_hash:
+        # Hashen er laget med utdaterte parametere (f.eks. færre runder)
+        user.password_hash = new_hash
+        await db.commit()
+
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": str(user.id)}, expires_delta=access_token_expires
@@ -186,9 +226,13 @@ async def get_current_user_info(current_user: User = Depends(get_current_user)):
 async def update_user_settings(
     settings: dict,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Oppdater brukerinnstillinger."""
-    current_user.settings.update(settings)
-    db.commit()
-    return {"melding": "Innstillinger oppdatert", "settings": current_user.settings}
+    # Brukeren kan komme fra bufferen; hent den i denne sesjonen før endring
+    user = await db.get(User, current_user.id)
+    # Tilordne ny dict slik at endringen i JSON-kolonnen blir lagret
+    user.settings = {**(user.settings or {}), **settings}
+    await db.commit()
+    await user_cache.invalidate(user.id)
+    return {"melding": "Innstillinger oppdatert", "settings": user.settings}
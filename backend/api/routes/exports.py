@@ -1,8 +1,43 @@
-from fastapi import APIRouter, Depends
-from api.deps import get_current_user
+"""
+Ruter for eksport av jaktdata.
+"""
+
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+
+from models import User
+from api.routes.auth import get_current_user
+from services import export
 
 router = APIRouter()
 
+
 @router.get("/")
-async def export_data(format: str = "json", current_user: dict = Depends(get_current_user)):
-    return {"status": "not implemented"}
+async def export_data(
+    format: str = Query("json", description="json, ndjson, gpx eller kml"),
+    hunt_id: Optional[List[str]] = Query(None, description="Bare disse jaktturene (kan gjentas)"),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Last ned alle hunder, jaktturer, spor og bildemetadata, eller bare
+    sporene som GPX eller KML.
+
+    Svaret strømmes mens det leses fra databasen, så nedlastingen starter
+    straks og minnebruken er den samme for én sesong som for ti.
+    """
+    if format not in export.FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Formatet støttes ikke (tillatt: {', '.join(export.FORMATS)})",
+        )
+    media_type, _ = export.FORMATS[format]
+    return StreamingResponse(
+        export.stream_export(current_user.id, format, hunt_id),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{export.filename(format)}"',
+            "Cache-Control": "no-store",
+        },
+    )
@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, UploadFile, File
+from starlette.concurrency import run_in_threadpool
 from typing import List, Optional
 from datetime import datetime, timedelta
 import logging
@@ -9,6 +10,7 @@ import shutil
 from api.deps import get_current_user
 # Bruk absolutt import for å unngå forvirring
 import garmin.client as garmin_client
+from garmin.cache import activity_cache
 from models.schemas import GarminActivity, GarminCredentials, TrackCreate
 
 router = APIRouter()
@@ -22,6 +24,7 @@ async def login_garmin(
     """Logg inn på Garmin Connect."""
     client = garmin_client.GarminAlpha200Client(credentials.email, credentials.password)
     if client.authenticate():
+        activity_cache.invalidate(current_user["id"])
         return True
     raise HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -46,6 +49,7 @@ async def sync_garmin(
         
     try:
         tracks = client.sync_activities(days_back=days_back)
+        activity_cache.invalidate(current_user["id"])
         return tracks
     except Exception as e:
         logger.error(f"Feil ved synkronisering: {e}")
@@ -54,43 +58,70 @@ async def sync_garmin(
             detail=f"Feil ved synkronisering: {str(e)}"
         )
 
-@router.get("/activities", response_model=List[dict])
-async def get_activities(
-    start_date: Optional[str] = None,
-    end_date: Optional[str] = None,
-    current_user: dict = Depends(get_current_user)
-):
-    """Hent aktiviteter uten å laste ned fulle spor (raskere)."""
+def _fetch_activities(start: Optional[datetime], end: Optional[datetime]) -> List[dict]:
+    """Logg inn mot Garmin og hent aktiviteter i forenklet format (blokkerende)."""
     client = garmin_client.GarminAlpha200Client()
-    
+
     if not client.authenticate():
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Ikke autentisert mot Garmin Connect"
         )
-        
+
+    activities = client.get_activities(start, end)
+
+    # Map til forenklet format
+    result = []
+    for act in activities:
+        result.append({
+            "activityId": act.get("activityId"),
+            "activityName": act.get("activityName"),
+            "startTimeLocal": act.get("startTimeLocal"),
+            "distance": act.get("distance"),
+            "duration": act.get("duration"),
+            "averageSpeed": act.get("averageSpeed"),
+            "maxSpeed": act.get("maxSpeed"),
+            "dog_id": None
+        })
+
+    return result
+
+@router.get("/activities", response_model=List[dict])
+async def get_activities(
+    background_tasks: BackgroundTasks,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    refresh: bool = False,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Hent aktiviteter uten å laste ned fulle spor (raskere).
+    Svaret bufres per bruker; utdaterte lister serveres mens de oppdateres i bakgrunnen.
+    """
     try:
         # Konverter datoer
         start = datetime.fromisoformat(start_date) if start_date else None
         end = datetime.fromisoformat(end_date) if end_date else None
-        
-        activities = client.get_activities(start, end)
-        
-        # Map til forenklet format
-        result = []
-        for act in activities:
-            result.append({
-                "activityId": act.get("activityId"),
-                "activityName": act.get("activityName"),
-                "startTimeLocal": act.get("startTimeLocal"),
-                "distance": act.get("distance"),
-                "duration": act.get("duration"),
-                "averageSpeed": act.get("averageSpeed"),
-                "maxSpeed": act.get("maxSpeed"),
-                "dog_id": None 
-            })
-            
-        return result
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Ugyldig datoformat")
+
+    user_id = current_user["id"]
+    cache_key = (start_date, end_date)
+
+    if not refresh:
+        cached, needs_refresh = activity_cache.get(user_id, cache_key)
+        if cached is not None:
+            if needs_refresh:
+                background_tasks.add_task(
+                    activity_cache.refresh, user_id, cache_key,
+                    lambda: _fetch_activities(start, end)
+                )
+            return cached
+
+    try:
+        result = await run_in_threadpool(_fetch_activities, start, end)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Feil ved henting av aktiviteter: {e}")
         raise HTTPException(
@@ -98,6 +129,9 @@ async def get_activities(
             detail=str(e)
         )
 
+    activity_cache.set(user_id, cache_key, result)
+    return result
+
 @router.post("/upload-gpx", response_model=dict)
 async def upload_gpx(
     file: UploadFile = File(...),
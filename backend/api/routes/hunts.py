@@ -2,18 +2,35 @@
 Ruter for jaktturer.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import false, func, select, tuple_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from pydantic import BaseModel, Field, ValidationError
 from datetime import datetime, date, time
-from typing import Optional, List
+from typing import Any, Dict, Optional, List, Union
 from uuid import UUID
+import base64
+import json
 
-from models import get_db, User, Hunt, Dog
+from models import get_async_db, User, Hunt, HuntDog, Dog, Track, Photo
 from api.routes.auth import get_current_user
+from services import search as search_index
+from services import facets
+from services import versions
+from services import serialization
+from services import statistics
+from services import gpx_store
 
 router = APIRouter()
 
+MAX_BATCH_OPERATIONS = 500
+
+# Rutene bruker AsyncSession. Hjelpefunksjoner i services/ tar en vanlig Session
+# og kalles via `await db.run_sync(...)`, slik at de også kan brukes fra manage.py.
+
 
 # Pydantic-modeller
 class HuntLocation(BaseModel):
@@ -111,188 +128,399 @@ class HuntResponse(BaseModel):
         from_attributes = True
 
 
+class HuntSummaryResponse(BaseModel):
+    """Lett projeksjon av en jakttur for listevisning (tilsvarer hunt_summaries-viewet)."""
+
+    id: str
+    title: str
+    date: date
+    start_time: time
+    end_time: Optional[time] = None
+    location_name: Optional[str] = None
+    location_region: Optional[str] = None
+    game_type: List[str]
+    total_game_seen: int
+    total_game_harvested: int
+    dog_count: int
+    track_count: int
+    photo_count: int
+    total_distance_km: float
+    thumbnails: List[str]
+    tags: List[str]
+    is_favorite: bool
+    created_at: datetime
+    updated_at: datetime
+
+
+class HuntSearchHit(BaseModel):
+    id: str
+    title: str
+    date: date
+    rank: float
+    highlight: str
+
+
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+
+class HuntFacetsResponse(BaseModel):
+    tags: List[FacetCount]
+    game_types: List[FacetCount]
+
+
+class HuntBatchOperation(BaseModel):
+    op: str = Field(..., pattern="^(create|update|delete)$")
+    id: Optional[str] = None  # Påkrevd for update og delete
+    client_ref: Optional[str] = None  # Returneres uendret, f.eks. lokal id hos en offline-klient
+    data: Optional[dict] = None  # HuntCreate eller HuntUpdate
+
+
+class HuntBatchRequest(BaseModel):
+    operations: List[HuntBatchOperation] = Field(..., max_length=MAX_BATCH_OPERATIONS)
+    atomic: bool = False  # Rull tilbake alt hvis én operasjon feiler
+
+
+class HuntBatchResult(BaseModel):
+    index: int
+    op: str
+    status: int
+    id: Optional[str] = None
+    client_ref: Optional[str] = None
+    updated_at: Optional[datetime] = None
+    detail: Optional[Any] = None
+
+
+class HuntBatchResponse(BaseModel):
+    committed: bool
+    results: List[HuntBatchResult]
+
+
 class HuntListResponse(BaseModel):
-    items: List[HuntResponse]
-    total: int
-    page: int
+    items: List[Union[HuntResponse, HuntSummaryResponse]]
+    total: Optional[int] = None
+    page: Optional[int] = None
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 
 @router.post("/", response_model=HuntResponse, status_code=status.HTTP_201_CREATED)
 async def create_hunt(
     hunt_data: HuntCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Opprett ny jakttur."""
-    # Hent hunder
-    dogs = []
-    if hunt_data.dog_ids:
-        dogs = (
-            db.query(Dog)
-            .filter(Dog.id.in_(hunt_data.dog_ids), Dog.user_id == current_user.id)
-            .all()
-        )
-
-    # Opprett jakttur
-    new_hunt = Hunt(
-        user_id=current_user.id,
-        title=hunt_data.title,
-        date=hunt_data.date,
-        start_time=hunt_data.start_time,
-        end_time=hunt_data.end_time,
-        location=hunt_data.location.dict(),
-        weather=hunt_data.weather.dict() if hunt_data.weather else None,
-        game_type=hunt_data.game_type,
-        game_seen=[g.dict() for g in hunt_data.game_seen],
-        game_harvested=[g.dict() for g in hunt_data.game_harvested],
-        notes=hunt_data.notes,
-        summary=hunt_data.summary,
-        tags=hunt_data.tags,
-        is_favorite=hunt_data.is_favorite,
-    )
-    new_hunt.dogs = dogs
+    dogs = await db.run_sync(_load_dogs, current_user.id, hunt_data.dog_ids)
+    new_hunt = _new_hunt(current_user.id, hunt_data, dogs)
 
     db.add(new_hunt)
-    db.commit()
-    db.refresh(new_hunt)
+    await db.flush()
+    await db.run_sync(_after_hunt_saved, new_hunt, True)
+    await db.commit()
 
     return _hunt_to_response(new_hunt)
 
 
+@router.post("/batch", response_model=HuntBatchResponse)
+async def batch_hunts(
+    batch: HuntBatchRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Opprett, oppdater og slett mange jaktturer i én transaksjon.
+
+    Hver operasjon kjøres i et eget savepoint og får sitt eget resultat med
+    HTTP-lignende status (201, 200, 204, 404, 422). Feilede operasjoner
+    rulles tilbake enkeltvis, med mindre `atomic` er satt; da lagres ingenting
+    hvis én feiler. Hunder og berørte jaktturer hentes med én IN-spørring hver.
+    """
+    results = await db.run_sync(_apply_batch, current_user.id, batch.operations)
+    failed = any(result.status >= 400 for result in results)
+    if batch.atomic and failed:
+        await db.rollback()
+        return HuntBatchResponse(committed=False, results=results)
+
+    await db.commit()
+    return HuntBatchResponse(committed=True, results=results)
+
+
 @router.get("/", response_model=HuntListResponse)
 async def list_hunts(
+    request: Request,
+    response: Response,
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
     date_from: Optional[date] = None,
     date_to: Optional[date] = None,
     game_types: Optional[str] = None,
     tags: Optional[str] = None,
     is_favorite: Optional[bool] = None,
     search: Optional[str] = None,
+    view: str = Query("full", pattern="^(full|summary)$"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    """Hent liste over jaktturer med filtrering og paginering."""
-    query = db.query(Hunt).filter(Hunt.user_id == current_user.id)
+    """
+    Hent liste over jaktturer med filtrering og paginering.
+
+    Med `view=summary` returneres kun antall, distanse og miniatyrbilder per
+    jakttur, hentet med et fast antall spørringer uavhengig av sidestørrelse.
+
+    Hvert svar inneholder `next_cursor`. Når den sendes tilbake som `cursor`
+    hentes neste side med nøkkelsett-paginering på (dato, id) i stedet for
+    OFFSET, og totalt antall telles bare hvis `include_total` er satt.
+
+    Svaret har en ETag avledet fra brukerens listeversjon og spørringen, slik
+    at `If-None-Match` gir 304 uten å lese eller serialisere jaktturer.
+    """
+    etag = versions.make_etag(
+        "hunts",
+        current_user.id,
+        await db.run_sync(versions.get_list_version, current_user.id),
+        sorted(request.query_params.multi_items()),
+    )
+    if versions.etag_matches(request.headers.get("if-none-match"), etag):
+        return _not_modified(etag)
+    _set_etag(response, etag)
+
+    query = select(Hunt).where(Hunt.user_id == current_user.id)
 
     # Filtrer etter dato
     if date_from:
-        query = query.filter(Hunt.date >= date_from)
+        query = query.where(Hunt.date >= date_from)
     if date_to:
-        query = query.filter(Hunt.date <= date_to)
+        query = query.where(Hunt.date <= date_to)
 
     # Filtrer etter vilttyper
     if game_types:
         types = game_types.split(",")
-        query = query.filter(Hunt.game_type.overlap(types))
+        query = query.where(
+            Hunt.id.in_(facets.hunts_with_game_types(current_user.id, types))
+        )
 
     # Filtrer etter tagger
     if tags:
         tag_list = tags.split(",")
-        query = query.filter(Hunt.tags.overlap(tag_list))
+        query = query.where(Hunt.id.in_(facets.hunts_with_tags(current_user.id, tag_list)))
 
     # Filtrer etter favoritter
     if is_favorite is not None:
-        query = query.filter(Hunt.is_favorite == is_favorite)
+        query = query.where(Hunt.is_favorite == is_favorite)
 
-    # Søk i tittel og notater
+    # Søk via fulltekstindeksen, eller i tittel og notater hvis den mangler
     if search:
-        query = query.filter(
-            Hunt.title.ilike(f"%{search}%") | Hunt.notes.ilike(f"%{search}%")
-        )
+        if search_index.is_enabled():
+            matches = search_index.matching_hunt_ids(current_user.id, search)
+            # Et søk uten ord (f.eks. bare tegnsetting) gir ingen treff
+            query = query.where(Hunt.id.in_(matches) if matches is not None else false())
+        else:
+            query = query.where(
+                Hunt.title.ilike(f"%{search}%") | Hunt.notes.ilike(f"%{search}%")
+            )
+
+    # Tell totalt antall (kun første side, eller når klienten ber om det)
+    total = None
+    if cursor is None or include_total:
+        total = await db.scalar(select(func.count()).select_from(query.subquery()))
+
+    # Sorter og paginer. id brukes som tiebreaker slik at rekkefølgen er stabil
+    query = query.order_by(Hunt.date.desc(), Hunt.id.desc())
+    if cursor is not None:
+        cursor_date, cursor_id = _decode_cursor(cursor)
+        query = query.where(tuple_(Hunt.date, Hunt.id) < (cursor_date, cursor_id))
+    else:
+        query = query.offset((page - 1) * page_size)
+
+    # Hent ett element ekstra for å vite om det finnes flere sider
+    query = query.limit(page_size + 1)
+    if view != "summary":
+        query = query.options(selectinload(Hunt.dogs), selectinload(Hunt.photos))
+    hunts = (await db.scalars(query)).all()
+
+    next_cursor = None
+    if len(hunts) > page_size:
+        hunts = hunts[:page_size]
+        next_cursor = _encode_cursor(hunts[-1])
+
+    result = {
+        "total": total,
+        "page": page if cursor is None else None,
+        "page_size": page_size,
+        "total_pages": (total + page_size - 1) // page_size if total is not None else None,
+        "next_cursor": next_cursor,
+    }
 
-    # Tell totalt antall
-    total = query.count()
+    if view == "summary":
+        result["items"] = await db.run_sync(_hunt_summaries, hunts)
+        return result
 
-    # Sorter og paginer
-    hunts = (
-        query.order_by(Hunt.date.desc())
-        .offset((page - 1) * page_size)
-        .limit(page_size)
-        .all()
+    # Full visning: sporgeometri skjøtes inn som rå JSON uten ny validering
+    items = serialization.json_array(await db.run_sync(serialization.render_hunts, hunts))
+    return serialization.RawJSONResponse(
+        serialization.splice(result, "items", items), headers=_cache_headers(etag)
     )
 
-    total_pages = (total + page_size - 1) // page_size
 
-    return {
-        "items": [_hunt_to_response(h) for h in hunts],
-        "total": total,
-        "page": page,
-        "page_size": page_size,
-        "total_pages": total_pages,
+@router.get("/facets", response_model=HuntFacetsResponse)
+async def get_facets(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Hent tagger og vilttyper med antall jaktturer for hver."""
+    return await db.run_sync(facets.facet_counts, current_user.id, date_from, date_to)
+
+
+@router.get("/search", response_model=List[HuntSearchHit])
+async def search_hunts(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Rangert fulltekstsøk i jaktturer med uthevede treff."""
+    if not search_index.is_enabled():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Fulltekstsøk er ikke tilgjengelig",
+        )
+
+    hits = await db.run_sync(search_index.search_hunts, current_user.id, q, limit)
+    if not hits:
+        return []
+
+    hunts = {
+        h.id: h
+        for h in await db.execute(
+            select(Hunt.id, Hunt.title, Hunt.date).where(
+                Hunt.id.in_([hit["hunt_id"] for hit in hits])
+            )
+        )
     }
+    return [
+        HuntSearchHit(
+            id=hit["hunt_id"],
+            title=hunts[hit["hunt_id"]].title,
+            date=hunts[hit["hunt_id"]].date,
+            rank=hit["rank"],
+            highlight=hit["highlight"],
+        )
+        for hit in hits
+        if hit["hunt_id"] in hunts
+    ]
 
 
 @router.get("/{hunt_id}", response_model=HuntResponse)
 async def get_hunt(
     hunt_id: str,
+    request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    """Hent en spesifikk jakttur."""
-    hunt = (
-        db.query(Hunt)
-        .filter(Hunt.id == hunt_id, Hunt.user_id == current_user.id)
-        .first()
-    )
-    if not hunt:
+    """Hent en spesifikk jakttur. Støtter If-None-Match med 304-svar."""
+    version = await db.run_sync(versions.hunt_version, hunt_id, current_user.id)
+    if version is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Jakttur ikke funnet"
         )
+    etag = versions.make_etag("hunt", hunt_id, *version)
+    if versions.etag_matches(request.headers.get("if-none-match"), etag):
+        return _not_modified(etag)
 
-    return _hunt_to_response(hunt)
+    hunt = await _get_user_hunt(
+        db, hunt_id, current_user, selectinload(Hunt.dogs), selectinload(Hunt.photos)
+    )
+    (body,) = await db.run_sync(serialization.render_hunts, [hunt])
+    return serialization.RawJSONResponse(body, headers=_cache_headers(etag))
 
 
-@router.put("/{hunt_id}", response_model=HuntResponse)
-async def update_hunt(
+@router.get("/{hunt_id}/tracks", response_model=List[dict])
+async def get_hunt_tracks(
     hunt_id: str,
-    hunt_data: HuntUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    """Oppdater en jakttur."""
-    hunt = (
-        db.query(Hunt)
-        .filter(Hunt.id == hunt_id, Hunt.user_id == current_user.id)
-        .first()
+    """Hent sporene for en jakttur med geometri."""
+    exists = await db.scalar(
+        select(Hunt.id).where(Hunt.id == hunt_id, Hunt.user_id == current_user.id)
     )
-    if not hunt:
+    if not exists:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Jakttur ikke funnet"
         )
 
-    # Oppdater felt
-    update_data = hunt_data.dict(exclude_unset=True)
+    blobs = await db.run_sync(serialization.load_track_blobs, [hunt_id])
+    return serialization.RawJSONResponse(serialization.json_array(blobs.get(hunt_id, [])))
 
-    if "location" in update_data and update_data["location"]:
-        update_data["location"] = hunt_data.location.dict()
 
-    if "weather" in update_data and update_data["weather"]:
-        update_data["weather"] = hunt_data.weather.dict()
+@router.get("/{hunt_id}/tracks/{track_id}/gpx")
+async def download_track_gpx(
+    hunt_id: str,
+    track_id: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Last ned den opprinnelige GPX-filen for et spor. Filer i GPX-lageret
+    strømmes ukomprimert i biter; spor som ikke er flyttet dit ennå sendes
+    fra tracks.gpx_data.
+    """
+    row = (
+        await db.execute(
+            select(Track.gpx_ref, Track.gpx_data)
+            .join(Hunt, Hunt.id == Track.hunt_id)
+            .where(Track.id == track_id, Track.hunt_id == hunt_id, Hunt.user_id == current_user.id)
+        )
+    ).first()
+    # Ikke hold lesetransaksjonen åpen mens filen sendes
+    await db.rollback()
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Spor ikke funnet"
+        )
 
-    if "game_seen" in update_data:
-        update_data["game_seen"] = [g.dict() for g in hunt_data.game_seen]
+    headers = {"Content-Disposition": f'attachment; filename="{track_id}.gpx"'}
+    if row.gpx_ref and gpx_store.path_for(row.gpx_ref).exists():
+        return StreamingResponse(
+            gpx_store.iter_chunks(row.gpx_ref), media_type="application/gpx+xml", headers=headers
+        )
+    if row.gpx_data:
+        return Response(row.gpx_data, media_type="application/gpx+xml", headers=headers)
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND, detail="Sporet har ingen GPX-fil"
+    )
 
-    if "game_harvested" in update_data:
-        update_data["game_harvested"] = [g.dict() for g in hunt_data.game_harvested]
 
-    if "dog_ids" in update_data:
-        dogs = (
-            db.query(Dog)
-            .filter(Dog.id.in_(update_data["dog_ids"]), Dog.user_id == current_user.id)
-            .all()
-        )
-        hunt.dogs = dogs
-        del update_data["dog_ids"]
+@router.put("/{hunt_id}", response_model=HuntResponse)
+async def update_hunt(
+    hunt_id: str,
+    hunt_data: HuntUpdate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Oppdater en jakttur."""
+    hunt = await _get_user_hunt(
+        db,
+        hunt_id,
+        current_user,
+        selectinload(Hunt.dogs),
+        selectinload(Hunt.tracks).undefer(Track.geojson),
+        selectinload(Hunt.photos),
+    )
 
-    for key, value in update_data.items():
-        if value is not None:
-            setattr(hunt, key, value)
+    previous = await db.run_sync(statistics.season_snapshot, hunt)
+    dogs = await db.run_sync(_load_dogs, current_user.id, hunt_data.dog_ids or [])
+    _apply_hunt_update(hunt, hunt_data, dogs)
 
-    db.commit()
-    db.refresh(hunt)
+    await db.run_sync(_after_hunt_saved, hunt, False, previous)
+    await db.commit()
 
     return _hunt_to_response(hunt)
 
@@ -301,44 +529,258 @@ async def update_hunt(
 async def delete_hunt(
     hunt_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Slett en jakttur."""
-    hunt = (
-        db.query(Hunt)
-        .filter(Hunt.id == hunt_id, Hunt.user_id == current_user.id)
-        .first()
-    )
-    if not hunt:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Jakttur ikke funnet"
-        )
+    hunt = await _get_user_hunt(db, hunt_id, current_user)
 
-    db.delete(hunt)
-    db.commit()
+    await db.run_sync(_before_hunt_deleted, hunt)
+    await db.delete(hunt)
+    await db.commit()
 
 
 @router.post("/{hunt_id}/favorite")
 async def toggle_favorite(
     hunt_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Veksle favorittmarkering for en jakttur."""
-    hunt = (
-        db.query(Hunt)
-        .filter(Hunt.id == hunt_id, Hunt.user_id == current_user.id)
-        .first()
+    hunt = await _get_user_hunt(db, hunt_id, current_user)
+
+    hunt.is_favorite = not hunt.is_favorite
+    await db.run_sync(_after_hunt_saved, hunt)
+    await db.commit()
+
+    return {"is_favorite": hunt.is_favorite}
+
+
+async def _get_user_hunt(db: AsyncSession, hunt_id: str, user: User, *options) -> Hunt:
+    """Hent en jakttur som tilhører brukeren, eller svar med 404."""
+    hunt = await db.scalar(
+        select(Hunt).options(*options).where(Hunt.id == hunt_id, Hunt.user_id == user.id)
     )
     if not hunt:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Jakttur ikke funnet"
         )
+    return hunt
 
-    hunt.is_favorite = not hunt.is_favorite
-    db.commit()
 
-    return {"is_favorite": hunt.is_favorite}
+def _load_dogs(db: Session, user_id: str, dog_ids: List[str]) -> Dict[str, Dog]:
+    """Hent brukerens hunder med gitte id-er i én spørring."""
+    if not dog_ids:
+        return {}
+    return {
+        dog.id: dog
+        for dog in db.scalars(select(Dog).where(Dog.id.in_(dog_ids), Dog.user_id == user_id))
+    }
+
+
+def _new_hunt(user_id: str, hunt_data: HuntCreate, dogs: Dict[str, Dog]) -> Hunt:
+    """Bygg en ny jakttur. Ukjente hunde-id-er ignoreres."""
+    hunt = Hunt(
+        user_id=user_id,
+        title=hunt_data.title,
+        date=hunt_data.date,
+        start_time=hunt_data.start_time,
+        end_time=hunt_data.end_time,
+        location=hunt_data.location.dict(),
+        weather=hunt_data.weather.dict() if hunt_data.weather else None,
+        game_type=hunt_data.game_type,
+        game_seen=[g.dict() for g in hunt_data.game_seen],
+        game_harvested=[g.dict() for g in hunt_data.game_harvested],
+        notes=hunt_data.notes,
+        summary=hunt_data.summary,
+        tags=hunt_data.tags,
+        is_favorite=hunt_data.is_favorite,
+    )
+    hunt.dogs = [dogs[dog_id] for dog_id in dict.fromkeys(hunt_data.dog_ids) if dog_id in dogs]
+    hunt.tracks = []
+    hunt.photos = []
+    return hunt
+
+
+def _apply_hunt_update(hunt: Hunt, hunt_data: HuntUpdate, dogs: Dict[str, Dog]) -> None:
+    """Skriv feltene som er satt i `hunt_data` til jaktturen."""
+    update_data = hunt_data.dict(exclude_unset=True)
+
+    if "location" in update_data and update_data["location"]:
+        update_data["location"] = hunt_data.location.dict()
+
+    if "weather" in update_data and update_data["weather"]:
+        update_data["weather"] = hunt_data.weather.dict()
+
+    if "game_seen" in update_data:
+        update_data["game_seen"] = [g.dict() for g in hunt_data.game_seen]
+
+    if "game_harvested" in update_data:
+        update_data["game_harvested"] = [g.dict() for g in hunt_data.game_harvested]
+
+    dog_ids = update_data.pop("dog_ids", None)
+    if dog_ids is not None:
+        hunt.dogs = [dogs[dog_id] for dog_id in dict.fromkeys(dog_ids) if dog_id in dogs]
+
+    for key, value in update_data.items():
+        if value is not None:
+            setattr(hunt, key, value)
+
+
+def _apply_batch(
+    db: Session, user_id: str, operations: List[HuntBatchOperation]
+) -> List[HuntBatchResult]:
+    """Utfør operasjonene i en batch, hver i sitt eget savepoint."""
+    results = [
+        HuntBatchResult(index=i, op=op.op, id=op.id, client_ref=op.client_ref, status=0)
+        for i, op in enumerate(operations)
+    ]
+
+    # Valider dataene før noe skrives
+    payloads: List[Optional[Union[HuntCreate, HuntUpdate]]] = []
+    for op, result in zip(operations, results):
+        payload = None
+        try:
+            if op.op == "create":
+                payload = HuntCreate(**(op.data or {}))
+            else:
+                if not op.id:
+                    raise ValueError("id mangler")
+                if op.op == "update":
+                    payload = HuntUpdate(**(op.data or {}))
+        except ValidationError as e:
+            result.status = status.HTTP_422_UNPROCESSABLE_ENTITY
+            result.detail = [{"loc": err["loc"], "msg": err["msg"]} for err in e.errors()]
+        except ValueError as e:
+            result.status = status.HTTP_422_UNPROCESSABLE_ENTITY
+            result.detail = str(e)
+        payloads.append(payload)
+
+    # Forhåndshent hunder og berørte jaktturer
+    dogs = _load_dogs(
+        db,
+        user_id,
+        list({dog_id for p in payloads if p is not None for dog_id in p.dog_ids or []}),
+    )
+    hunt_ids = {
+        op.id for op, result in zip(operations, results) if op.op != "create" and not result.status
+    }
+    hunts: Dict[str, Hunt] = {}
+    if hunt_ids:
+        hunts = {
+            hunt.id: hunt
+            for hunt in db.scalars(
+                select(Hunt)
+                .options(
+                    selectinload(Hunt.dogs),
+                    selectinload(Hunt.tracks),
+                    selectinload(Hunt.photos),
+                    selectinload(Hunt.tag_rows),
+                    selectinload(Hunt.game_type_rows),
+                )
+                .where(Hunt.id.in_(hunt_ids), Hunt.user_id == user_id)
+            )
+        }
+    distances = statistics.hunt_distances(db, list(hunts))
+
+    for op, payload, result in zip(operations, payloads, results):
+        if result.status:
+            continue
+        hunt = hunts.get(op.id) if op.op != "create" else None
+        if op.op != "create" and hunt is None:
+            result.status = status.HTTP_404_NOT_FOUND
+            result.detail = "Jakttur ikke funnet"
+            continue
+
+        try:
+            with db.begin_nested():
+                if op.op == "create":
+                    hunt = _new_hunt(user_id, payload, dogs)
+                    db.add(hunt)
+                    db.flush()
+                    _after_hunt_saved(db, hunt, True)
+                    db.flush()
+                    hunts[hunt.id] = hunt
+                    result.status = status.HTTP_201_CREATED
+                elif op.op == "update":
+                    previous = statistics.season_contribution(hunt, distances.get(hunt.id, 0.0))
+                    _apply_hunt_update(hunt, payload, dogs)
+                    _after_hunt_saved(db, hunt, False, previous)
+                    db.flush()
+                    result.status = status.HTTP_200_OK
+                else:
+                    _before_hunt_deleted(db, hunt)
+                    db.delete(hunt)
+                    db.flush()
+                    del hunts[hunt.id]
+                    result.status = status.HTTP_204_NO_CONTENT
+        except SQLAlchemyError as e:
+            result.status = status.HTTP_409_CONFLICT
+            result.detail = f"Kunne ikke lagre: {e.__class__.__name__}"
+            continue
+
+        result.id = str(hunt.id)
+        if op.op != "delete":
+            result.updated_at = hunt.updated_at
+    return results
+
+
+def _after_hunt_saved(
+    db: Session, hunt: Hunt, created: bool = False, previous: Optional[list] = None
+) -> None:
+    """
+    Oppdater avledede data etter at en jakttur er opprettet eller endret.
+    `previous` er sesongbidragene fra før endringen (se statistics.season_snapshot).
+    """
+    # Sett updated_at eksplisitt slik at også endringer i relasjoner (f.eks. hunder)
+    # gir ny ETag for jaktturen
+    hunt.updated_at = datetime.utcnow()
+    search_index.index_hunt(db, hunt)
+    facets.sync_hunt_facets(hunt)
+    versions.bump_list_version(db, hunt.user_id)
+    if created:
+        statistics.record_hunt_created(db, hunt)
+    elif previous is not None:
+        statistics.record_hunt_updated(db, hunt, previous)
+
+
+def _before_hunt_deleted(db: Session, hunt: Hunt) -> None:
+    """Fjern avledede data før en jakttur slettes."""
+    search_index.remove_hunt(db, hunt.id)
+    versions.bump_list_version(db, hunt.user_id)
+    if db.scalar(select(Photo.id).where(Photo.hunt_id == hunt.id).limit(1)):
+        # Bildene slettes med jaktturen; bildeindeksen må bygges på nytt
+        versions.bump_photo_version(db, hunt.user_id)
+    statistics.record_hunt_deleted(db, hunt)
+
+
+def _cache_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+def _set_etag(response: Response, etag: str) -> None:
+    response.headers.update(_cache_headers(etag))
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=_cache_headers(etag))
+
+
+def _encode_cursor(hunt: Hunt) -> str:
+    """Lag en ugjennomsiktig pagineringsmarkør fra siste jakttur på en side."""
+    raw = json.dumps([hunt.date.isoformat(), str(hunt.id)]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple:
+    """Les en pagineringsmarkør tilbake til (dato, id)."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_date, cursor_id = json.loads(raw)
+        return date.fromisoformat(cursor_date), str(cursor_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Ugyldig pagineringsmarkør"
+        )
 
 
 def _hunt_to_response(hunt: Hunt) -> HuntResponse:
@@ -391,3 +833,89 @@ def _hunt_to_response(hunt: Hunt) -> HuntResponse:
         created_at=hunt.created_at,
         updated_at=hunt.updated_at,
     )
+
+
+SUMMARY_THUMBNAILS = 3
+
+
+def _hunt_summaries(db: Session, hunts: List[Hunt]) -> List[HuntSummaryResponse]:
+    """
+    Bygg sammendrag for en side med jaktturer.
+
+    Bruker tre aggregerte spørringer (hunder, spor, bilder) for hele siden
+    i stedet for å laste relasjoner per jakttur, og leser aldri sporgeometri.
+    """
+    hunt_ids = [h.id for h in hunts]
+    if not hunt_ids:
+        return []
+
+    dog_counts = dict(
+        db.execute(
+            select(HuntDog.c.hunt_id, func.count())
+            .where(HuntDog.c.hunt_id.in_(hunt_ids))
+            .group_by(HuntDog.c.hunt_id)
+        ).all()
+    )
+
+    track_stats = {
+        hunt_id: (count, distance)
+        for hunt_id, count, distance in db.execute(
+            select(
+                Track.hunt_id,
+                func.count(Track.id),
+                func.coalesce(func.sum(Track.statistics["distance_km"].as_float()), 0),
+            )
+            .where(Track.hunt_id.in_(hunt_ids))
+            .group_by(Track.hunt_id)
+        ).all()
+    }
+
+    # Antall bilder og de første miniatyrbildene per jakttur i én spørring
+    photo_rank = (
+        select(
+            Photo.hunt_id,
+            Photo.thumbnail_url,
+            func.row_number()
+            .over(partition_by=Photo.hunt_id, order_by=Photo.created_at)
+            .label("rank"),
+            func.count().over(partition_by=Photo.hunt_id).label("total"),
+        )
+        .where(Photo.hunt_id.in_(hunt_ids))
+        .subquery()
+    )
+    photo_counts: dict = {}
+    thumbnails: dict = {}
+    for hunt_id, thumbnail_url, _rank, total in db.execute(
+        select(photo_rank).where(photo_rank.c.rank <= SUMMARY_THUMBNAILS)
+    ).all():
+        photo_counts[hunt_id] = total
+        thumbnails.setdefault(hunt_id, []).append(thumbnail_url)
+
+    summaries = []
+    for hunt in hunts:
+        location = hunt.location or {}
+        track_count, distance = track_stats.get(hunt.id, (0, 0))
+        summaries.append(
+            HuntSummaryResponse(
+                id=str(hunt.id),
+                title=hunt.title,
+                date=hunt.date,
+                start_time=hunt.start_time,
+                end_time=hunt.end_time,
+                location_name=location.get("name"),
+                location_region=location.get("region"),
+                game_type=hunt.game_type or [],
+                total_game_seen=len(hunt.game_seen or []),
+                total_game_harvested=len(hunt.game_harvested or []),
+                dog_count=dog_counts.get(hunt.id, 0),
+                track_count=track_count,
+                photo_count=photo_counts.get(hunt.id, 0),
+                total_distance_km=round(float(distance or 0), 2),
+                thumbnails=thumbnails.get(hunt.id, []),
+                tags=hunt.tags or [],
+                is_favorite=hunt.is_favorite,
+                created_at=hunt.created_at,
+                updated_at=hunt.updated_at,
+            )
+        )
+    return summaries
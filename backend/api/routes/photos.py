@@ -1,12 +1,302 @@
-from fastapi import APIRouter, Depends, UploadFile, File
-from api.deps import get_current_user
+"""
+Ruter for bilder.
+"""
+
+import asyncio
+import uuid
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, File, Form, Header, HTTPException, Query, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from models import get_async_db, Hunt, Photo, User
+from api.routes.auth import get_current_user
+from services import duplicates
+from services import geotag
+from services import image_cache
+from services import photos as photo_store
+from services import statistics
+from services import versions
+from services.photos import PhotoRejected
+from services.static_files import IMMUTABLE
 
 router = APIRouter()
 
-@router.post("/upload")
-async def upload_photo(file: UploadFile = File(...), current_user: dict = Depends(get_current_user)):
-    return {"filename": file.filename}
+
+class PhotoResponse(BaseModel):
+    id: str
+    hunt_id: str
+    filename: str
+    url: str
+    thumbnail_url: str
+    display_url: str
+    caption: Optional[str] = None
+    taken_at: Optional[datetime] = None
+    location: Optional[dict] = None
+    tags: List[str] = []
+    created_at: datetime
+    similar_to: List[str] = []
+
+
+class PhotoUploadError(BaseModel):
+    filename: Optional[str]
+    detail: str
+    duplicate_of: Optional[str] = None
+
+
+class PhotoUploadResponse(BaseModel):
+    photos: List[PhotoResponse]
+    errors: List[PhotoUploadError]
+
+
+class PhotoDuplicate(Exception):
+    """Filen er en eksakt kopi av bildet `photo_id`."""
+
+    def __init__(self, photo_id: str):
+        super().__init__(photo_id)
+        self.photo_id = photo_id
+
+
+@router.post("/upload", response_model=PhotoUploadResponse, status_code=status.HTTP_201_CREATED)
+async def upload_photos(
+    hunt_id: str = Form(...),
+    files: List[UploadFile] = File(...),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Last opp ett eller flere bilder til en jakttur.
+
+    Filene lagres og behandles parallelt (EXIF, miniatyr og visningsstørrelse
+    i WebP). Bilder som ikke kan leses hoppes over og listes i `errors`.
+    Eksakte kopier av bilder brukeren allerede har (eller av andre filer i
+    samme opplasting) lagres ikke, men listes i `errors` med `duplicate_of`.
+    Bilder som ligner på eksisterende bilder, eller på bilder foran i samme
+    opplasting, lagres og får dem i `similar_to`.
+    """
+    user_id = current_user.id
+    owned = await db.scalar(
+        select(Hunt.id).where(Hunt.id == hunt_id, Hunt.user_id == user_id)
+    )
+    if not owned:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Jakttur ikke funnet")
+    # Ikke hold lesetransaksjonen åpen mens bildene lagres og behandles
+    await db.rollback()
+
+    async def save(upload: UploadFile) -> dict:
+        photo_id = str(uuid.uuid4())
+        filename = f"{photo_id}.{photo_store.extension(upload.filename)}"
+        try:
+            size, content_hash = await run_in_threadpool(photo_store.save_upload, upload.file, filename)
+        except BaseException:
+            await run_in_threadpool(photo_store.remove_files, photo_id, filename)
+            raise
+        return {"id": photo_id, "filename": filename, "size": size, "content_hash": content_hash}
+
+    async def process(saved: dict) -> dict:
+        try:
+            processed = await photo_store.process(saved["id"], saved["filename"])
+        except BaseException:
+            await run_in_threadpool(photo_store.remove_files, saved["id"], saved["filename"])
+            raise
+        return {**saved, **processed}
+
+    saves = await asyncio.gather(*(save(f) for f in files), return_exceptions=True)
+
+    # Eksakte kopier avvises før den kostbare bildebehandlingen
+    existing = await db.run_sync(
+        duplicates.find_exact,
+        user_id,
+        [s["content_hash"] for s in saves if isinstance(s, dict)],
+    )
+    await db.rollback()
+    outcomes: List[object] = list(saves)
+    first_in_batch = {}
+    for i, saved in enumerate(saves):
+        if not isinstance(saved, dict):
+            continue
+        duplicate_of = existing.get(saved["content_hash"]) or first_in_batch.get(saved["content_hash"])
+        if duplicate_of:
+            outcomes[i] = PhotoDuplicate(duplicate_of)
+            await run_in_threadpool(photo_store.remove_files, saved["id"], saved["filename"])
+        else:
+            first_in_batch[saved["content_hash"]] = saved["id"]
+
+    to_process = [i for i, outcome in enumerate(outcomes) if isinstance(outcome, dict)]
+    processed = await asyncio.gather(*(process(outcomes[i]) for i in to_process), return_exceptions=True)
+    for i, outcome in zip(to_process, processed):
+        outcomes[i] = outcome
+
+    accepted, errors = [], []
+    for upload, outcome in zip(files, outcomes):
+        if isinstance(outcome, PhotoDuplicate):
+            errors.append(
+                PhotoUploadError(
+                    filename=upload.filename,
+                    detail="Bildet er allerede lastet opp",
+                    duplicate_of=outcome.photo_id,
+                )
+            )
+        elif isinstance(outcome, PhotoRejected):
+            errors.append(PhotoUploadError(filename=upload.filename, detail=str(outcome)))
+        elif isinstance(outcome, BaseException):
+            raise outcome
+        else:
+            accepted.append(
+                Photo(
+                    id=outcome["id"],
+                    hunt_id=hunt_id,
+                    filename=outcome["filename"],
+                    original_filename=(upload.filename or outcome["filename"])[:255],
+                    file_size=outcome["size"],
+                    mime_type=outcome["mime_type"],
+                    url=photo_store.original_url(outcome["filename"]),
+                    thumbnail_url=photo_store.variant_url(outcome["id"], photo_store.THUMBNAIL_SIZE),
+                    taken_at=photo_store.taken_at_utc(outcome["taken_at"]),
+                    location=outcome["location"],
+                    exif_data={**outcome["exif"], "width": outcome["width"], "height": outcome["height"]},
+                    tags=[],
+                    content_hash=outcome["content_hash"],
+                    phash=outcome["phash"],
+                )
+            )
+
+    if not accepted:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=[error.model_dump() for error in errors],
+        )
+
+    old_version, similar = await db.run_sync(
+        duplicates.find_similar, user_id, accepted
+    )
+    db.add_all(accepted)
+    # Bilder uten GPS i EXIF plasseres langs sporene på jaktturen
+    await db.run_sync(geotag.geotag_photos, accepted)
+    await db.run_sync(_after_photos_changed, user_id, len(accepted))
+    new_version = await db.run_sync(versions.get_photo_version, user_id)
+    await db.commit()
+    duplicates.photo_index.remember(user_id, old_version, new_version, accepted)
+
+    return PhotoUploadResponse(
+        photos=[
+            _photo_to_response(photo, similar_to=matches)
+            for photo, matches in zip(accepted, similar)
+        ],
+        errors=errors,
+    )
+
+
+@router.get("/{photo_id}/similar", response_model=List[str])
+async def get_similar_photos(
+    photo_id: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Id-ene til brukerens andre bilder som ligner, de likeste først."""
+    user_id = current_user.id
+    photo = await db.scalar(
+        select(Photo)
+        .join(Hunt, Hunt.id == Photo.hunt_id)
+        .where(Photo.id == photo_id, Hunt.user_id == user_id)
+    )
+    if not photo:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bilde ikke funnet")
+    return await db.run_sync(duplicates.similar_to, user_id, photo)
+
+
+@router.get("/{photo_id}/image", response_class=FileResponse)
+async def get_photo_image(
+    photo_id: str,
+    w: int = Query(..., ge=1, description="Ønsket bredde i piksler; rundes opp til en tillatt bredde"),
+    format: Optional[str] = Query(None, description="webp, jpeg eller avif; ellers valgt fra Accept"),
+    accept: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Hent et bilde skalert til en tillatt bredde, i WebP, JPEG eller AVIF.
+
+    Som filene under /uploads krever dette ikke innlogging, slik at adressen
+    kan brukes direkte i <img srcset>; bilde-id-ene er tilfeldige UUID-er.
+    """
+    if format is None:
+        output_format = image_cache.negotiate_format(accept)
+        headers = {"Cache-Control": IMMUTABLE, "Vary": "Accept"}
+    elif format in image_cache.FORMATS:
+        output_format = format
+        headers = {"Cache-Control": IMMUTABLE}
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Formatet støttes ikke (tillatt: {', '.join(image_cache.FORMATS)})",
+        )
+    width = image_cache.snap_width(w)
+
+    try:
+        path = image_cache.cached(photo_id, width, output_format)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bilde ikke funnet")
+    if path is None:
+        filename = await db.scalar(select(Photo.filename).where(Photo.id == photo_id))
+        if not filename:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bilde ikke funnet")
+        await db.rollback()
+        try:
+            path = await image_cache.render(photo_id, filename, width, output_format)
+        except PhotoRejected:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bilde ikke funnet")
+
+    return FileResponse(path, media_type=image_cache.media_type(output_format), headers=headers)
+
 
 @router.delete("/{photo_id}")
-async def delete_photo(photo_id: str, current_user: dict = Depends(get_current_user)):
+async def delete_photo(
+    photo_id: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Slett et bilde med alle varianter."""
+    photo = await db.scalar(
+        select(Photo)
+        .join(Hunt, Hunt.id == Photo.hunt_id)
+        .where(Photo.id == photo_id, Hunt.user_id == current_user.id)
+    )
+    if not photo:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bilde ikke funnet")
+
+    await db.delete(photo)
+    await db.run_sync(_after_photos_changed, current_user.id, -1)
+    await db.commit()
+    await run_in_threadpool(photo_store.remove_files, photo.id, photo.filename)
+    await run_in_threadpool(image_cache.evict_photo, photo.id)
     return {"status": "success"}
+
+
+def _after_photos_changed(db: Session, user_id: str, added: int) -> None:
+    """Oppdater tellere, liste- og bildeversjon når bilder legges til eller slettes."""
+    statistics.apply_delta(db, user_id, total_photos=added)
+    versions.bump_list_version(db, user_id)
+    versions.bump_photo_version(db, user_id)
+
+
+def _photo_to_response(photo: Photo, similar_to: Optional[List[str]] = None) -> PhotoResponse:
+    return PhotoResponse(
+        id=str(photo.id),
+        hunt_id=str(photo.hunt_id),
+        filename=photo.filename,
+        url=photo.url,
+        thumbnail_url=photo.thumbnail_url,
+        display_url=photo_store.variant_url(photo.id, photo_store.DISPLAY_SIZE),
+        caption=photo.caption,
+        taken_at=photo.taken_at,
+        location=photo.location,
+        tags=photo.tags or [],
+        created_at=photo.created_at,
+        similar_to=similar_to or [],
+    )
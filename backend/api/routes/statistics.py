@@ -0,0 +1,189 @@
+"""
+Ruter for statistikk.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel
+from datetime import date, datetime
+from typing import Optional, List
+
+from models import get_async_db, User
+from api.routes.auth import get_current_user
+from services import dog_analytics, statistics
+
+router = APIRouter()
+
+MAX_COMPARED_DOGS = 10
+
+
+# Pydantic-modeller
+class UserStatisticsResponse(BaseModel):
+    total_hunts: int
+    total_distance_km: float
+    total_duration_hours: float
+    total_photos: int
+    active_dogs: int
+    updated_at: Optional[datetime] = None
+
+
+class SeasonFigures(BaseModel):
+    key: str
+    hunts: int
+    successful_hunts: int
+    game_seen: int
+    game_harvested: int
+    distance_km: float
+
+
+class SeasonAnalyticsResponse(BaseModel):
+    season: int
+    totals: SeasonFigures
+    months: List[SeasonFigures]
+    game_types: List[SeasonFigures]
+    locations: List[SeasonFigures]
+
+
+class DogFigures(BaseModel):
+    hunts: int
+    distance_km: float
+    hours_worked: float
+    avg_distance_km: float
+    avg_speed_kmh: float
+    max_speed_kmh: float
+    avg_range_m: Optional[float] = None
+    max_range_m: Optional[float] = None
+
+
+class DogHuntPoint(BaseModel):
+    hunt_id: str
+    date: date
+    distance_km: float
+    duration_minutes: float
+    max_speed_kmh: float
+    avg_range_m: Optional[float] = None
+    max_range_m: Optional[float] = None
+
+
+class DogSeasonFigures(DogFigures):
+    season: int
+    series: List[DogHuntPoint]
+
+
+class DogComparison(BaseModel):
+    dog_id: str
+    name: str
+    color: str
+    totals: DogFigures
+    seasons: List[DogSeasonFigures]
+
+
+@router.get("/", response_model=UserStatisticsResponse)
+async def get_user_statistics(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Hent samlet statistikk for brukeren fra den forhåndsberegnede raden."""
+    stats = await db.run_sync(statistics.get_user_statistics, current_user.id)
+    # Raden bygges ved første lesing og må da lagres
+    await db.commit()
+
+    return UserStatisticsResponse(
+        total_hunts=stats.total_hunts,
+        total_distance_km=round(stats.total_distance_km, 2),
+        total_duration_hours=round(stats.total_duration_minutes / 60, 1),
+        total_photos=stats.total_photos,
+        active_dogs=stats.active_dogs,
+        updated_at=stats.updated_at,
+    )
+
+
+@router.get("/seasons", response_model=List[SeasonFigures])
+async def list_seasons(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Hent totaltall for alle sesonger (nøkkel = sesong), nyeste først."""
+    rollups = await db.run_sync(statistics.get_season_rollups, current_user.id)
+    await db.commit()
+    return [
+        _figures(r, key=str(r.season)) for r in rollups if r.dimension == "total"
+    ]
+
+
+@router.get("/seasons/{season}", response_model=SeasonAnalyticsResponse)
+async def get_season_analytics(
+    season: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Hent tall for én sesong fordelt på måned, vilttype og sted, lest fra
+    forhåndsberegnede rader.
+    """
+    rollups = await db.run_sync(statistics.get_season_rollups, current_user.id, season)
+    await db.commit()
+
+    dimensions: dict = {"total": [], "month": [], "game_type": [], "location": []}
+    for rollup in rollups:
+        dimensions.setdefault(rollup.dimension, []).append(_figures(rollup))
+    if not dimensions["total"]:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Ingen jaktturer i sesongen"
+        )
+
+    def by_hunts(figures: List[SeasonFigures]) -> List[SeasonFigures]:
+        return sorted(figures, key=lambda f: (-f.hunts, f.key))
+
+    return SeasonAnalyticsResponse(
+        season=season,
+        totals=dimensions["total"][0],
+        months=sorted(dimensions["month"], key=lambda f: f.key),
+        game_types=by_hunts(dimensions["game_type"]),
+        locations=by_hunts(dimensions["location"]),
+    )
+
+
+def _figures(rollup, key: Optional[str] = None) -> SeasonFigures:
+    return SeasonFigures(
+        key=rollup.key if key is None else key,
+        hunts=rollup.hunts,
+        successful_hunts=rollup.successful_hunts,
+        game_seen=rollup.game_seen,
+        game_harvested=rollup.game_harvested,
+        distance_km=round(rollup.distance_km, 2),
+    )
+
+
+@router.get("/dogs", response_model=List[DogComparison])
+async def compare_dogs(
+    # Optional med None: påkrevde lister gir 500 i stedet for 422 når de mangler
+    dog_ids: Optional[List[str]] = Query(None, description="Hundene som skal sammenlignes"),
+    seasons: List[int] = Query([], description="Sesonger (år); alle hvis tom"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Sammenlign hunder: distanse, hastighet, avstand til fører og arbeidstimer
+    per sesong, med tidsserie per jakttur.
+    """
+    dog_ids = [dog_id for dog_id in dog_ids or [] if dog_id]
+    if not dog_ids:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Velg minst én hund å sammenligne",
+        )
+    if len(set(dog_ids)) > MAX_COMPARED_DOGS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Kan sammenligne maks {MAX_COMPARED_DOGS} hunder",
+        )
+
+    result = await db.run_sync(
+        dog_analytics.compare_dogs, current_user.id, dog_ids, seasons
+    )
+    if len(result) < len(set(dog_ids)):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Hund ikke funnet"
+        )
+    return result
@@ -0,0 +1,32 @@
+"""
+Ruter for deltasynkronisering (offline-modus).
+"""
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import get_async_db, User
+from api.routes.auth import get_current_user
+from services import serialization
+from services import sync
+
+router = APIRouter()
+
+
+@router.get("/changes")
+async def get_changes(
+    since: int = Query(0, ge=0, description="Siste endringsnummer klienten har sett"),
+    limit: int = Query(500, ge=1, le=2000),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Hent jaktturer, spor, hunder og bilder som er opprettet, endret eller
+    slettet etter `since`.
+
+    Start med `since=0` og send `cursor` fra svaret som `since` neste gang.
+    Er `has_more` satt, hentes neste side straks. Er `reset` satt, må
+    klienten forkaste lokale data og laste alt på nytt.
+    """
+    body = await db.run_sync(sync.changes_since, current_user.id, since, limit)
+    return serialization.RawJSONResponse(body, headers={"Cache-Control": "no-store"})
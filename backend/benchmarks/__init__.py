@@ -0,0 +1 @@
+# Ytelsesmålinger for Jaktopplevelsen-backend
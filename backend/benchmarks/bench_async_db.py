@@ -0,0 +1,111 @@
+"""
+Sammenlign gjennomstrømning under samtidig last: synkron Session i async-ruter
+(blokkerer hendelsesløkken) mot AsyncSession.
+
+Noen få trege spørringer kjører kontinuerlig mens raske oppslag kommer inn
+med fast intervall. Med synkron Session må de raske vente på de trege; med
+AsyncSession gjør de ikke det.
+
+Bruk (fra backend/):
+    python -m benchmarks.bench_async_db --slow-workers 4 --duration 5
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+_db_file = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_file}"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+
+from sqlalchemy import text
+
+from models import Base, SessionLocal, AsyncSessionLocal, engine, async_engine
+
+SLOW_QUERY = text(
+    "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < :n) "
+    "SELECT count(*) FROM c"
+)
+FAST_QUERY = text("SELECT 1")
+
+
+async def sync_request(slow: bool, rows: int) -> None:
+    """Slik rutene fungerte før: blokkerende kall inne i async def."""
+    db = SessionLocal()
+    try:
+        db.execute(SLOW_QUERY if slow else FAST_QUERY, {"n": rows}).scalar()
+    finally:
+        db.close()
+
+
+async def async_request(slow: bool, rows: int) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(SLOW_QUERY if slow else FAST_QUERY, {"n": rows})
+
+
+async def run(handler, duration: float, slow_workers: int, interval: float, rows: int) -> dict:
+    """
+    Kjør `slow_workers` løkker med trege spørringer mens raske oppslag sendes
+    med fast intervall. Latens for raske oppslag måles fra de sendes.
+    """
+    deadline = time.perf_counter() + duration
+    completed = 0
+    fast_latencies = []
+
+    async def slow_worker() -> None:
+        nonlocal completed
+        while time.perf_counter() < deadline:
+            await handler(True, rows)
+            completed += 1
+
+    async def fast_request(issued: float) -> None:
+        nonlocal completed
+        await handler(False, rows)
+        fast_latencies.append((time.perf_counter() - issued) * 1000)
+        completed += 1
+
+    async def pinger() -> None:
+        tasks = []
+        next_at = time.perf_counter()
+        while next_at < deadline:
+            tasks.append(asyncio.ensure_future(fast_request(next_at)))
+            next_at += interval
+            await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+        await asyncio.gather(*tasks)
+
+    started = time.perf_counter()
+    await asyncio.gather(pinger(), *(slow_worker() for _ in range(slow_workers)))
+    elapsed = time.perf_counter() - started
+
+    fast_latencies.sort()
+    return {
+        "throughput": completed / elapsed,
+        "p50": fast_latencies[len(fast_latencies) // 2],
+        "p99": fast_latencies[max(0, int(len(fast_latencies) * 0.99) - 1)],
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--duration", type=float, default=5.0, help="sekunder per kjøring")
+    parser.add_argument("--slow-workers", type=int, default=4, help="samtidige trege forespørsler")
+    parser.add_argument("--interval", type=float, default=0.005, help="sekunder mellom raske kall")
+    parser.add_argument("--rows", type=int, default=200000, help="størrelse på treg spørring")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+
+    print(f"{args.slow_workers} trege forespørsler samtidig, raskt kall hvert "
+          f"{args.interval * 1000:.0f}. ms i {args.duration:.0f} s")
+    for name, handler in (("synkron Session", sync_request), ("AsyncSession", async_request)):
+        result = await run(handler, args.duration, args.slow_workers, args.interval, args.rows)
+        print(f"  {name:<16} {result['throughput']:7.1f} req/s   raske kall: "
+              f"p50 {result['p50']:7.1f} ms  p99 {result['p99']:7.1f} ms")
+
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
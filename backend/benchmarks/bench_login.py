@@ -0,0 +1,143 @@
+"""
+Mål innloggingskapasitet og halelatens under samtidige innlogginger.
+
+`--clients` klienter logger inn i løkke mot /api/v1/auth/token mens et
+helsesjekk-kall sendes med fast intervall. Kjøres med bcrypt i
+hendelsesløkken (slik login fungerte før) og i trådpoolen fra
+services/passwords.py. Med bcrypt i løkken må helsesjekkene vente på hver
+hashing; med trådpoolen gjør de ikke det, og overbelastning gir raske 503
+i stedet for voksende ventetid.
+
+Bruk (fra backend/):
+    python -m benchmarks.bench_login --clients 32 --duration 10
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+_db_file = os.path.join(tempfile.mkdtemp(), "login.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_file}"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+
+import httpx
+from sqlalchemy import insert
+
+import main
+from models import Base, SessionLocal, User, engine
+from services import passwords
+from services.passwords import PasswordHasher
+
+PASSWORD = "hemmelig-passord"
+
+
+class InlineHasher(PasswordHasher):
+    """Hashing direkte i hendelsesløkken, uten adgangskontroll."""
+
+    async def _run(self, fn, *args):
+        return fn(*args)
+
+
+def seed(users: int) -> None:
+    password_hash = passwords.pwd_context.hash(PASSWORD)
+    db = SessionLocal()
+    db.execute(insert(User), [
+        {"email": f"jeger{i}@example.com", "password_hash": password_hash, "name": f"Jeger {i}"}
+        for i in range(users)
+    ])
+    db.commit()
+    db.close()
+
+
+def percentile(values: list, p: float) -> float:
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def run(clients: int, duration: float, interval: float, users: int) -> dict:
+    transport = httpx.ASGITransport(app=main.app)
+    deadline = time.perf_counter() + duration
+    login_latencies, health_latencies = [], []
+    statuses: dict = {}
+
+    async def login_client(client: httpx.AsyncClient, n: int) -> None:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            response = await client.post("/api/v1/auth/token", data={
+                "username": f"jeger{n % users}@example.com", "password": PASSWORD,
+            })
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            if response.status_code == 200:
+                login_latencies.append((time.perf_counter() - started) * 1000)
+            elif response.status_code == 503:
+                # Slik en klient som respekterer Retry-After ville gjort
+                await asyncio.sleep(0.05)
+
+    async def health(client: httpx.AsyncClient, issued: float) -> None:
+        await client.get("/health")
+        health_latencies.append((time.perf_counter() - issued) * 1000)
+
+    async def pinger(client: httpx.AsyncClient) -> None:
+        tasks = []
+        next_at = time.perf_counter()
+        while next_at < deadline:
+            tasks.append(asyncio.ensure_future(health(client, next_at)))
+            next_at += interval
+            await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+        await asyncio.gather(*tasks)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        started = time.perf_counter()
+        await asyncio.gather(pinger(client), *(login_client(client, n) for n in range(clients)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "logins": statuses.get(200, 0) / elapsed,
+        "rejected": statuses.get(503, 0),
+        "login_p50": percentile(login_latencies, 0.50),
+        "login_p99": percentile(login_latencies, 0.99),
+        "health_p50": percentile(health_latencies, 0.50),
+        "health_p99": percentile(health_latencies, 0.99),
+    }
+
+
+async def main_():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=32, help="samtidige innloggingsklienter")
+    parser.add_argument("--duration", type=float, default=10.0, help="sekunder per kjøring")
+    parser.add_argument("--interval", type=float, default=0.02, help="sekunder mellom helsesjekker")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt-runder")
+    args = parser.parse_args()
+
+    passwords.pwd_context.update(bcrypt__rounds=args.rounds)
+    Base.metadata.create_all(bind=engine)
+    seed(args.users)
+
+    pooled = passwords.hasher
+    print(f"{args.clients} klienter logger inn i {args.duration:.0f} s, bcrypt med "
+          f"{args.rounds} runder, {pooled.workers} tråder, maks {pooled.max_pending} i kø")
+    for name, hasher in (
+        ("bcrypt i løkken", InlineHasher(passwords.pwd_context, workers=1, max_pending=0)),
+        ("trådpool", pooled),
+    ):
+        passwords.hasher = hasher
+        # Rutene har importert hasher ved navn; bytt den der også
+        main.auth.hasher = hasher
+        result = await run(args.clients, args.duration, args.interval, args.users)
+        print(f"  {name:<16} {result['logins']:6.1f} innlogginger/s  "
+              f"p50 {result['login_p50']:7.0f} ms  p99 {result['login_p99']:7.0f} ms  "
+              f"avvist {result['rejected']:5d}   helsesjekk: "
+              f"p50 {result['health_p50']:6.1f} ms  p99 {result['health_p99']:6.1f} ms")
+
+    sys.stdout.flush()
+    os._exit(0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main_())
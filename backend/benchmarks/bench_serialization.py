@@ -0,0 +1,132 @@
+"""
+Sammenlign serialisering av store jaktturer: Pydantic-modell + response_model-
+validering + standard JSON mot rå geometri skjøtet inn med orjson.
+
+Bruk (fra backend/):
+    python -m benchmarks.bench_serialization --tracks 6 --points 20000
+"""
+
+import argparse
+import json
+import os
+import statistics
+import time
+from datetime import date, datetime, time as dtime, timedelta
+
+os.environ["DATABASE_URL"] = "sqlite://"
+
+from pydantic import TypeAdapter
+from sqlalchemy.orm import selectinload
+
+from models import Base, SessionLocal, engine, User, Dog, Hunt, Track
+from api.routes.hunts import HuntResponse, _hunt_to_response
+from services import serialization
+
+
+def seed(db, tracks: int, points: int) -> str:
+    user = User(email="bench@example.com", password_hash="x", name="Bench")
+    db.add(user)
+    db.flush()
+    dog = Dog(user_id=user.id, name="Bamse", breed="Elghund")
+    hunt = Hunt(
+        user_id=user.id,
+        title="Elgjakt",
+        date=date(2024, 10, 1),
+        start_time=dtime(7, 0),
+        location={"name": "Finnskogen", "coordinates": [60.6, 12.4]},
+    )
+    hunt.dogs = [dog]
+    db.add(hunt)
+    db.flush()
+
+    start = datetime(2024, 10, 1, 7, 0)
+    for t in range(tracks):
+        coords = [
+            [12.4 + i * 1e-5, 60.6 + t * 1e-3 + i * 1e-5, 250.0 + i % 50, start.timestamp() + i * 2]
+            for i in range(points)
+        ]
+        db.add(Track(
+            hunt_id=hunt.id,
+            dog_id=dog.id,
+            name=f"Spor {t}",
+            source="garmin",
+            geojson={"type": "LineString", "coordinates": coords},
+            statistics={"distance_km": 12.3, "duration_minutes": 300},
+            start_time=start,
+            end_time=start + timedelta(hours=5),
+        ))
+    db.commit()
+    return hunt.id
+
+
+def baseline(db, hunt_id: str) -> bytes:
+    """Dagens vei: ORM-lasting, HuntResponse, response_model-validering og json.dumps."""
+    hunt = (
+        db.query(Hunt)
+        .options(
+            selectinload(Hunt.dogs),
+            selectinload(Hunt.tracks).undefer(Track.geojson),
+            selectinload(Hunt.photos),
+        )
+        .filter(Hunt.id == hunt_id)
+        .one()
+    )
+    adapter = TypeAdapter(HuntResponse)
+    validated = adapter.validate_python(_hunt_to_response(hunt), from_attributes=True)
+    content = adapter.dump_python(validated, mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def fast(db, hunt_id: str) -> bytes:
+    """Ny vei: rå geometri fra databasen skjøtes inn uten parsing."""
+    hunt = (
+        db.query(Hunt)
+        .options(selectinload(Hunt.dogs), selectinload(Hunt.photos))
+        .filter(Hunt.id == hunt_id)
+        .one()
+    )
+    (body,) = serialization.render_hunts(db, [hunt])
+    return body
+
+
+def measure(func, hunt_id: str, runs: int) -> list:
+    timings = []
+    for _ in range(runs):
+        db = SessionLocal()
+        try:
+            started = time.perf_counter()
+            func(db, hunt_id)
+            timings.append((time.perf_counter() - started) * 1000)
+        finally:
+            db.close()
+    return timings
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tracks", type=int, default=6)
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    hunt_id = seed(db, args.tracks, args.points)
+    db.close()
+
+    print(f"{args.tracks} spor x {args.points} punkter, {args.runs} kjøringer "
+          f"(orjson: {'ja' if serialization.orjson else 'nei'})")
+    for name, func in (("pydantic+json", baseline), ("rå geometri", fast)):
+        measure(func, hunt_id, 3)  # oppvarming
+        timings = measure(func, hunt_id, args.runs)
+        print(f"  {name:<14} p50 {percentile(timings, 50):8.1f} ms  "
+              f"p99 {percentile(timings, 99):8.1f} ms  snitt {statistics.mean(timings):8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Hurtigbuffer for Garmin-aktivitetslister.
+Gir stale-while-revalidate-semantikk per bruker slik at importskjermen
+slipper å logge inn mot Garmin Connect ved hver visning.
+"""
+
+import os
+import time
+import threading
+import logging
+from typing import Callable, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ActivityCache:
+    """
+    Prosesslokal buffer for aktivitetslister, nøklet per bruker og datoområde.
+
+    En oppføring er fersk i `ttl` sekunder. Deretter kan den serveres som
+    utdatert i ytterligere `stale_ttl` sekunder mens en bakgrunnsoppdatering
+    henter nye data. Eldre oppføringer hentes synkront.
+    """
+
+    def __init__(self, ttl: float = 300, stale_ttl: float = 3600, max_entries: int = 1000):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._entries: dict = {}
+        self._refreshing: set = set()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str, key: Hashable) -> Tuple[Optional[list], bool]:
+        """
+        Slå opp en aktivitetsliste.
+
+        Returns:
+            tuple: (data eller None, True hvis data bør oppdateres i bakgrunnen)
+        """
+        with self._lock:
+            entry = self._entries.get((user_id, key))
+        if entry is None:
+            return None, False
+
+        stored_at, data = entry
+        age = time.monotonic() - stored_at
+        if age < self.ttl:
+            return data, False
+        if age < self.ttl + self.stale_ttl:
+            return data, True
+        return None, False
+
+    def set(self, user_id: str, key: Hashable, data: list) -> None:
+        """Lagre en aktivitetsliste."""
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                # Fjern eldste oppføring
+                oldest = min(self._entries, key=lambda k: self._entries[k][0])
+                del self._entries[oldest]
+            self._entries[(user_id, key)] = (time.monotonic(), data)
+
+    def invalidate(self, user_id: str) -> None:
+        """Fjern alle bufrede lister for en bruker (f.eks. etter synkronisering)."""
+        with self._lock:
+            for cache_key in [k for k in self._entries if k[0] == user_id]:
+                del self._entries[cache_key]
+
+    def refresh(self, user_id: str, key: Hashable, fetch: Callable[[], list]) -> None:
+        """
+        Hent nye data og oppdater bufferen. Ment for bakgrunnsoppgaver;
+        samtidige oppdateringer av samme nøkkel slås sammen.
+        """
+        cache_key = (user_id, key)
+        with self._lock:
+            if cache_key in self._refreshing:
+                return
+            self._refreshing.add(cache_key)
+        try:
+            self.set(user_id, key, fetch())
+        except Exception as e:
+            logger.warning(f"Bakgrunnsoppdatering av Garmin-aktiviteter feilet: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(cache_key)
+
+
+activity_cache = ActivityCache(
+    ttl=float(os.getenv("GARMIN_ACTIVITY_CACHE_TTL", "300")),
+    stale_ttl=float(os.getenv("GARMIN_ACTIVITY_CACHE_STALE_TTL", "3600")),
+)
@@ -4,16 +4,21 @@ Hovedinngang for FastAPI-applikasjonen
 """
 
 import os
+import asyncio
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 import logging
 from dotenv import load_dotenv
 
-from api.routes import auth, hunts, dogs, tracks, photos, garmin_routes, exports
-from models import Base, engine
+from api.routes import auth, hunts, dogs, tracks, photos, garmin_routes, exports, statistics, sync
+from models import engine, async_engine
+from models.migrations import run_migrations
+from services.search import ensure_search_index
+from services import facets, firebase_tokens
+from services.static_files import UploadFiles
+from services import photos as photo_store
 
 # Last miljøvariabler
 load_dotenv()
@@ -31,9 +36,11 @@ async def lifespan(app: FastAPI):
     """Oppstartslogikk for applikasjonen."""
     logger.info("Starter Jaktopplevelsen API...")
 
-    # Opprett databasetabeller
-    Base.metadata.create_all(bind=engine)
-    logger.info("Database tabeller opprettet")
+    # Oppgrader databaseskjemaet og fyll avledede tabeller
+    run_migrations(engine)
+    ensure_search_index(engine)
+    facets.ensure_facets(engine)
+    logger.info("Databaseskjemaet er oppdatert")
 
     # Opprett opplastningsmapper
     upload_dir = os.getenv("UPLOAD_DIR", "./uploads")
@@ -43,9 +50,15 @@ async def lifespan(app: FastAPI):
     os.makedirs(f"{upload_dir}/gpx", exist_ok=True)
     logger.info(f"Opplastingsmapper opprettet i {upload_dir}")
 
+    # Hold Googles signeringsnøkler for Firebase-tokens ferske i bakgrunnen
+    key_prefetch = asyncio.create_task(firebase_tokens.signing_keys.run_prefetch())
+
     yield
 
     logger.info("Avslutter Jaktopplevelsen API...")
+    key_prefetch.cancel()
+    photo_store.shutdown()
+    await async_engine.dispose()
 
 
 # Opprett FastAPI-app
@@ -88,11 +101,14 @@ app.include_router(tracks.router, prefix="/api/v1/tracks", tags=["Spor"])
 app.include_router(photos.router, prefix="/api/v1/photos", tags=["Bilder"])
 app.include_router(garmin_routes.router, prefix="/api/v1/garmin", tags=["Garmin"])
 app.include_router(exports.router, prefix="/api/v1/exports", tags=["Eksport"])
+app.include_router(statistics.router, prefix="/api/v1/statistics", tags=["Statistikk"])
+app.include_router(sync.router, prefix="/api/v1/sync", tags=["Synkronisering"])
 
-# Statiske filer for opplastninger
+# Statiske filer for opplastninger: immutable-caching, Range og
+# forhåndskomprimerte GPX/GeoJSON (se services/static_files.py)
 upload_dir = os.getenv("UPLOAD_DIR", "./uploads")
 if os.path.exists(upload_dir):
-    app.mount("/uploads", StaticFiles(directory=upload_dir), name="uploads")
+    app.mount("/uploads", UploadFiles(directory=upload_dir), name="uploads")
 
 
 @app.get("/", tags=["Helse"])
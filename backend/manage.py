@@ -0,0 +1,114 @@
+"""
+Vedlikeholdskommandoer for Jaktopplevelsen.
+
+Bruk:
+    python manage.py rebuild-search
+    python manage.py rebuild-facets
+    python manage.py rebuild-stats
+    python manage.py migrate-gpx
+    python manage.py gc-gpx
+    python manage.py backfill-changes
+    python manage.py geotag-photos
+    python manage.py hash-photos
+"""
+
+import argparse
+import logging
+import sys
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from models import SessionLocal, engine
+from models.migrations import run_migrations
+from services import duplicates, facets, geotag, gpx_store, search, statistics, sync
+
+logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+def rebuild_search(db) -> None:
+    """Bygg fulltekstindeksen for jaktturer på nytt."""
+    search.ensure_search_index(engine)
+    count = search.rebuild_search_index(db)
+    logger.info(f"Indekserte {count} jaktturer")
+
+
+def rebuild_facets(db) -> None:
+    """Bygg tabellene for tagger og vilttyper på nytt."""
+    count = facets.rebuild_facets(db)
+    logger.info(f"Oppdaterte tagger og vilttyper for {count} jaktturer")
+
+
+def rebuild_stats(db) -> None:
+    """Beregn brukerstatistikk på nytt fra jaktturer, spor, bilder og hunder."""
+    count = statistics.rebuild_user_statistics(db)
+    logger.info(f"Oppdaterte statistikk for {count} brukere")
+
+
+def migrate_gpx(db) -> None:
+    """Flytt rå GPX fra tracks-tabellen til det komprimerte fillageret."""
+    count = gpx_store.migrate_track_blobs(db)
+    logger.info(f"Flyttet GPX for {count} spor til {gpx_store.store_dir()}")
+
+
+def gc_gpx(db) -> None:
+    """Slett GPX-filer i lageret som ingen spor refererer til."""
+    count = gpx_store.collect_garbage(db)
+    logger.info(f"Slettet {count} GPX-filer")
+
+
+def backfill_changes(db) -> None:
+    """Legg eksisterende objekter i endringsloggen for deltasynkronisering."""
+    count = sync.backfill_change_log(db)
+    logger.info(f"La til {count} objekter i endringsloggen")
+
+
+def geotag_photos(db) -> None:
+    """Gi bilder uten GPS posisjon fra tidsstemplene i jaktturens spor."""
+    count = geotag.geotag_all(db)
+    logger.info(f"Fant posisjon for {count} bilder")
+
+
+def hash_photos(db) -> None:
+    """Beregn innholds- og perseptuell hash for eldre bilder (dublettsjekk)."""
+    count = duplicates.backfill_hashes(db)
+    logger.info(f"Beregnet hash for {count} bilder")
+
+
+COMMANDS = {
+    "rebuild-search": rebuild_search,
+    "rebuild-facets": rebuild_facets,
+    "rebuild-stats": rebuild_stats,
+    "migrate-gpx": migrate_gpx,
+    "gc-gpx": gc_gpx,
+    "backfill-changes": backfill_changes,
+    "geotag-photos": geotag_photos,
+    "hash-photos": hash_photos,
+}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Vedlikehold av Jaktopplevelsen-databasen")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, func in COMMANDS.items():
+        subparsers.add_parser(name, help=func.__doc__)
+    args = parser.parse_args(argv)
+
+    run_migrations(engine)
+    db = SessionLocal()
+    try:
+        COMMANDS[args.command](db)
+        db.commit()
+    except Exception:
+        db.rollback()
+        logger.exception(f"Kommandoen {args.command} feilet")
+        return 1
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
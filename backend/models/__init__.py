@@ -1,21 +1,42 @@
-from .base import Base, get_db, engine, SessionLocal
+from .base import (
+    Base,
+    get_db,
+    get_async_db,
+    engine,
+    async_engine,
+    SessionLocal,
+    AsyncSessionLocal,
+)
 from .user import User
 from .dog import Dog
-from .hunt import Hunt, HuntDog
+from .hunt import Hunt, HuntDog, HuntTag, HuntGameType, HuntListVersion
 from .track import Track
-from .photo import Photo
+from .photo import Photo, PhotoVersion
 from .garmin_sync import GarminSyncLog
+from .statistics import UserStatistics, SeasonRollup
+from .change_log import ChangeLog, SyncState
 
 __all__ = [
     "Base",
     "get_db",
+    "get_async_db",
     "engine",
+    "async_engine",
     "SessionLocal",
+    "AsyncSessionLocal",
     "User",
     "Dog",
     "Hunt",
     "HuntDog",
+    "HuntTag",
+    "HuntGameType",
+    "HuntListVersion",
     "Track",
     "Photo",
+    "PhotoVersion",
     "GarminSyncLog",
+    "UserStatistics",
+    "SeasonRollup",
+    "ChangeLog",
+    "SyncState",
 ]
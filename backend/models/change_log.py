@@ -0,0 +1,151 @@
+from sqlalchemy import (
+    Column,
+    String,
+    DateTime,
+    ForeignKey,
+    Integer,
+    Boolean,
+    Index,
+    delete,
+    event,
+    insert,
+    select,
+    update,
+)
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import instance_dict
+from datetime import datetime
+from .base import Base
+from .dog import Dog
+from .hunt import Hunt
+from .photo import Photo
+from .track import Track
+
+
+class SyncState(Base):
+    """Siste endringsnummer per bruker. Raden låses mens en endring lagres."""
+
+    __tablename__ = "sync_state"
+
+    user_id = Column(
+        String, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    last_seq = Column(Integer, nullable=False, default=0)
+
+
+class ChangeLog(Base):
+    """
+    Siste endring per objekt, for deltasynkronisering.
+
+    Hvert objekt har én rad med endringsnummeret (seq) for siste endring.
+    Slettede objekter beholdes som gravsteiner (deleted=True).
+    """
+
+    __tablename__ = "change_log"
+
+    user_id = Column(
+        String, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    entity = Column(String(20), primary_key=True)  # hunt, track, dog, photo
+    entity_id = Column(String, primary_key=True)
+    seq = Column(Integer, nullable=False)
+    deleted = Column(Boolean, nullable=False, default=False)
+    changed_at = Column(DateTime(timezone=True), default=datetime.utcnow)
+
+    __table_args__ = (Index("idx_change_log_user_seq", "user_id", "seq"),)
+
+    def __repr__(self):
+        return f"<ChangeLog {self.entity} {self.entity_id} #{self.seq}>"
+
+
+SYNCED_ENTITIES = {Hunt: "hunt", Track: "track", Dog: "dog", Photo: "photo"}
+
+
+def _hunt_owners(session: Session, hunt_ids: set) -> dict:
+    """Finn eier for jaktturer, først fra objektene i sesjonen."""
+    owners = {}
+    for obj in list(session.identity_map.values()) + list(session.new) + list(session.deleted):
+        if isinstance(obj, Hunt):
+            values = instance_dict(obj)
+            if "id" in values and "user_id" in values:
+                owners[values["id"]] = values["user_id"]
+    missing = hunt_ids - owners.keys()
+    if missing:
+        owners.update(
+            session.connection().execute(
+                select(Hunt.id, Hunt.user_id).where(Hunt.id.in_(missing))
+            ).all()
+        )
+    return owners
+
+
+@event.listens_for(Session, "after_flush")
+def _record_changes(session: Session, flush_context) -> None:
+    """Logg opprettede, endrede og slettede objekter i samme transaksjon."""
+    changed = []
+    for obj in session.new:
+        if type(obj) in SYNCED_ENTITIES:
+            changed.append((obj, False))
+    for obj in session.dirty:
+        if type(obj) in SYNCED_ENTITIES and session.is_modified(obj):
+            changed.append((obj, False))
+    for obj in session.deleted:
+        if type(obj) in SYNCED_ENTITIES:
+            changed.append((obj, True))
+    if not changed:
+        return
+
+    owners = _hunt_owners(
+        session,
+        {instance_dict(obj).get("hunt_id") for obj, _ in changed if isinstance(obj, (Track, Photo))},
+    )
+    by_user: dict = {}
+    for obj, deleted in changed:
+        values = instance_dict(obj)
+        user_id = values.get("user_id") if isinstance(obj, (Hunt, Dog)) else owners.get(values.get("hunt_id"))
+        if user_id is None:
+            continue
+        by_user.setdefault(user_id, {})[(SYNCED_ENTITIES[type(obj)], values["id"])] = deleted
+
+    conn = session.connection()
+    now = datetime.utcnow()
+    for user_id, entities in by_user.items():
+        # Tildel endringsnumre under radlås, slik at de lagres i stigende rekkefølge
+        result = conn.execute(
+            update(SyncState)
+            .where(SyncState.user_id == user_id)
+            .values(last_seq=SyncState.last_seq + len(entities))
+        )
+        if result.rowcount == 0:
+            conn.execute(insert(SyncState).values(user_id=user_id, last_seq=len(entities)))
+        last_seq = conn.execute(
+            select(SyncState.last_seq).where(SyncState.user_id == user_id)
+        ).scalar()
+
+        by_entity: dict = {}
+        for entity, entity_id in entities:
+            by_entity.setdefault(entity, []).append(entity_id)
+        for entity, entity_ids in by_entity.items():
+            conn.execute(
+                delete(ChangeLog).where(
+                    ChangeLog.user_id == user_id,
+                    ChangeLog.entity == entity,
+                    ChangeLog.entity_id.in_(entity_ids),
+                )
+            )
+
+        first_seq = last_seq - len(entities) + 1
+        conn.execute(
+            insert(ChangeLog),
+            [
+                {
+                    "user_id": user_id,
+                    "entity": entity,
+                    "entity_id": entity_id,
+                    "seq": first_seq + i,
+                    "deleted": deleted,
+                    "changed_at": now,
+                }
+                for i, ((entity, entity_id), deleted) in enumerate(entities.items())
+            ],
+        )
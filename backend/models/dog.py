@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Date, Boolean, ForeignKey, Text
+from sqlalchemy import Column, String, DateTime, Date, Boolean, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -30,5 +30,7 @@ class Dog(Base):
     tracks = relationship("Track", back_populates="dog")
     hunts = relationship("Hunt", secondary="hunt_dogs", back_populates="dogs")
 
+    __table_args__ = (Index("idx_dogs_user_id", "user_id"),)
+
     def __repr__(self):
         return f"<Dog {self.name}>"
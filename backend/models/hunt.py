@@ -9,6 +9,8 @@ from sqlalchemy import (
     Text,
     JSON,
     Table,
+    Index,
+    Integer,
 )
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -65,6 +67,61 @@ class Hunt(Base):
     dogs = relationship("Dog", secondary=HuntDog, back_populates="hunts")
     tracks = relationship("Track", back_populates="hunt", cascade="all, delete-orphan")
     photos = relationship("Photo", back_populates="hunt", cascade="all, delete-orphan")
+    tag_rows = relationship("HuntTag", cascade="all, delete-orphan")
+    game_type_rows = relationship("HuntGameType", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        # Jaktlisten: filter på bruker, sortert på (dato, id) synkende
+        Index("idx_hunts_user_date", "user_id", date.desc(), id.desc()),
+    )
 
     def __repr__(self):
         return f"<Hunt {self.title} on {self.date}>"
+
+
+class HuntTag(Base):
+    """Normalisert kopi av Hunt.tags for indeksert filtrering og fasetter."""
+
+    __tablename__ = "hunt_tags"
+
+    hunt_id = Column(
+        String, ForeignKey("hunts.id", ondelete="CASCADE"), primary_key=True
+    )
+    tag = Column(String(100), primary_key=True)
+    user_id = Column(
+        String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+
+    __table_args__ = (Index("idx_hunt_tags_user_tag", "user_id", "tag", "hunt_id"),)
+
+
+class HuntGameType(Base):
+    """Normalisert kopi av Hunt.game_type for indeksert filtrering og fasetter."""
+
+    __tablename__ = "hunt_game_types"
+
+    hunt_id = Column(
+        String, ForeignKey("hunts.id", ondelete="CASCADE"), primary_key=True
+    )
+    game_type = Column(String(100), primary_key=True)
+    user_id = Column(
+        String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+
+    __table_args__ = (
+        Index("idx_hunt_game_types_user_type", "user_id", "game_type", "hunt_id"),
+    )
+
+
+class HuntListVersion(Base):
+    """Versjonsteller per bruker som økes ved hver endring i brukerens jaktturer."""
+
+    __tablename__ = "hunt_list_versions"
+
+    user_id = Column(
+        String, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(
+        DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow
+    )
@@ -0,0 +1,41 @@
+"""
+Alembic-migreringer ved oppstart.
+
+Skjemaet endres bare av revisjonene under backend/alembic/versions, som
+kjøres herfra eller med `alembic upgrade head` fra backend/. Databaser fra
+før Alembic (laget av create_all()) oppgraderes av de samme revisjonene:
+de hopper over tabeller og kolonner som finnes fra før.
+"""
+
+from pathlib import Path
+
+import sqlalchemy as sa
+from alembic import command, op
+from alembic.config import Config
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def alembic_config(connection=None) -> Config:
+    """Alembic-oppsettet, uavhengig av arbeidskatalogen."""
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "alembic"))
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+
+def run_migrations(bind) -> None:
+    """Oppgrader databasen til siste revisjon i én transaksjon."""
+    with bind.begin() as connection:
+        command.upgrade(alembic_config(connection), "head")
+
+
+def table_exists(name: str) -> bool:
+    """For revisjonene: finnes tabellen fra før?"""
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def column_exists(table: str, column: str) -> bool:
+    """For revisjonene: finnes kolonnen fra før?"""
+    return any(c["name"] == column for c in sa.inspect(op.get_bind()).get_columns(table))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Text, Integer, JSON
+from sqlalchemy import Column, String, DateTime, ForeignKey, Text, Integer, JSON, Index
 from datetime import datetime
 import uuid
 from .base import Base
@@ -23,10 +23,40 @@ class Photo(Base):
     location = Column(JSON, nullable=True)
     exif_data = Column(JSON, nullable=True)
     tags = Column(JSON, default=[])
+    # SHA-256 av originalen og perseptuell hash (dHash, 16 heks), se
+    # services/duplicates.py
+    content_hash = Column(String(64), nullable=True)
+    phash = Column(String(16), nullable=True)
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
+    updated_at = Column(
+        DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow
+    )
 
     # Relationships
     hunt = relationship("Hunt", back_populates="photos")
 
+    __table_args__ = (
+        Index("idx_photos_hunt_id", "hunt_id", "created_at"),
+        Index("idx_photos_content_hash", "content_hash"),
+    )
+
     def __repr__(self):
         return f"<Photo {self.filename}>"
+
+
+class PhotoVersion(Base):
+    """
+    Versjonsteller per bruker som økes når bilder legges til, slettes eller
+    får ny hash. Holdes atskilt fra HuntListVersion, så endringer i
+    jaktturene ikke gjør at bildeindeksen bygges på nytt.
+    """
+
+    __tablename__ = "photo_versions"
+
+    user_id = Column(
+        String, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(
+        DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow
+    )
@@ -0,0 +1,50 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Float
+from datetime import datetime
+from .base import Base
+
+
+class UserStatistics(Base):
+    """Inkrementelt vedlikeholdt sammendrag per bruker (erstatter user_statistics-viewet)."""
+
+    __tablename__ = "user_statistics"
+
+    user_id = Column(
+        String, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    total_hunts = Column(Integer, nullable=False, default=0)
+    total_distance_km = Column(Float, nullable=False, default=0)
+    total_duration_minutes = Column(Float, nullable=False, default=0)
+    total_photos = Column(Integer, nullable=False, default=0)
+    active_dogs = Column(Integer, nullable=False, default=0)
+    updated_at = Column(
+        DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+    def __repr__(self):
+        return f"<UserStatistics {self.user_id}: {self.total_hunts} jaktturer>"
+
+
+class SeasonRollup(Base):
+    """
+    Forhåndsberegnede sesongtall per bruker.
+
+    dimension er "total", "month", "game_type" eller "location", og key er
+    verdien innenfor dimensjonen (tom streng for "total").
+    """
+
+    __tablename__ = "season_rollups"
+
+    user_id = Column(
+        String, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    season = Column(Integer, primary_key=True)
+    dimension = Column(String(20), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    hunts = Column(Integer, nullable=False, default=0)
+    successful_hunts = Column(Integer, nullable=False, default=0)
+    game_seen = Column(Integer, nullable=False, default=0)
+    game_harvested = Column(Integer, nullable=False, default=0)
+    distance_km = Column(Float, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<SeasonRollup {self.season} {self.dimension}={self.key}>"
@@ -1,8 +1,8 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Text, JSON
+from sqlalchemy import Column, String, DateTime, ForeignKey, Text, JSON, Index
 from datetime import datetime
 import uuid
 from .base import Base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 
 
 class Track(Base):
@@ -19,17 +19,28 @@ class Track(Base):
     )
     name = Column(String(255), nullable=False)
     source = Column(String(50), nullable=False)  # garmin, gpx_import, manual
-    gpx_data = Column(Text, nullable=True)
-    geojson = Column(JSON, nullable=False)
+    # Rå GPX ligger i services.gpx_store; gpx_data brukes bare av spor som
+    # ikke er migrert. Geometrien lastes først når den etterspørres.
+    gpx_ref = Column(String(64), nullable=True)
+    gpx_data = deferred(Column(Text, nullable=True))
+    geojson = deferred(Column(JSON, nullable=False))
     statistics = Column(JSON, nullable=False)
     color = Column(String(7), nullable=False, default="#4ECDC4")
     start_time = Column(DateTime(timezone=True), nullable=False)
     end_time = Column(DateTime(timezone=True), nullable=False)
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
+    updated_at = Column(
+        DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow
+    )
 
     # Relationships
     hunt = relationship("Hunt", back_populates="tracks")
     dog = relationship("Dog", back_populates="tracks")
 
+    __table_args__ = (
+        Index("idx_tracks_hunt_id", "hunt_id", "start_time"),
+        Index("idx_tracks_dog_id", "dog_id"),
+    )
+
     def __repr__(self):
         return f"<Track {self.name}>"
@@ -0,0 +1 @@
+# Tjenester og databasehjelpere for Jaktopplevelsen
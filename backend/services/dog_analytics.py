@@ -0,0 +1,323 @@
+"""
+Sammenligning av hunder på tvers av jaktturer og sesonger.
+
+Tallene beregnes fra sporene til hver hund (Track.dog_id). Distanse, tid og
+hastighet leses fra Track.statistics, mens avstand til fører beregnes
+vektorisert med numpy fra geometrien. Førerens spor er sporet uten dog_id på
+samme jakttur; mangler det, måles avstanden fra hundens slippsted.
+
+Ferdige serier bufres per hund og sesong, slik at geometrien bare leses på
+nytt når hundens spor i sesongen eller brukerens jaktturer er endret.
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+from models import Dog, Hunt, Track
+from services import versions
+
+EARTH_RADIUS_M = 6371008.8
+
+# Siste verdi i en koordinat er et Unix-tidsstempel hvis den er større enn
+# dette; ellers er det høyde over havet (se parse_gpx_to_geojson)
+TIMESTAMP_MIN = 1e8
+
+
+@dataclass
+class SeasonSeries:
+    """Tall per jakttur for én hund i én sesong, sortert på dato."""
+
+    hunt_ids: List[str]
+    dates: List[date]
+    distance_km: np.ndarray
+    duration_minutes: np.ndarray
+    max_speed_kmh: np.ndarray
+    avg_range_m: np.ndarray
+    max_range_m: np.ndarray
+
+
+class SeriesCache:
+    """Prosesslokal LRU-buffer for sesongserier, validert mot et fingeravtrykk."""
+
+    def __init__(self, max_entries: int = 2000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[Hashable, SeasonSeries]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, fingerprint: Hashable) -> Optional[SeasonSeries]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != fingerprint:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: Hashable, fingerprint: Hashable, series: SeasonSeries) -> None:
+        with self._lock:
+            self._entries[key] = (fingerprint, series)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+series_cache = SeriesCache()
+
+
+def track_points(geojson: Optional[dict]) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """Hent lengde, bredde og tid (NaN hvis ukjent) fra en GeoJSON LineString."""
+    coords = [c for c in (geojson or {}).get("coordinates") or [] if len(c) >= 2]
+    if not coords:
+        return None
+    lon = np.array([c[0] for c in coords], dtype=float)
+    lat = np.array([c[1] for c in coords], dtype=float)
+    times = np.array(
+        [c[-1] if len(c) >= 3 and c[-1] > TIMESTAMP_MIN else np.nan for c in coords],
+        dtype=float,
+    )
+    return lon, lat, times
+
+
+def _haversine_m(lon1, lat1, lon2, lat2) -> np.ndarray:
+    lon1, lat1, lon2, lat2 = (np.radians(v) for v in (lon1, lat1, lon2, lat2))
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def handler_range_m(dog, handler=None) -> Tuple[float, float]:
+    """
+    Beregn gjennomsnittlig og største avstand mellom hund og fører.
+
+    Har begge sporene tidsstempler, sammenlignes hvert hundepunkt med
+    førerens interpolerte posisjon på samme tidspunkt. Ellers brukes
+    førerens startpunkt, eller hundens eget startpunkt uten førerspor.
+
+    Returns:
+        tuple: (gjennomsnitt, maksimum) i meter
+    """
+    lon, lat, times = dog
+    if handler is not None:
+        h_lon, h_lat, h_times = handler
+        dog_timed = ~np.isnan(times)
+        handler_timed = ~np.isnan(h_times)
+        if dog_timed.any() and handler_timed.sum() >= 2:
+            order = np.argsort(h_times[handler_timed])
+            ref_times = h_times[handler_timed][order]
+            t = times[dog_timed]
+            within = (t >= ref_times[0]) & (t <= ref_times[-1])
+            if within.any():
+                t = t[within]
+                distances = _haversine_m(
+                    lon[dog_timed][within],
+                    lat[dog_timed][within],
+                    np.interp(t, ref_times, h_lon[handler_timed][order]),
+                    np.interp(t, ref_times, h_lat[handler_timed][order]),
+                )
+                return float(distances.mean()), float(distances.max())
+        origin_lon, origin_lat = h_lon[0], h_lat[0]
+    else:
+        origin_lon, origin_lat = lon[0], lat[0]
+
+    distances = _haversine_m(lon, lat, origin_lon, origin_lat)
+    return float(distances.mean()), float(distances.max())
+
+
+def _concat(parts: list):
+    return tuple(np.concatenate(arrays) for arrays in zip(*parts))
+
+
+def _build_series(tracks: list, geometry: Dict[str, dict], handlers: Dict[str, list]) -> SeasonSeries:
+    """Slå sammen en hunds spor i én sesong til én rad per jakttur."""
+    by_hunt: "OrderedDict[str, list]" = OrderedDict()
+    for track in sorted(tracks, key=lambda t: (t.date, t.hunt_id)):
+        by_hunt.setdefault(track.hunt_id, []).append(track)
+
+    count = len(by_hunt)
+    columns = {
+        name: np.zeros(count)
+        for name in ("distance_km", "duration_minutes", "max_speed_kmh")
+    }
+    avg_range = np.full(count, np.nan)
+    max_range = np.full(count, np.nan)
+    dates = []
+
+    for i, (hunt_id, hunt_tracks) in enumerate(by_hunt.items()):
+        dates.append(hunt_tracks[0].date)
+        ranges = []
+        for track in hunt_tracks:
+            stats = track.statistics or {}
+            columns["distance_km"][i] += float(stats.get("distance_km") or 0)
+            columns["duration_minutes"][i] += float(stats.get("duration_minutes") or 0)
+            columns["max_speed_kmh"][i] = max(
+                columns["max_speed_kmh"][i], float(stats.get("max_speed_kmh") or 0)
+            )
+            points = track_points(geometry.get(track.id))
+            if points is not None:
+                handler = _concat(handlers[hunt_id]) if handlers.get(hunt_id) else None
+                ranges.append(handler_range_m(points, handler))
+        if ranges:
+            avg_range[i] = np.mean([r[0] for r in ranges])
+            max_range[i] = max(r[1] for r in ranges)
+
+    return SeasonSeries(
+        hunt_ids=list(by_hunt),
+        dates=dates,
+        avg_range_m=avg_range,
+        max_range_m=max_range,
+        **columns,
+    )
+
+
+def _load_series(db: Session, groups: Dict[Tuple[str, int], list]) -> Dict[Tuple[str, int], SeasonSeries]:
+    """Les geometri for sporene i gruppene og beregn seriene."""
+    track_ids = [t.id for tracks in groups.values() for t in tracks]
+    hunt_ids = list({t.hunt_id for tracks in groups.values() for t in tracks})
+
+    geometry = dict(
+        db.execute(select(Track.id, Track.geojson).where(Track.id.in_(track_ids))).all()
+    )
+    handlers: Dict[str, list] = {}
+    for hunt_id, geojson in db.execute(
+        select(Track.hunt_id, Track.geojson)
+        .where(Track.hunt_id.in_(hunt_ids), Track.dog_id.is_(None))
+        .order_by(Track.start_time)
+    ):
+        points = track_points(geojson)
+        if points is not None:
+            handlers.setdefault(hunt_id, []).append(points)
+
+    return {
+        key: _build_series(tracks, geometry, handlers) for key, tracks in groups.items()
+    }
+
+
+def _nan_to_none(value: float) -> Optional[float]:
+    return None if np.isnan(value) else round(float(value), 1)
+
+
+def summarize(series: List[SeasonSeries]) -> dict:
+    """Summer én eller flere serier til nøkkeltall."""
+    distance = np.concatenate([s.distance_km for s in series])
+    minutes = np.concatenate([s.duration_minutes for s in series])
+    max_speed = np.concatenate([s.max_speed_kmh for s in series])
+    avg_range = np.concatenate([s.avg_range_m for s in series])
+    max_range = np.concatenate([s.max_range_m for s in series])
+
+    hours = minutes.sum() / 60
+    has_range = ~np.isnan(avg_range)
+    return {
+        "hunts": int(distance.size),
+        "distance_km": round(float(distance.sum()), 2),
+        "hours_worked": round(float(hours), 2),
+        "avg_distance_km": round(float(distance.mean()), 2) if distance.size else 0.0,
+        "avg_speed_kmh": round(float(distance.sum() / hours), 2) if hours > 0 else 0.0,
+        "max_speed_kmh": round(float(max_speed.max()), 2) if max_speed.size else 0.0,
+        "avg_range_m": _nan_to_none(avg_range[has_range].mean()) if has_range.any() else None,
+        "max_range_m": _nan_to_none(np.nanmax(max_range)) if has_range.any() else None,
+    }
+
+
+def series_points(series: SeasonSeries) -> List[dict]:
+    return [
+        {
+            "hunt_id": hunt_id,
+            "date": series.dates[i],
+            "distance_km": round(float(series.distance_km[i]), 2),
+            "duration_minutes": round(float(series.duration_minutes[i]), 1),
+            "max_speed_kmh": round(float(series.max_speed_kmh[i]), 2),
+            "avg_range_m": _nan_to_none(series.avg_range_m[i]),
+            "max_range_m": _nan_to_none(series.max_range_m[i]),
+        }
+        for i, hunt_id in enumerate(series.hunt_ids)
+    ]
+
+
+def compare_dogs(
+    db: Session, user_id: str, dog_ids: List[str], seasons: Optional[List[int]] = None
+) -> List[dict]:
+    """
+    Hent nøkkeltall og tidsserier for hundene, per sesong og totalt.
+
+    Args:
+        dog_ids: Hundene som skal sammenlignes (i ønsket rekkefølge)
+        seasons: Sesonger (kalenderår), eller alle sesonger hvis tom
+
+    Returns:
+        list: Én oppføring per hund som tilhører brukeren
+    """
+    dogs = {
+        dog.id: dog
+        for dog in db.scalars(
+            select(Dog).where(Dog.user_id == user_id, Dog.id.in_(dog_ids))
+        )
+    }
+    if not dogs:
+        return []
+
+    query = (
+        select(Track.id, Track.dog_id, Track.hunt_id, Track.statistics, Hunt.date)
+        .join(Hunt, Hunt.id == Track.hunt_id)
+        .where(Hunt.user_id == user_id, Track.dog_id.in_(list(dogs)))
+    )
+    if seasons:
+        query = query.where(
+            or_(*(Hunt.date.between(date(s, 1, 1), date(s, 12, 31)) for s in seasons))
+        )
+
+    groups: Dict[Tuple[str, int], list] = {}
+    for track in db.execute(query):
+        groups.setdefault((track.dog_id, track.date.year), []).append(track)
+
+    version = versions.get_list_version(db, user_id)
+    series: Dict[Tuple[str, int], SeasonSeries] = {}
+    missing: Dict[Tuple[str, int], list] = {}
+    fingerprints = {}
+    for key, tracks in groups.items():
+        fingerprints[key] = (version, tuple(sorted(t.id for t in tracks)))
+        cached = series_cache.get((user_id,) + key, fingerprints[key])
+        if cached is None:
+            missing[key] = tracks
+        else:
+            series[key] = cached
+
+    if missing:
+        for key, computed in _load_series(db, missing).items():
+            series_cache.set((user_id,) + key, fingerprints[key], computed)
+            series[key] = computed
+
+    result = []
+    for dog_id in dict.fromkeys(dog_ids):
+        dog = dogs.get(dog_id)
+        if dog is None:
+            continue
+        dog_seasons = sorted(season for d, season in series if d == dog_id)
+        dog_series = [series[(dog_id, season)] for season in dog_seasons]
+        result.append({
+            "dog_id": dog.id,
+            "name": dog.name,
+            "color": dog.color,
+            "totals": summarize(dog_series) if dog_series else summarize([_empty()]),
+            "seasons": [
+                {
+                    "season": season,
+                    **summarize([s]),
+                    "series": series_points(s),
+                }
+                for season, s in zip(dog_seasons, dog_series)
+            ],
+        })
+    return result
+
+
+def _empty() -> SeasonSeries:
+    empty = np.zeros(0)
+    return SeasonSeries([], [], empty, empty, empty, empty, empty)
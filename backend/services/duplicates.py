@@ -0,0 +1,247 @@
+"""
+Gjenkjenning av dubletter blant en brukers bilder.
+
+Samme bilde lastes ofte opp både fra telefonen og fra kameraet. Eksakte
+kopier kjennes igjen på SHA-256 av originalen (Photo.content_hash) før
+bildebehandlingen startes, og lagres ikke på nytt. Nesten-dubletter (samme
+motiv i annen størrelse, komprimering eller format) finnes med den
+perseptuelle hashen (Photo.phash, se services/images.py) i et BK-tre per
+bruker, som bare besøker en liten del av bildene for hvert oppslag.
+
+Trærne holdes i minnet og merkes med brukerens bildeversjon (se
+services/versions.py). Alle endringer av bilder øker den, mens endringer i
+jaktturene ikke gjør det, så et tre bygges bare på nytt fra databasen når
+bildene faktisk er endret.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from models import Hunt, Photo
+from services import images
+from services import photos as photo_store
+from services import versions
+
+logger = logging.getLogger(__name__)
+
+# Største antall avvikende bits (av 64) for at to bilder regnes som like
+SIMILAR_DISTANCE = int(os.getenv("PHOTO_SIMILAR_DISTANCE", "6"))
+
+# Antall brukere med tre i minnet
+MAX_TREES = int(os.getenv("PHOTO_INDEX_MAX_USERS", "256"))
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+class BKTree:
+    """
+    BK-tre over 64-biters hasher med Hamming-avstand.
+
+    Hver node har barn indeksert på avstanden til noden. Trekantulikheten
+    gir at et søk med radius r bare må følge barn med avstand i
+    [d - r, d + r], der d er avstanden fra søkehashen til noden.
+    """
+
+    def __init__(self):
+        # Node: [hash, bilde-id-er, {avstand: barn}]
+        self._root: Optional[list] = None
+        self.size = 0
+
+    def add(self, value: int, photo_id: str) -> None:
+        self.size += 1
+        if self._root is None:
+            self._root = [value, [photo_id], {}]
+            return
+        node = self._root
+        while True:
+            distance = hamming(value, node[0])
+            if distance == 0:
+                node[1].append(photo_id)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [photo_id], {}]
+                return
+            node = child
+
+    def search(self, value: int, radius: int) -> List[Tuple[int, str]]:
+        """Alle bilder innenfor `radius`, som (avstand, bilde-id) sortert på avstand."""
+        found = []
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = hamming(value, node[0])
+            if distance <= radius:
+                found.extend((distance, photo_id) for photo_id in node[1])
+            for child_distance, child in node[2].items():
+                if distance - radius <= child_distance <= distance + radius:
+                    stack.append(child)
+        return sorted(found)
+
+
+class PhotoIndex:
+    """BK-trær per bruker, de minst nylig brukte kastes ut over MAX_TREES."""
+
+    def __init__(self, max_users: int):
+        self.max_users = max_users
+        self._trees: "OrderedDict[str, Tuple[int, BKTree]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def tree(self, db: Session, user_id: str) -> Tuple[int, BKTree]:
+        """Treet for brukeren, bygget på nytt hvis bildeversjonen er endret."""
+        version = versions.get_photo_version(db, user_id)
+        with self._lock:
+            entry = self._trees.get(user_id)
+            if entry is not None and entry[0] == version:
+                self._trees.move_to_end(user_id)
+                return entry
+
+        tree = BKTree()
+        for photo_id, phash in db.execute(
+            select(Photo.id, Photo.phash)
+            .join(Hunt, Hunt.id == Photo.hunt_id)
+            .where(Hunt.user_id == user_id, Photo.phash.is_not(None))
+        ):
+            tree.add(int(phash, 16), photo_id)
+        return self._store(user_id, version, tree)
+
+    def _store(self, user_id: str, version: int, tree: BKTree) -> Tuple[int, BKTree]:
+        with self._lock:
+            self._trees[user_id] = (version, tree)
+            self._trees.move_to_end(user_id)
+            while len(self._trees) > self.max_users:
+                self._trees.popitem(last=False)
+        return version, tree
+
+    def remember(self, user_id: str, old_version: int, new_version: int, photos: Iterable[Photo]) -> None:
+        """
+        Legg nye bilder i treet etter commit, så egne opplastinger ikke gjør
+        at treet bygges på nytt. Er treet ikke på `old_version`, har noe annet
+        endret seg i mellomtiden, og treet bygges heller ved neste oppslag.
+        """
+        with self._lock:
+            entry = self._trees.get(user_id)
+            if entry is None or entry[0] != old_version:
+                return
+            tree = entry[1]
+            for photo in photos:
+                if photo.phash:
+                    tree.add(int(photo.phash, 16), photo.id)
+            self._trees[user_id] = (new_version, tree)
+
+
+photo_index = PhotoIndex(MAX_TREES)
+
+
+def find_exact(db: Session, user_id: str, content_hashes: Iterable[str]) -> Dict[str, str]:
+    """
+    Brukerens eksisterende bilder med samme innhold.
+
+    Returns:
+        dict: content_hash -> id til det eldste bildet med det innholdet
+    """
+    hashes = list(set(content_hashes))
+    if not hashes:
+        return {}
+    rows = db.execute(
+        select(Photo.content_hash, Photo.id)
+        .join(Hunt, Hunt.id == Photo.hunt_id)
+        .where(Hunt.user_id == user_id, Photo.content_hash.in_(hashes))
+        .order_by(Photo.created_at.desc())
+    )
+    return {content_hash: photo_id for content_hash, photo_id in rows}
+
+
+def find_similar(db: Session, user_id: str, photos: List[Photo]) -> Tuple[int, List[List[str]]]:
+    """
+    Bilder som ligner, for hvert av de nye bildene: brukerens eksisterende
+    bilder og bildene foran i samme opplasting.
+
+    Returns:
+        tuple: (bildeversjonen treet gjelder for, bilde-id-er per bilde
+        sortert med de likeste først)
+    """
+    version, tree = photo_index.tree(db, user_id)
+    matches = []
+    earlier: List[Tuple[int, str]] = []
+    for photo in photos:
+        if not photo.phash:
+            matches.append([])
+            continue
+        value = int(photo.phash, 16)
+        found = tree.search(value, SIMILAR_DISTANCE)
+        for other, photo_id in earlier:
+            distance = hamming(value, other)
+            if distance <= SIMILAR_DISTANCE:
+                found.append((distance, photo_id))
+        matches.append([photo_id for _, photo_id in sorted(found)])
+        earlier.append((value, photo.id))
+    return version, matches
+
+
+def similar_to(db: Session, user_id: str, photo: Photo) -> List[str]:
+    """Andre bilder hos brukeren som ligner på `photo`."""
+    if not photo.phash:
+        return []
+    _, tree = photo_index.tree(db, user_id)
+    return [
+        photo_id
+        for _, photo_id in tree.search(int(photo.phash, 16), SIMILAR_DISTANCE)
+        if photo_id != photo.id
+    ]
+
+
+def _file_hash(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def backfill_hashes(db: Session, batch_size: int = 200) -> int:
+    """
+    Beregn content_hash og phash for bilder lastet opp før dublettsjekken.
+    Bilder der originalen mangler eller ikke kan leses hoppes over. Commit
+    per batch slik at en avbrutt kjøring kan fortsette. Bildeversjonen økes
+    for brukerne som fikk nye hasher, så trærne deres bygges på nytt.
+
+    Returns:
+        int: Antall bilder som fikk hash
+    """
+    hashed = 0
+    after = ""
+    while True:
+        rows = db.execute(
+            select(Photo, Hunt.user_id)
+            .join(Hunt, Hunt.id == Photo.hunt_id)
+            .where(Photo.content_hash.is_(None), Photo.id > after)
+            .order_by(Photo.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return hashed
+        changed_users = set()
+        for photo, user_id in rows:
+            path = photo_store.original_path(photo.filename)
+            try:
+                photo.content_hash = _file_hash(path)
+                photo.phash = images.hash_image(str(path))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Kunne ikke beregne hash for bilde {photo.id}: {e}")
+                continue
+            hashed += 1
+            changed_users.add(user_id)
+        for user_id in changed_users:
+            versions.bump_photo_version(db, user_id)
+        after = rows[-1][0].id
+        db.commit()
@@ -0,0 +1,280 @@
+"""
+Strømmende eksport av alle data for en bruker.
+
+Hunder, jaktturer, spor og bildemetadata leses med serverside-markører
+(AsyncSession.stream med yield_per) og skrives rett ut i HTTP-svaret, som
+NDJSON (ett objekt per linje) eller som ett JSON-dokument som bygges
+fortløpende. Bare én batch med rader og én utdatabuffer er i minnet om
+gangen, uansett hvor mange sesonger som eksporteres. Sporgeometrien
+skjøtes inn som rå JSON-tekst, slik som i services/serialization.py.
+
+Som GPX eller KML eksporteres bare sporene, skrevet med
+services/track_writers.py.
+
+Eksporten leser i én transaksjon. På SQLite holder det en leselås så lenge
+nedlastingen pågår; skrivinger venter på den.
+"""
+
+from datetime import datetime, timezone
+from typing import AsyncIterator, List, Optional
+
+from sqlalchemy import Text, cast, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import AsyncSessionLocal, Dog, Hunt, HuntDog, Photo, Track
+from services.serialization import dumps, loads, splice
+from services.track_writers import WRITERS
+
+FORMATS = {
+    "json": ("application/json", "json"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    **{name: (writer.media_type, writer.extension) for name, writer in WRITERS.items()},
+}
+
+EXPORT_VERSION = 1
+
+# Rader per tur til databasen; spor er store, så de hentes i mindre batcher
+BATCH_SIZE = 500
+TRACK_BATCH_SIZE = 50
+
+# Utdata samles til omtrent så mange byte før de sendes
+CHUNK_SIZE = 64 * 1024
+
+
+def filename(output_format: str, now: Optional[datetime] = None) -> str:
+    """Filnavn for eksporten, som i Cloud Function-eksporten."""
+    now = now or datetime.now()
+    return f"jaktopplevelsen_export_{now.strftime('%Y%m%d_%H%M%S')}.{FORMATS[output_format][1]}"
+
+
+async def _stream(db: AsyncSession, query, batch_size: int = BATCH_SIZE):
+    result = await db.stream(query.execution_options(yield_per=batch_size))
+    async for row in result:
+        yield row
+
+
+async def _dogs(db: AsyncSession, user_id: str, hunt_ids: Optional[List[str]]) -> AsyncIterator[bytes]:
+    """Alle hundene til brukeren, også når bare noen jaktturer eksporteres."""
+    query = select(
+        Dog.id,
+        Dog.name,
+        Dog.breed,
+        Dog.birth_date,
+        Dog.color,
+        Dog.garmin_collar_id,
+        Dog.photo_url,
+        Dog.notes,
+        Dog.is_active,
+        Dog.created_at,
+        Dog.updated_at,
+    ).where(Dog.user_id == user_id).order_by(Dog.created_at, Dog.id)
+    async for row in _stream(db, query):
+        yield dumps(dict(row._mapping))
+
+
+async def _hunts(db: AsyncSession, user_id: str, hunt_ids: Optional[List[str]]) -> AsyncIterator[bytes]:
+    """
+    Jaktturer med dog_ids. Koblingstabellen slås sammen i spørringen, og
+    radene for samme tur (som kommer etter hverandre) samles til ett objekt.
+    """
+    query = (
+        select(
+            Hunt.id,
+            Hunt.title,
+            Hunt.date,
+            Hunt.start_time,
+            Hunt.end_time,
+            Hunt.location,
+            Hunt.weather,
+            Hunt.game_type,
+            Hunt.game_seen,
+            Hunt.game_harvested,
+            Hunt.notes,
+            Hunt.summary,
+            Hunt.tags,
+            Hunt.is_favorite,
+            Hunt.created_at,
+            Hunt.updated_at,
+            HuntDog.c.dog_id,
+        )
+        .outerjoin(HuntDog, HuntDog.c.hunt_id == Hunt.id)
+        .where(Hunt.user_id == user_id)
+        .order_by(Hunt.date, Hunt.id)
+    )
+    if hunt_ids is not None:
+        query = query.where(Hunt.id.in_(hunt_ids))
+
+    current = None
+    async for row in _stream(db, query):
+        if current is None or current["id"] != row.id:
+            if current is not None:
+                yield dumps(current)
+            fields = dict(row._mapping)
+            dog_id = fields.pop("dog_id")
+            current = {**fields, "dog_ids": []}
+            for key in ("game_type", "game_seen", "game_harvested", "tags"):
+                current[key] = current[key] or []
+        else:
+            dog_id = row.dog_id
+        if dog_id is not None:
+            current["dog_ids"].append(dog_id)
+    if current is not None:
+        yield dumps(current)
+
+
+async def _tracks(db: AsyncSession, user_id: str, hunt_ids: Optional[List[str]]) -> AsyncIterator[bytes]:
+    query = (
+        select(
+            Track.id,
+            Track.hunt_id,
+            Track.dog_id,
+            Track.name,
+            Track.source,
+            Track.color,
+            Track.statistics,
+            Track.start_time,
+            Track.end_time,
+            Track.created_at,
+            cast(Track.geojson, Text).label("geojson"),
+        )
+        .join(Hunt, Hunt.id == Track.hunt_id)
+        .where(Hunt.user_id == user_id)
+        .order_by(Track.start_time, Track.id)
+    )
+    if hunt_ids is not None:
+        query = query.where(Track.hunt_id.in_(hunt_ids))
+    async for row in _stream(db, query, TRACK_BATCH_SIZE):
+        meta = dict(row._mapping)
+        geojson = meta.pop("geojson")
+        yield splice(meta, "geojson", geojson.encode() if geojson else b"null")
+
+
+async def _photos(db: AsyncSession, user_id: str, hunt_ids: Optional[List[str]]) -> AsyncIterator[bytes]:
+    query = (
+        select(
+            Photo.id,
+            Photo.hunt_id,
+            Photo.original_filename,
+            Photo.file_size,
+            Photo.mime_type,
+            Photo.url,
+            Photo.thumbnail_url,
+            Photo.caption,
+            Photo.taken_at,
+            Photo.location,
+            Photo.exif_data,
+            Photo.tags,
+            Photo.content_hash,
+            Photo.created_at,
+        )
+        .join(Hunt, Hunt.id == Photo.hunt_id)
+        .where(Hunt.user_id == user_id)
+        .order_by(Photo.created_at, Photo.id)
+    )
+    if hunt_ids is not None:
+        query = query.where(Photo.hunt_id.in_(hunt_ids))
+    async for row in _stream(db, query):
+        fields = dict(row._mapping)
+        fields["tags"] = fields["tags"] or []
+        yield dumps(fields)
+
+
+# Seksjonsnavn i JSON, type i NDJSON og kilde, i rekkefølgen de skrives
+SECTIONS = (
+    ("dogs", "dog", _dogs),
+    ("hunts", "hunt", _hunts),
+    ("tracks", "track", _tracks),
+    ("photos", "photo", _photos),
+)
+
+
+async def _track_documents(user_id: str, output_format: str, hunt_ids: Optional[List[str]]) -> AsyncIterator[bytes]:
+    """Sporene som GPX eller KML, gruppert per jakttur i datorekkefølge."""
+    writer = WRITERS[output_format]()
+    query = (
+        select(
+            Hunt.id.label("hunt_id"),
+            Hunt.title.label("hunt_title"),
+            Track.name,
+            Track.dog_id,
+            Track.color,
+            Dog.name.label("dog_name"),
+            cast(Track.geojson, Text).label("geojson"),
+        )
+        .join(Hunt, Hunt.id == Track.hunt_id)
+        .outerjoin(Dog, Dog.id == Track.dog_id)
+        .where(Hunt.user_id == user_id)
+        .order_by(Hunt.date, Hunt.id, Track.start_time, Track.id)
+    )
+    if hunt_ids is not None:
+        query = query.where(Track.hunt_id.in_(hunt_ids))
+
+    yield writer.header(datetime.now(timezone.utc)).encode()
+    current_hunt = None
+    async with AsyncSessionLocal() as db:
+        async for row in _stream(db, query, TRACK_BATCH_SIZE):
+            if row.hunt_id != current_hunt:
+                if current_hunt is not None:
+                    yield writer.end_hunt().encode()
+                yield writer.begin_hunt(row.hunt_title).encode()
+                current_hunt = row.hunt_id
+            # Én geometri parses om gangen, først når sporet skal skrives
+            geojson = loads(row.geojson) if row.geojson else None
+            coordinates = (geojson or {}).get("coordinates") or []
+            for piece in writer.track(row.hunt_title, row._mapping, coordinates):
+                yield piece.encode()
+    if current_hunt is not None:
+        yield writer.end_hunt().encode()
+    yield writer.footer().encode()
+
+
+async def _records(user_id: str, output_format: str, hunt_ids: Optional[List[str]]) -> AsyncIterator[bytes]:
+    header = {
+        "format": "jaktopplevelsen-export",
+        "version": EXPORT_VERSION,
+        "exported_at": datetime.now(timezone.utc),
+        "user_id": user_id,
+    }
+    # Egen sesjon som lever like lenge som nedlastingen, uavhengig av ruten
+    async with AsyncSessionLocal() as db:
+        if output_format == "ndjson":
+            yield dumps({"type": "export", **header}) + b"\n"
+            for _, record_type, source in SECTIONS:
+                prefix = b'{"type":"' + record_type.encode() + b'",'
+                async for record in source(db, user_id, hunt_ids):
+                    yield prefix + record[1:] + b"\n"
+        else:
+            yield dumps(header)[:-1]
+            for name, _, source in SECTIONS:
+                yield b',"' + name.encode() + b'":['
+                first = True
+                async for record in source(db, user_id, hunt_ids):
+                    yield record if first else b"," + record
+                    first = False
+                yield b"]"
+            yield b"}\n"
+
+
+async def stream_export(
+    user_id: str, output_format: str, hunt_ids: Optional[List[str]] = None
+) -> AsyncIterator[bytes]:
+    """
+    Eksporter brukerens data som NDJSON, JSON, GPX eller KML, i biter på
+    omtrent CHUNK_SIZE byte.
+
+    NDJSON starter med en linje av typen "export" (versjon og tidspunkt),
+    fulgt av én linje per hund, jakttur, spor og bilde med feltet `type`.
+    JSON er ett objekt med de samme feltene og listene dogs, hunts, tracks
+    og photos. Med `hunt_ids` tas bare de jaktturene med (og deres spor og
+    bilder); alle hunder tas alltid med. GPX og KML inneholder bare sporene,
+    med tidsstempler for punktene som har dem.
+    """
+    records = _track_documents if output_format in WRITERS else _records
+    buffer = bytearray()
+    async for piece in records(user_id, output_format, hunt_ids):
+        buffer += piece
+        if len(buffer) >= CHUNK_SIZE:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
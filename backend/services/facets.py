@@ -0,0 +1,140 @@
+"""
+Normaliserte tagger og vilttyper for jaktturer.
+
+Hunt.tags og Hunt.game_type er JSON-kolonner og kan ikke indekseres likt
+på SQLite og PostgreSQL. Verdiene speiles derfor til hunt_tags og
+hunt_game_types, som brukes til filtrering og fasettelling.
+"""
+
+import logging
+from datetime import date
+from typing import Iterable, List, Optional
+
+from sqlalchemy import String, cast, func, literal, or_, select, union_all
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from models import Hunt, HuntTag, HuntGameType
+
+logger = logging.getLogger(__name__)
+
+# JSON-verdiene for en tom eller manglende liste
+_EMPTY_LISTS = ("[]", "null")
+
+
+def _sync_rows(rows: list, values: Iterable[str], make_row, attr: str) -> None:
+    """Oppdater en relasjonsliste slik at den inneholder nøyaktig `values`."""
+    wanted = list(dict.fromkeys(v for v in values if v))
+    existing = {getattr(row, attr): row for row in rows}
+    for value, row in existing.items():
+        if value not in wanted:
+            rows.remove(row)
+    for value in wanted:
+        if value not in existing:
+            rows.append(make_row(value))
+
+
+def sync_hunt_facets(hunt: Hunt) -> None:
+    """Speil tags og game_type for en jakttur til filtertabellene."""
+    _sync_rows(
+        hunt.tag_rows,
+        hunt.tags or [],
+        lambda tag: HuntTag(tag=tag, user_id=hunt.user_id),
+        "tag",
+    )
+    _sync_rows(
+        hunt.game_type_rows,
+        hunt.game_type or [],
+        lambda game_type: HuntGameType(game_type=game_type, user_id=hunt.user_id),
+        "game_type",
+    )
+
+
+def hunts_with_tags(user_id: str, tags: List[str]):
+    """SELECT over hunt_id for jaktturer med minst én av taggene."""
+    return select(HuntTag.hunt_id).where(
+        HuntTag.user_id == user_id, HuntTag.tag.in_(tags)
+    )
+
+
+def hunts_with_game_types(user_id: str, game_types: List[str]):
+    """SELECT over hunt_id for jaktturer med minst én av vilttypene."""
+    return select(HuntGameType.hunt_id).where(
+        HuntGameType.user_id == user_id, HuntGameType.game_type.in_(game_types)
+    )
+
+
+def facet_counts(
+    db: Session,
+    user_id: str,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> dict:
+    """
+    Tell jaktturer per tagg og per vilttype i én spørring.
+
+    Returns:
+        dict: {"tags": [{"value", "count"}], "game_types": [{"value", "count"}]}
+    """
+    facet_queries = []
+    for facet, model, column in (
+        ("tags", HuntTag, HuntTag.tag),
+        ("game_types", HuntGameType, HuntGameType.game_type),
+    ):
+        query = select(
+            literal(facet).label("facet"),
+            column.label("value"),
+            func.count().label("count"),
+        ).where(model.user_id == user_id)
+        if date_from or date_to:
+            query = query.join(Hunt, Hunt.id == model.hunt_id)
+            if date_from:
+                query = query.where(Hunt.date >= date_from)
+            if date_to:
+                query = query.where(Hunt.date <= date_to)
+        facet_queries.append(query.group_by(column))
+
+    result = {"tags": [], "game_types": []}
+    for facet, value, count in db.execute(union_all(*facet_queries)):
+        result[facet].append({"value": value, "count": count})
+    for values in result.values():
+        values.sort(key=lambda item: (-item["count"], item["value"]))
+    return result
+
+
+def rebuild_facets(db: Session) -> int:
+    """
+    Bygg filtertabellene på nytt fra hunts-tabellen.
+
+    Returns:
+        int: Antall behandlede jaktturer
+    """
+    count = 0
+    for hunt in db.query(Hunt).yield_per(500):
+        sync_hunt_facets(hunt)
+        count += 1
+    return count
+
+
+def ensure_facets(engine: Engine) -> None:
+    """
+    Fyll filtertabellene fra eksisterende jaktturer hvis de er tomme mens
+    jaktturer har tagger eller vilttyper, som når tabellene nettopp er
+    opprettet i en database med jaktturer fra før.
+    """
+    with Session(bind=engine) as db:
+        if db.scalar(select(HuntTag.hunt_id).limit(1)) or db.scalar(select(HuntGameType.hunt_id).limit(1)):
+            return
+        has_values = db.scalar(
+            select(Hunt.id)
+            .where(or_(
+                cast(Hunt.tags, String).not_in(_EMPTY_LISTS),
+                cast(Hunt.game_type, String).not_in(_EMPTY_LISTS),
+            ))
+            .limit(1)
+        )
+        if not has_values:
+            return
+        count = rebuild_facets(db)
+        db.commit()
+    logger.info(f"Filtertabellene fylt fra {count} jaktturer")
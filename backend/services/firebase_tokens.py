@@ -0,0 +1,215 @@
+"""
+Verifisering av Firebase ID-tokens med hurtigbuffer.
+
+Googles offentlige signeringsnøkler hentes i bakgrunnen før de utløper
+(styrt av Cache-Control fra Google), slik at en forespørsel aldri må vente
+på nøkkelhenting. Verifiserte tokens bufres på SHA-256 av tokenet til de
+utløper, så gjentatte kall med samme token slipper RSA-verifiseringen.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import requests
+from google.auth import jwt
+
+logger = logging.getLogger(__name__)
+
+CERTS_URL = (
+    "https://www.googleapis.com/robot/v1/metadata/x509/"
+    "securetoken@system.gserviceaccount.com"
+)
+PROJECT_ID = os.getenv("FIREBASE_PROJECT_ID", "jaktopplevelsen-74086")
+
+# Avvik i klokke mellom oss og Google som tolereres ved kontroll av iat/exp
+CLOCK_SKEW_SECONDS = 60
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+class InvalidTokenError(Exception):
+    """Tokenet er ikke et gyldig Firebase ID-token for prosjektet."""
+
+
+class SigningKeys:
+    """
+    Googles X.509-sertifikater for Firebase ID-tokens, nøklet på `kid`.
+
+    `run_prefetch()` holder nøklene ferske i bakgrunnen. Hentes nøklene
+    likevel på forespørselsstien (ved oppstart, eller når Google har rullert
+    til en nøkkel vi ikke har sett), begrenses det til én henting om gangen
+    og høyst én per `min_refresh_interval` sekunder.
+    """
+
+    def __init__(
+        self,
+        url: str = CERTS_URL,
+        refresh_margin: float = 300,
+        min_refresh_interval: float = 30,
+    ):
+        self.url = url
+        self.refresh_margin = refresh_margin
+        self.min_refresh_interval = min_refresh_interval
+        self._certs: Dict[str, str] = {}
+        self._expires_at = 0.0
+        self._attempted_at = 0.0
+        self._lock = threading.Lock()
+
+    def refresh(self) -> None:
+        """Hent nøklene fra Google og noter når de utløper."""
+        self._attempted_at = time.time()
+        response = requests.get(self.url, timeout=10)
+        response.raise_for_status()
+        match = _MAX_AGE.search(response.headers.get("Cache-Control", ""))
+        max_age = int(match.group(1)) if match else 3600
+        self._certs = response.json()
+        self._expires_at = time.time() + max_age
+        logger.debug(f"Hentet {len(self._certs)} Firebase-nøkler, gyldige i {max_age} s")
+
+    def _refresh_locked(self) -> None:
+        with self._lock:
+            self.refresh()
+
+    def get(self, kid: Optional[str] = None) -> Dict[str, str]:
+        """
+        Gjeldende nøkler. Hentes synkront bare hvis vi mangler nøkler, de er
+        utløpt, eller `kid` er ukjent.
+        """
+        if self._fresh(kid):
+            return self._certs
+        with self._lock:
+            # En annen tråd kan ha hentet nøklene mens vi ventet på låsen
+            recently = time.time() - self._attempted_at < self.min_refresh_interval
+            if not self._fresh(kid) and not (recently and self._certs):
+                self.refresh()
+        return self._certs
+
+    def _fresh(self, kid: Optional[str]) -> bool:
+        return (
+            bool(self._certs)
+            and time.time() < self._expires_at
+            and (kid is None or kid in self._certs)
+        )
+
+    async def run_prefetch(self) -> None:
+        """Bakgrunnsoppgave: forny nøklene `refresh_margin` sekunder før de utløper."""
+        while True:
+            try:
+                await asyncio.to_thread(self._refresh_locked)
+                delay = max(self._expires_at - time.time() - self.refresh_margin, 60)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Kunne ikke hente Firebase-nøkler: {e}")
+                delay = 60
+            await asyncio.sleep(delay)
+
+
+class TokenCache:
+    """
+    Prosesslokal LRU-buffer for verifiserte tokens.
+
+    Nøkkelen er SHA-256 av tokenet, så selve tokenet ligger ikke i minnet.
+    En oppføring lever til tokenets `exp` (minus klokkeavvik), men aldri
+    lenger enn `max_ttl` sekunder.
+    """
+
+    def __init__(self, max_entries: int = 10000, max_ttl: float = 3600):
+        self.max_entries = max_entries
+        self.max_ttl = max_ttl
+        self._entries: "OrderedDict[bytes, Tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[dict]:
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, token: str, claims: dict) -> None:
+        now = time.time()
+        expires_at = min(float(claims["exp"]) - CLOCK_SKEW_SECONDS, now + self.max_ttl)
+        if expires_at <= now:
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (expires_at, claims)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+signing_keys = SigningKeys()
+token_cache = TokenCache(
+    max_entries=int(os.getenv("FIREBASE_TOKEN_CACHE_SIZE", "10000")),
+)
+
+
+def _decode(token: str) -> dict:
+    """Verifiser signatur, utløp, utsteder, publikum og subjekt (som Firebase Admin SDK)."""
+    try:
+        header = jwt.decode_header(token)
+    except ValueError as e:
+        raise InvalidTokenError(str(e))
+    if header.get("alg") != "RS256":
+        raise InvalidTokenError("Firebase ID-tokens skal være signert med RS256")
+    kid = header.get("kid")
+    if not kid:
+        raise InvalidTokenError("Tokenet mangler kid")
+
+    certs = signing_keys.get(kid)
+    if kid not in certs:
+        raise InvalidTokenError(f"Ukjent signeringsnøkkel: {kid}")
+    try:
+        claims = jwt.decode(
+            token,
+            certs={kid: certs[kid]},
+            audience=PROJECT_ID,
+            clock_skew_in_seconds=CLOCK_SKEW_SECONDS,
+        )
+    except ValueError as e:
+        raise InvalidTokenError(str(e))
+
+    if claims.get("iss") != f"https://securetoken.google.com/{PROJECT_ID}":
+        raise InvalidTokenError("Feil utsteder")
+    sub = claims.get("sub")
+    if not isinstance(sub, str) or not sub or len(sub) > 128:
+        raise InvalidTokenError("Ugyldig subjekt")
+    claims["uid"] = sub
+    return claims
+
+
+def verify_id_token(token: str) -> dict:
+    """
+    Verifiser et Firebase ID-token og returner innholdet (med `uid`).
+    Blokkerer ved bufferbom; kalles fra en tråd, ikke direkte i event-løkken.
+
+    Raises:
+        InvalidTokenError: Tokenet er ugyldig eller utløpt
+    """
+    claims = token_cache.get(token)
+    if claims is None:
+        claims = _decode(token)
+        token_cache.set(token, claims)
+    return claims
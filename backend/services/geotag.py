@@ -0,0 +1,175 @@
+"""
+Posisjon for bilder uten GPS, beregnet fra sporene på jaktturen.
+
+Sporpunktene har tidsstempler (se garmin/client.py), så bildets posisjon
+er førerens posisjon da bildet ble tatt. For hver jakttur bygges én
+sortert tidsindeks over punktene, og alle bildene på turen slås opp samlet
+med binærsøk (np.searchsorted) og lineær interpolasjon mellom nabopunktene.
+
+Bilder som allerede har posisjon (fra EXIF) endres ikke.
+"""
+
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import Text, cast, or_, select
+from sqlalchemy.orm import Session
+
+from models import Photo, Track
+from services.dog_analytics import track_points
+
+# Bilder tatt før første eller etter siste sporpunkt, eller under et
+# GPS-brudd, får posisjonen til nærmeste punkt hvis det er så nær i tid
+EDGE_TOLERANCE_SECONDS = 5 * 60
+
+# Mellom to punkter med større tidsavstand enn dette (GPS-brudd) er
+# interpolasjonen for usikker til å brukes
+MAX_GAP_SECONDS = 10 * 60
+
+TimeIndex = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def _epoch(value: datetime) -> float:
+    """Tidspunkt som Unix-tid. Tidspunkter uten tidssone er UTC."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def time_index(geojsons: List[Optional[dict]]) -> Optional[TimeIndex]:
+    """
+    Slå sammen tidsstemplede punkter fra ett eller flere spor til én
+    indeks (tid, lengde, bredde) sortert på tid.
+    """
+    parts = []
+    for geojson in geojsons:
+        points = track_points(geojson)
+        if points is None:
+            continue
+        lon, lat, times = points
+        timed = ~np.isnan(times)
+        if timed.any():
+            parts.append((times[timed], lon[timed], lat[timed]))
+    if not parts:
+        return None
+    times, lon, lat = (np.concatenate(arrays) for arrays in zip(*parts))
+    order = np.argsort(times, kind="stable")
+    return times[order], lon[order], lat[order]
+
+
+def locate(index: TimeIndex, photo_times: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Interpoler posisjoner for mange tidspunkter samtidig.
+
+    Returns:
+        tuple: (lengde, bredde, gyldig) med ett element per tidspunkt
+    """
+    times, lon, lat = index
+    if len(times) == 1:
+        valid = np.abs(photo_times - times[0]) <= EDGE_TOLERANCE_SECONDS
+        return np.full(len(photo_times), lon[0]), np.full(len(photo_times), lat[0]), valid
+
+    # Indeksen til første punkt etter hvert tidspunkt; naboene er (i - 1, i)
+    right = np.clip(np.searchsorted(times, photo_times, side="right"), 1, len(times) - 1)
+    left = right - 1
+    span = times[right] - times[left]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fraction = np.where(span > 0, (photo_times - times[left]) / span, 0.0)
+    # Utenfor sporet (innenfor toleransen) brukes nærmeste endepunkt
+    fraction = np.clip(fraction, 0.0, 1.0)
+    # Over et GPS-brudd interpoleres det ikke; nærmeste punkt brukes hvis
+    # det er nær nok i tid
+    gap = span > MAX_GAP_SECONDS
+    fraction = np.where(gap, np.round(fraction), fraction)
+    nearest = np.minimum(np.abs(photo_times - times[left]), np.abs(times[right] - photo_times))
+    valid = np.where(gap, nearest <= EDGE_TOLERANCE_SECONDS, True)
+    valid &= (photo_times >= times[0] - EDGE_TOLERANCE_SECONDS) & (
+        photo_times <= times[-1] + EDGE_TOLERANCE_SECONDS
+    )
+
+    return (
+        lon[left] + fraction * (lon[right] - lon[left]),
+        lat[left] + fraction * (lat[right] - lat[left]),
+        valid,
+    )
+
+
+def _hunt_indexes(db: Session, hunt_ids: List[str]) -> Dict[str, TimeIndex]:
+    """
+    Tidsindeks per jakttur. Førerens spor (uten dog_id) brukes når de har
+    tidsstempler; ellers det hundesporet som har flest tidsstemplede punkter.
+    """
+    handler: Dict[str, list] = {}
+    dogs: Dict[str, list] = {}
+    for hunt_id, dog_id, geojson in db.execute(
+        select(Track.hunt_id, Track.dog_id, Track.geojson).where(Track.hunt_id.in_(hunt_ids))
+    ):
+        (dogs if dog_id else handler).setdefault(hunt_id, []).append(geojson)
+
+    indexes = {}
+    for hunt_id in hunt_ids:
+        index = time_index(handler.get(hunt_id, []))
+        if index is None:
+            candidates = [time_index([g]) for g in dogs.get(hunt_id, [])]
+            candidates = [c for c in candidates if c is not None]
+            if candidates:
+                index = max(candidates, key=lambda c: len(c[0]))
+        if index is not None:
+            indexes[hunt_id] = index
+    return indexes
+
+
+def geotag_photos(db: Session, photos: List[Photo]) -> int:
+    """
+    Sett posisjon på bilder som har taken_at men mangler location.
+
+    Returns:
+        int: Antall bilder som fikk posisjon
+    """
+    by_hunt: Dict[str, List[Photo]] = {}
+    for photo in photos:
+        if photo.location is None and photo.taken_at is not None:
+            by_hunt.setdefault(photo.hunt_id, []).append(photo)
+    if not by_hunt:
+        return 0
+
+    tagged = 0
+    for hunt_id, index in _hunt_indexes(db, list(by_hunt)).items():
+        hunt_photos = by_hunt[hunt_id]
+        photo_times = np.array([_epoch(p.taken_at) for p in hunt_photos])
+        lon, lat, valid = locate(index, photo_times)
+        for photo, x, y, ok in zip(hunt_photos, lon, lat, valid):
+            if ok:
+                photo.location = {"lat": float(y), "lng": float(x), "source": "track"}
+                tagged += 1
+    return tagged
+
+
+def geotag_all(db: Session, batch_size: int = 500) -> int:
+    """
+    Posisjoner alle bilder uten location som kan plasseres. Commit per batch
+    slik at en avbrutt kjøring kan fortsette.
+
+    Returns:
+        int: Antall bilder som fikk posisjon
+    """
+    tagged = 0
+    after = ""
+    while True:
+        photos = db.scalars(
+            select(Photo)
+            .where(
+                # JSON-kolonnen kan ha SQL NULL eller JSON null
+                or_(Photo.location.is_(None), cast(Photo.location, Text) == "null"),
+                Photo.taken_at.is_not(None),
+                Photo.id > after,
+            )
+            .order_by(Photo.id)
+            .limit(batch_size)
+        ).all()
+        if not photos:
+            return tagged
+        tagged += geotag_photos(db, photos)
+        after = photos[-1].id
+        db.commit()
@@ -0,0 +1,154 @@
+"""
+Innholdsadressert lager for rå GPX-filer.
+
+GPX-filene komprimeres med gzip og lagres under UPLOAD_DIR/gpx med
+SHA-256 av innholdet som navn, slik at like filer (f.eks. samme Garmin-
+aktivitet importert to ganger) bare lagres én gang. Track.gpx_ref peker
+på filen; tracks-tabellen holder bare metadata og geometri.
+
+Med brotli installert lagres også en .gpx.br-fil ved siden av, som
+/uploads sender til klienter som godtar br (se services/static_files.py).
+"""
+
+import gzip
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Iterator, Union
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from models import Track
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - valgfri avhengighet
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+SUFFIX = ".gpx.gz"
+BROTLI_SUFFIX = ".gpx.br"
+
+# Nylig skrevne filer kan tilhøre en transaksjon som ennå ikke er lagret
+GARBAGE_MIN_AGE_SECONDS = 3600
+
+
+def store_dir() -> Path:
+    return Path(os.getenv("UPLOAD_DIR", "./uploads")) / "gpx"
+
+
+def path_for(ref: str) -> Path:
+    """Filsti for en referanse, fordelt på undermapper etter de to første tegnene."""
+    if len(ref) != 64 or not all(c in "0123456789abcdef" for c in ref):
+        raise ValueError(f"Ugyldig GPX-referanse: {ref}")
+    return store_dir() / ref[:2] / f"{ref}{SUFFIX}"
+
+
+def brotli_path_for(ref: str) -> Path:
+    """Filsti for den brotli-komprimerte søsterfilen til en referanse."""
+    return path_for(ref).with_name(f"{ref}{BROTLI_SUFFIX}")
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    """Skriv atomisk: lesere ser aldri en halvskrevet fil."""
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def put(gpx: Union[str, bytes]) -> str:
+    """
+    Lagre en GPX-fil komprimert. Finnes innholdet fra før, skrives ingenting.
+
+    Returns:
+        str: Referansen (SHA-256 av det ukomprimerte innholdet)
+    """
+    data = gpx.encode("utf-8") if isinstance(gpx, str) else gpx
+    ref = hashlib.sha256(data).hexdigest()
+    path = path_for(ref)
+    if path.exists():
+        # Forny tidsstempelet så collect_garbage() ikke sletter filen før
+        # det nye sporet er lagret
+        os.utime(path)
+        return ref
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if brotli is not None:
+        # Før gzip-filen, som er den put() sjekker om finnes
+        _write_atomic(brotli_path_for(ref), brotli.compress(data, mode=brotli.MODE_TEXT, quality=9))
+    _write_atomic(path, gzip.compress(data, compresslevel=6, mtime=0))
+    return ref
+
+
+def get(ref: str) -> str:
+    """Les en lagret GPX-fil som tekst."""
+    with gzip.open(path_for(ref), "rb") as f:
+        return f.read().decode("utf-8")
+
+
+def iter_chunks(ref: str, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """Les en lagret GPX-fil ukomprimert i biter, for strømming."""
+    with gzip.open(path_for(ref), "rb") as f:
+        while chunk := f.read(chunk_size):
+            yield chunk
+
+
+def migrate_track_blobs(db: Session, batch_size: int = 200) -> int:
+    """
+    Flytt rå GPX fra tracks.gpx_data til lageret og tøm kolonnen.
+    Kan kjøres flere ganger; allerede flyttede spor hoppes over.
+
+    Returns:
+        int: Antall flyttede spor
+    """
+    count = 0
+    while True:
+        rows = db.execute(
+            select(Track.id, Track.gpx_data)
+            .where(Track.gpx_data.is_not(None), Track.gpx_ref.is_(None))
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return count
+        for track_id, gpx_data in rows:
+            db.execute(
+                update(Track)
+                .where(Track.id == track_id)
+                .values(gpx_ref=put(gpx_data), gpx_data=None)
+            )
+        # Commit per batch slik at en avbrutt migrering kan fortsette
+        db.commit()
+        count += len(rows)
+        logger.info(f"Flyttet GPX for {count} spor")
+
+
+def collect_garbage(db: Session) -> int:
+    """
+    Slett lagrede filer som ingen spor refererer til. Filer yngre enn
+    GARBAGE_MIN_AGE_SECONDS beholdes.
+
+    Returns:
+        int: Antall slettede filer
+    """
+    referenced = set(
+        db.scalars(select(Track.gpx_ref).where(Track.gpx_ref.is_not(None)).distinct())
+    )
+    cutoff = time.time() - GARBAGE_MIN_AGE_SECONDS
+    removed = 0
+    for path in store_dir().glob(f"*/*{SUFFIX}"):
+        if path.name[: -len(SUFFIX)] not in referenced and path.stat().st_mtime < cutoff:
+            path.unlink(missing_ok=True)
+            brotli_path_for(path.name[: -len(SUFFIX)]).unlink(missing_ok=True)
+            removed += 1
+    return removed
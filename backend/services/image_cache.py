@@ -0,0 +1,204 @@
+"""
+Bildevarianter i vilkårlig tillatt bredde og format, laget ved behov.
+
+Variantene lages fra originalen i prosesspoolen til services/photos.py og
+lagres under UPLOAD_DIR/cache/images/<bilde-id>/<bredde>.<format>. Mappen
+holdes under IMAGE_CACHE_MAX_MB ved å slette de minst nylig brukte
+variantene. Et treff krever verken databaseoppslag eller bildebehandling,
+og samtidige forespørsler etter samme variant lages bare én gang.
+"""
+
+import asyncio
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+from services import images
+from services import photos as photo_store
+
+# Bredder som kan bestilles; andre rundes opp til nærmeste tillatte
+WIDTHS = tuple(sorted(
+    int(w) for w in os.getenv("IMAGE_WIDTHS", "160,320,480,640,800,1024,1280,1600,2048").split(",")
+))
+FORMATS = tuple(images.OUTPUT_FORMATS)
+
+
+def cache_dir() -> Path:
+    return photo_store.upload_dir() / "cache" / "images"
+
+
+def snap_width(width: int) -> int:
+    """Minste tillatte bredde som er minst `width` (eller den største)."""
+    return next((w for w in WIDTHS if w >= width), WIDTHS[-1])
+
+
+def negotiate_format(accept: Optional[str]) -> str:
+    """Velg det minste formatet klienten oppgir at den støtter."""
+    accept = accept or ""
+    if "avif" in images.OUTPUT_FORMATS and "image/avif" in accept:
+        return "avif"
+    if "image/webp" in accept:
+        return "webp"
+    return "jpeg"
+
+
+def media_type(output_format: str) -> str:
+    return images.OUTPUT_FORMATS[output_format][1]
+
+
+class DiskLRU:
+    """
+    Størrelsesbegrenset filbuffer med LRU-utkasting.
+
+    Indeksen holdes i minnet og bygges fra mappen ved første bruk, sortert på
+    endringstid. Med flere arbeidsprosesser har hver sin indeks; en fil en
+    annen prosess har slettet behandles som bom.
+    """
+
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._total = 0
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _load(self) -> None:
+        entries = []
+        if self.root.exists():
+            for path in self.root.rglob("*"):
+                if path.is_file() and path.suffix != ".tmp":
+                    stat = path.stat()
+                    entries.append((stat.st_mtime, str(path.relative_to(self.root)), stat.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total += size
+        self._loaded = True
+
+    def path(self, key: str) -> Path:
+        return self.root / key
+
+    def get(self, key: str) -> Optional[Path]:
+        """Filstien hvis nøkkelen finnes, og marker den som nylig brukt."""
+        path = self.path(key)
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            if key in self._index:
+                if path.exists():
+                    self._index.move_to_end(key)
+                    return path
+                self._total -= self._index.pop(key)
+                return None
+        # Laget av en annen arbeidsprosess
+        if path.exists():
+            self.add(key, path.stat().st_size)
+            return path
+        return None
+
+    def add(self, key: str, size: int) -> None:
+        """Registrer en ny fil og kast ut de eldste til bufferen er under grensen."""
+        evicted = []
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            self._total += size - self._index.pop(key, 0)
+            self._index[key] = size
+            while self._total > self.max_bytes and len(self._index) > 1:
+                old_key, old_size = self._index.popitem(last=False)
+                self._total -= old_size
+                evicted.append(old_key)
+        for old_key in evicted:
+            self.path(old_key).unlink(missing_ok=True)
+
+    def remove_prefix(self, prefix: str) -> None:
+        """Fjern alle filer med nøkler som starter med `prefix`."""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            keys = [key for key in self._index if key.startswith(prefix)]
+            for key in keys:
+                self._total -= self._index.pop(key)
+        for key in keys:
+            self.path(key).unlink(missing_ok=True)
+
+
+disk_cache = DiskLRU(
+    cache_dir(),
+    max_bytes=int(os.getenv("IMAGE_CACHE_MAX_MB", "1024")) * 1024 * 1024,
+)
+
+_in_flight: Dict[str, asyncio.Future] = {}
+
+
+def variant_key(photo_id: str, width: int, output_format: str) -> str:
+    """
+    Nøkkelen (relativ filsti) for en variant.
+
+    Raises:
+        ValueError: photo_id er ikke en UUID
+    """
+    photo_id = str(uuid.UUID(photo_id))
+    return f"{photo_id}/{width}.{output_format}"
+
+
+def cached(photo_id: str, width: int, output_format: str) -> Optional[Path]:
+    """Filstien til en ferdig variant, eller None."""
+    return disk_cache.get(variant_key(photo_id, width, output_format))
+
+
+async def render(photo_id: str, filename: str, width: int, output_format: str) -> Path:
+    """
+    Lag en variant i prosesspoolen og legg den i bufferen. Samtidige kall
+    for samme variant venter på den samme jobben.
+
+    Raises:
+        photos.PhotoRejected: Originalen kan ikke leses
+    """
+    key = variant_key(photo_id, width, output_format)
+    pending = _in_flight.get(key)
+    if pending is not None:
+        return await asyncio.shield(pending)
+
+    future = asyncio.get_running_loop().create_future()
+    _in_flight[key] = future
+    try:
+        path = disk_cache.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            size = await asyncio.get_running_loop().run_in_executor(
+                photo_store.get_pool(),
+                images.render_variant,
+                str(photo_store.original_path(filename)),
+                str(path),
+                width,
+                output_format,
+            )
+        except (ValueError, FileNotFoundError) as e:
+            raise photo_store.PhotoRejected(str(e))
+        disk_cache.add(key, size)
+        future.set_result(path)
+        return path
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except BaseException as e:
+        future.set_exception(e)
+        # Unngå "exception was never retrieved" når ingen andre venter
+        future.exception()
+        raise
+    finally:
+        del _in_flight[key]
+
+
+def evict_photo(photo_id: str) -> None:
+    """Slett alle bufrede varianter av et bilde."""
+    disk_cache.remove_prefix(f"{photo_id}/")
+    # Tomme mapper ryddes bort; feiler stille hvis en variant lages samtidig
+    try:
+        disk_cache.path(photo_id).rmdir()
+    except OSError:
+        pass
@@ -0,0 +1,243 @@
+"""
+Bildebehandling med Pillow: EXIF-uttrekk, WebP-varianter og perseptuell hash.
+
+Funksjonene her kjøres i arbeidsprosessene til services/photos.py og
+importerer derfor bare Pillow, ikke databasen eller resten av appen.
+"""
+
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from PIL import ExifTags, Image, ImageOps, UnidentifiedImageError
+
+try:
+    import pillow_avif  # noqa: F401  (registrerer AVIF i Pillow)
+except ImportError:  # pragma: no cover - valgfri avhengighet
+    pillow_avif = None
+
+# Utdataformat -> (Pillow-format, MIME-type, lagringsparametere)
+OUTPUT_FORMATS = {
+    "webp": ("WEBP", "image/webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", "image/jpeg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+if pillow_avif is not None:
+    OUTPUT_FORMATS["avif"] = ("AVIF", "image/avif", {"quality": 60, "speed": 6})
+
+# EXIF-felter som tas vare på i Photo.exif_data
+_EXIF_FIELDS = {
+    "Make": ExifTags.Base.Make,
+    "Model": ExifTags.Base.Model,
+    "LensModel": ExifTags.Base.LensModel,
+    "ExposureTime": ExifTags.Base.ExposureTime,
+    "FNumber": ExifTags.Base.FNumber,
+    "ISOSpeedRatings": ExifTags.Base.ISOSpeedRatings,
+    "FocalLength": ExifTags.Base.FocalLength,
+    "DateTimeOriginal": ExifTags.Base.DateTimeOriginal,
+    "OffsetTimeOriginal": ExifTags.Base.OffsetTimeOriginal,
+}
+
+
+def _plain(value):
+    """Gjør EXIF-verdier (IFDRational, tupler) JSON-vennlige."""
+    if isinstance(value, tuple):
+        return [_plain(v) for v in value]
+    if isinstance(value, bytes):
+        return None
+    if hasattr(value, "numerator") and not isinstance(value, int):
+        return float(value) if value.denominator else None
+    return value
+
+
+def _taken_at(original: Optional[str], offset: Optional[str]) -> Optional[datetime]:
+    """
+    Tidspunkt fra DateTimeOriginal. Med OffsetTimeOriginal blir det UTC;
+    uten er det kameraets lokale tid uten tidssone.
+    """
+    if not original:
+        return None
+    try:
+        taken = datetime.strptime(original.strip("\x00 "), "%Y:%m:%d %H:%M:%S")
+    except ValueError:
+        return None
+    if offset:
+        try:
+            sign = -1 if offset.startswith("-") else 1
+            hours, minutes = offset.lstrip("+-").split(":")
+            delta = timedelta(hours=int(hours), minutes=int(minutes))
+            taken = (taken - sign * delta).replace(tzinfo=timezone.utc)
+        except ValueError:
+            pass
+    return taken
+
+
+def _gps_location(gps: dict) -> Optional[dict]:
+    """Koordinater fra GPS-IFD-en som {lat, lng}, eller None."""
+    try:
+        lat = gps[ExifTags.GPS.GPSLatitude]
+        lng = gps[ExifTags.GPS.GPSLongitude]
+    except KeyError:
+        return None
+
+    def degrees(dms) -> float:
+        d, m, s = (float(v) for v in dms)
+        return d + m / 60 + s / 3600
+
+    try:
+        location = {
+            "lat": degrees(lat) * (-1 if gps.get(ExifTags.GPS.GPSLatitudeRef) == "S" else 1),
+            "lng": degrees(lng) * (-1 if gps.get(ExifTags.GPS.GPSLongitudeRef) == "W" else 1),
+            "source": "exif",
+        }
+    except (TypeError, ValueError, ZeroDivisionError):
+        return None
+    if ExifTags.GPS.GPSAltitude in gps:
+        location["altitude"] = _plain(gps[ExifTags.GPS.GPSAltitude])
+    return location
+
+
+def read_metadata(img: Image.Image) -> dict:
+    """Hent tidspunkt, posisjon og utvalgte EXIF-felter fra et åpnet bilde."""
+    exif = img.getexif()
+    tags = dict(exif)
+    tags.update(exif.get_ifd(ExifTags.IFD.Exif))
+    fields = {
+        name: _plain(tags[tag]) for name, tag in _EXIF_FIELDS.items() if tag in tags
+    }
+    taken_at = _taken_at(fields.get("DateTimeOriginal"), fields.get("OffsetTimeOriginal"))
+    return {
+        "taken_at": taken_at.isoformat() if taken_at else None,
+        "location": _gps_location(exif.get_ifd(ExifTags.IFD.GPSInfo)),
+        "exif": {name: value for name, value in fields.items() if value is not None},
+    }
+
+
+def _save(img: Image.Image, path: str, pillow_format: str, **params) -> None:
+    """Skriv bildet atomisk, så en halvskrevet variant aldri serveres."""
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            img.save(f, pillow_format, **params)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def _open(source: str) -> Image.Image:
+    try:
+        return Image.open(source)
+    except UnidentifiedImageError:
+        raise ValueError("Filen er ikke et gjenkjent bildeformat")
+    except Image.DecompressionBombError:
+        raise ValueError("Bildet har for mange piksler")
+
+
+def _prepare(img: Image.Image, size: int) -> Image.Image:
+    """
+    Dekod et åpnet bilde, rotert etter EXIF og i RGB/RGBA. JPEG dekodes
+    direkte i redusert skala (1/2, 1/4, 1/8) når begge sider blir minst `size`.
+    """
+    if img.format == "JPEG":
+        img.draft("RGB", (size, size))
+    try:
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+    except OSError as e:
+        raise ValueError(f"Bildet kunne ikke leses: {e}")
+    return img
+
+
+def perceptual_hash(img: Image.Image) -> str:
+    """
+    64-biters differansehash (dHash): bildet skaleres til 9x8 gråtoner og
+    hver bit sier om en piksel er lysere enn naboen til høyre. Samme motiv i
+    annen størrelse, komprimering eller format gir få avvikende bits.
+
+    Returns:
+        str: Hashen som 16 heksadesimale tegn
+    """
+    gray = img.convert("L").resize((9, 8), Image.LANCZOS)
+    pixels = list(gray.getdata())
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            value = (value << 1) | (left > pixels[row * 9 + col + 1])
+    return f"{value:016x}"
+
+
+def hash_image(source: str) -> str:
+    """
+    Perseptuell hash for en lagret original, beregnet fra en liten versjon
+    slik som ved opplasting.
+
+    Raises:
+        ValueError: Filen er ikke et bilde Pillow kan lese
+    """
+    with _open(source) as img:
+        img = _prepare(img, 320)
+        img.thumbnail((320, 320), Image.LANCZOS)
+        return perceptual_hash(img)
+
+
+def process_image(source: str, targets: Dict[int, str], quality: int = 80) -> dict:
+    """
+    Les metadata og lag WebP-varianter av et opplastet bilde.
+
+    Args:
+        source: Filsti til originalen
+        targets: Lengste side i piksler -> filsti for varianten
+        quality: WebP-kvalitet
+
+    Returns:
+        dict: mime_type, width, height (etter EXIF-rotasjon), taken_at,
+        location, exif og phash (se perceptual_hash)
+
+    Raises:
+        ValueError: Filen er ikke et bilde Pillow kan lese
+    """
+    with _open(source) as img:
+        mime_type = Image.MIME.get(img.format, "application/octet-stream")
+        metadata = read_metadata(img)
+        # Roter etter EXIF; bredde og høyde gjelder slik bildet vises
+        orientation = img.getexif().get(ExifTags.Base.Orientation, 1)
+        width, height = img.size if orientation < 5 else img.size[::-1]
+
+        img = _prepare(img, max(targets))
+
+        # Største variant først; de mindre skaleres fra forrige for å spare tid
+        current = img
+        for size in sorted(targets, reverse=True):
+            current = current.copy()
+            current.thumbnail((size, size), Image.LANCZOS)
+            _save(current, targets[size], "WEBP", quality=quality, method=4)
+        # Fra den minste varianten, så hashen ikke avhenger av originalens størrelse
+        phash = perceptual_hash(current)
+
+    return {"mime_type": mime_type, "width": width, "height": height, "phash": phash, **metadata}
+
+
+def render_variant(source: str, target: str, width: int, output_format: str) -> int:
+    """
+    Lag en variant med gitt bredde og format. Bildet skaleres aldri opp.
+
+    Returns:
+        int: Størrelsen på den skrevne filen i byte
+
+    Raises:
+        ValueError: Filen er ikke et bilde Pillow kan lese
+    """
+    pillow_format, _, params = OUTPUT_FORMATS[output_format]
+    with _open(source) as img:
+        img = _prepare(img, width)
+        if img.width > width:
+            img = img.resize((width, max(1, round(img.height * width / img.width))), Image.LANCZOS)
+        if pillow_format == "JPEG" and img.mode != "RGB":
+            img = img.convert("RGB")
+        _save(img, target, pillow_format, **params)
+    return os.path.getsize(target)
@@ -0,0 +1,80 @@
+"""
+Passordhashing utenfor hendelsesløkken.
+
+bcrypt bruker bevisst flere hundre millisekunder per kall. Kjørt direkte i
+en async-rute stopper det alle andre forespørsler i prosessen så lenge.
+Her kjøres hashing og verifisering i en egen, begrenset trådpool (bcrypt
+slipper GIL-en), og nye kall avvises med PasswordHasherBusy når køen er
+full, i stedet for at ventetiden vokser uten grense under innloggingstopper.
+"""
+
+import asyncio
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+
+logger = logging.getLogger(__name__)
+
+# Hasher med færre runder enn BCRYPT_ROUNDS regnes som utdaterte og hashes
+# på nytt ved neste vellykkede innlogging
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=int(os.getenv("BCRYPT_ROUNDS", "12")),
+)
+
+
+class PasswordHasherBusy(Exception):
+    """Køen for passordhashing er full; klienten bør prøve igjen senere."""
+
+
+class PasswordHasher:
+    """
+    Trådpool med adgangskontroll for passordoperasjoner.
+
+    `max_pending` begrenser antall kall som kjører eller venter. Med
+    `workers` tråder og ~0,25 s per kall gir det en øvre grense for
+    ventetiden på omtrent max_pending / workers * 0,25 s.
+    """
+
+    def __init__(self, context: CryptContext, workers: int, max_pending: int):
+        self.context = context
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="passwords")
+        self._pending = 0
+
+    async def _run(self, fn, *args):
+        # Telleren endres bare fra hendelsesløkken, så den trenger ingen lås
+        if self._pending >= self.max_pending:
+            raise PasswordHasherBusy()
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self._pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify_and_update(
+        self, password: str, password_hash: str
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        Verifiser passordet.
+
+        Returns:
+            tuple: (gyldig, ny hash hvis den lagrede bør byttes ut, ellers None)
+        """
+        return await self._run(self.context.verify_and_update, password, password_hash)
+
+
+_workers = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+hasher = PasswordHasher(
+    pwd_context,
+    workers=_workers,
+    max_pending=int(os.getenv("PASSWORD_HASH_MAX_PENDING", str(_workers * 16))),
+)
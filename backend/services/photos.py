@@ -0,0 +1,172 @@
+"""
+Mottak av bilder: lagring av originaler og parallell bildebehandling.
+
+Opplastinger kopieres bitvis til UPLOAD_DIR/photos, uten å leses inn i
+minnet. EXIF-uttrekk og WebP-varianter (se services/images.py) lages i en
+prosesspool, slik at en opplasting på førti bilder etter en jakttur bruker
+alle kjerner og aldri blokkerer hendelsesløkken.
+"""
+
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import BinaryIO, Dict, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from services import images
+
+# Lengste side i piksler for hver WebP-variant: miniatyr og visningsstørrelse
+THUMBNAIL_SIZE = 320
+DISPLAY_SIZE = 1600
+VARIANT_SIZES = (THUMBNAIL_SIZE, DISPLAY_SIZE)
+
+WEBP_QUALITY = int(os.getenv("PHOTO_WEBP_QUALITY", "80"))
+MAX_FILE_SIZE = int(os.getenv("MAX_FILE_SIZE_MB", "50")) * 1024 * 1024
+ALLOWED_EXTENSIONS = {
+    ext.strip().lower()
+    for ext in os.getenv("ALLOWED_IMAGE_EXTENSIONS", "jpg,jpeg,png,webp").split(",")
+}
+
+# Tidssonen kameraene antas å stå i når EXIF mangler OffsetTimeOriginal
+PHOTO_TIMEZONE = ZoneInfo(os.getenv("PHOTO_TIMEZONE", "Europe/Oslo"))
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+class PhotoRejected(Exception):
+    """Filen kan ikke tas imot (feil type, for stor eller ikke et bilde)."""
+
+
+def upload_dir() -> Path:
+    return Path(os.getenv("UPLOAD_DIR", "./uploads"))
+
+
+def original_path(filename: str) -> Path:
+    return upload_dir() / "photos" / filename
+
+
+def variant_path(photo_id: str, size: int) -> Path:
+    return upload_dir() / "thumbnails" / f"{photo_id}_{size}.webp"
+
+
+def variant_url(photo_id: str, size: int) -> str:
+    return f"/uploads/thumbnails/{photo_id}_{size}.webp"
+
+
+def original_url(filename: str) -> str:
+    return f"/uploads/photos/{filename}"
+
+
+def extension(filename: Optional[str]) -> str:
+    """Filendelsen i små bokstaver, kontrollert mot ALLOWED_IMAGE_EXTENSIONS."""
+    ext = os.path.splitext(filename or "")[1].lstrip(".").lower()
+    if ext not in ALLOWED_EXTENSIONS:
+        raise PhotoRejected(
+            f"Filtypen støttes ikke (tillatt: {', '.join(sorted(ALLOWED_EXTENSIONS))})"
+        )
+    return ext
+
+
+def save_upload(source: BinaryIO, filename: str, chunk_size: int = 1024 * 1024) -> Tuple[int, str]:
+    """
+    Kopier en opplastet fil til originalmappen i biter og beregn SHA-256 av
+    innholdet underveis. Blokkerer; kalles via run_in_threadpool.
+
+    Returns:
+        tuple: (filstørrelsen i byte, SHA-256 som heksstreng)
+
+    Raises:
+        PhotoRejected: Filen er større enn MAX_FILE_SIZE_MB
+    """
+    path = original_path(filename)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    size = 0
+    digest = hashlib.sha256()
+    try:
+        with os.fdopen(fd, "wb") as target:
+            while chunk := source.read(chunk_size):
+                size += len(chunk)
+                digest.update(chunk)
+                if size > MAX_FILE_SIZE:
+                    raise PhotoRejected(
+                        f"Filen er større enn {MAX_FILE_SIZE // (1024 * 1024)} MB"
+                    )
+                target.write(chunk)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return size, digest.hexdigest()
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """Prosesspoolen for bildebehandling, opprettet ved første bruk."""
+    global _pool
+    if _pool is None:
+        # spawn i stedet for fork: API-prosessen har tråder og åpne
+        # databaseforbindelser som ikke skal kopieres til arbeiderne
+        _pool = ProcessPoolExecutor(
+            max_workers=int(os.getenv("PHOTO_WORKERS", str(os.cpu_count() or 1))),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def shutdown() -> None:
+    """Stopp arbeidsprosessene. Kalles når appen avsluttes."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+async def process(photo_id: str, filename: str) -> dict:
+    """
+    Lag WebP-varianter og les metadata for en lagret original i prosesspoolen.
+
+    Raises:
+        PhotoRejected: Filen er ikke et bilde Pillow kan lese
+    """
+    targets: Dict[int, str] = {}
+    for size in VARIANT_SIZES:
+        path = variant_path(photo_id, size)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        targets[size] = str(path)
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(
+            get_pool(),
+            images.process_image,
+            str(original_path(filename)),
+            targets,
+            WEBP_QUALITY,
+        )
+    except ValueError as e:
+        raise PhotoRejected(str(e))
+
+
+def taken_at_utc(value: Optional[str]) -> Optional[datetime]:
+    """
+    Opptakstidspunkt fra process() i UTC, slik sporenes tidsstempler er.
+    Lokal kameratid uten tidssone tolkes i PHOTO_TIMEZONE.
+    """
+    if not value:
+        return None
+    taken = datetime.fromisoformat(value)
+    if taken.tzinfo is None:
+        taken = taken.replace(tzinfo=PHOTO_TIMEZONE)
+    return taken.astimezone(timezone.utc)
+
+
+def remove_files(photo_id: str, filename: str) -> None:
+    """Slett originalen og alle varianter av et bilde."""
+    original_path(filename).unlink(missing_ok=True)
+    for size in VARIANT_SIZES:
+        variant_path(photo_id, size).unlink(missing_ok=True)
@@ -0,0 +1,246 @@
+"""
+Fulltekstindeks for jaktturer.
+
+SQLite bruker en FTS5-tabell, PostgreSQL en egen tabell med tsvector,
+GIN-indeks og norsk stemming. I FTS5 lagres hver jakttur under en fast
+rowid fra hunt_search_rowids, slik at oppdatering og sletting slår opp
+på rowid i stedet for å lese hele tabellen. Indeksen oppdateres eksplisitt fra rutene
+i samme transaksjon som endringen av jaktturen.
+"""
+
+import html
+import re
+import logging
+from typing import List, Optional
+
+from sqlalchemy import inspect, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from models import Hunt
+
+logger = logging.getLogger(__name__)
+
+SEARCH_TABLE = "hunt_search"
+ROWID_TABLE = "hunt_search_rowids"
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+
+# Databasen markerer treff med tegn fra Unicodes private område; teksten
+# HTML-escapes før de byttes ut med HIGHLIGHT_START og HIGHLIGHT_END
+_MARK_START = "\ue000"
+_MARK_END = "\ue001"
+_STRIP_MARKS = str.maketrans("", "", _MARK_START + _MARK_END)
+
+# Settes av ensure_search_index(); uten indeks faller søk tilbake til ILIKE
+_dialect: Optional[str] = None
+
+
+def is_enabled() -> bool:
+    """Returnerer True hvis fulltekstindeksen er opprettet."""
+    return _dialect is not None
+
+
+def ensure_search_index(engine: Engine) -> None:
+    """
+    Slå på fulltekstsøk hvis søketabellen finnes (den opprettes av
+    Alembic-revisjonene), og fyll den fra eksisterende jaktturer hvis den
+    er tom.
+    """
+    global _dialect
+
+    dialect = engine.dialect.name
+    if dialect not in ("sqlite", "postgresql") or not inspect(engine).has_table(SEARCH_TABLE):
+        logger.warning(f"Fulltekstsøk er ikke tilgjengelig for {dialect}, bruker ILIKE")
+        return
+    _dialect = dialect
+
+    with Session(bind=engine) as db:
+        if db.execute(text(f"SELECT 1 FROM {SEARCH_TABLE} LIMIT 1")).first():
+            return
+        if not db.scalar(select(Hunt.id).limit(1)):
+            return
+        count = rebuild_search_index(db)
+        db.commit()
+    logger.info(f"Søkeindeks fylt med {count} jaktturer")
+
+
+def _document(hunt: Hunt) -> dict:
+    """Hent ut søkbar tekst fra en jakttur."""
+    location = hunt.location or {}
+    game = list(hunt.game_type or [])
+    for observation in (hunt.game_seen or []) + (hunt.game_harvested or []):
+        if observation.get("type"):
+            game.append(observation["type"])
+
+    doc = {
+        "title": hunt.title or "",
+        "notes": hunt.notes or "",
+        "summary": hunt.summary or "",
+        "tags": " ".join(hunt.tags or []),
+        "location": " ".join(
+            str(location[k]) for k in ("name", "region", "country") if location.get(k)
+        ),
+        "game": " ".join(dict.fromkeys(game)),
+    }
+    # Markeringstegnene må ikke finnes i teksten, se _highlight()
+    doc = {key: value.translate(_STRIP_MARKS) for key, value in doc.items()}
+    return {"hunt_id": str(hunt.id), "user_id": str(hunt.user_id), **doc}
+
+
+def index_hunt(db: Session, hunt: Hunt) -> None:
+    """Legg til eller oppdater en jakttur i søkeindeksen."""
+    if not is_enabled():
+        return
+
+    doc = _document(hunt)
+    if _dialect == "sqlite":
+        db.execute(text(f"INSERT OR IGNORE INTO {ROWID_TABLE} (hunt_id) VALUES (:hunt_id)"), doc)
+        doc["rowid"] = db.scalar(
+            text(f"SELECT id FROM {ROWID_TABLE} WHERE hunt_id = :hunt_id"), doc
+        )
+        db.execute(text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = :rowid"), doc)
+        db.execute(
+            text(
+                f"INSERT INTO {SEARCH_TABLE} "
+                "(rowid, hunt_id, user_id, title, notes, summary, tags, location, game) "
+                "VALUES (:rowid, :hunt_id, :user_id, :title, :notes, :summary, :tags, :location, :game)"
+            ),
+            doc,
+        )
+    else:
+        doc["body"] = " ".join(
+            doc[k] for k in ("tags", "location", "game", "summary", "notes") if doc[k]
+        )
+        db.execute(
+            text(
+                f"INSERT INTO {SEARCH_TABLE} (hunt_id, user_id, title, body, document) "
+                "VALUES (:hunt_id, :user_id, :title, :body, "
+                "setweight(to_tsvector('norwegian', :title), 'A') || "
+                "setweight(to_tsvector('norwegian', :tags || ' ' || :location || ' ' || :game), 'B') || "
+                "setweight(to_tsvector('norwegian', :summary || ' ' || :notes), 'C')) "
+                "ON CONFLICT (hunt_id) DO UPDATE SET "
+                "user_id = EXCLUDED.user_id, title = EXCLUDED.title, "
+                "body = EXCLUDED.body, document = EXCLUDED.document"
+            ),
+            doc,
+        )
+
+
+def remove_hunt(db: Session, hunt_id: str) -> None:
+    """Fjern en jakttur fra søkeindeksen."""
+    if not is_enabled():
+        return
+    params = {"hunt_id": str(hunt_id)}
+    if _dialect == "sqlite":
+        rowid = db.scalar(text(f"SELECT id FROM {ROWID_TABLE} WHERE hunt_id = :hunt_id"), params)
+        if rowid is not None:
+            db.execute(text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = :rowid"), {"rowid": rowid})
+            db.execute(text(f"DELETE FROM {ROWID_TABLE} WHERE id = :rowid"), {"rowid": rowid})
+    else:
+        db.execute(text(f"DELETE FROM {SEARCH_TABLE} WHERE hunt_id = :hunt_id"), params)
+
+
+def rebuild_search_index(db: Session) -> int:
+    """
+    Bygg søkeindeksen på nytt fra hunts-tabellen.
+
+    Returns:
+        int: Antall indekserte jaktturer
+    """
+    if not is_enabled():
+        return 0
+
+    db.execute(text(f"DELETE FROM {SEARCH_TABLE}"))
+    if _dialect == "sqlite":
+        db.execute(text(f"DELETE FROM {ROWID_TABLE}"))
+    count = 0
+    for hunt in db.query(Hunt).yield_per(500):
+        index_hunt(db, hunt)
+        count += 1
+    return count
+
+
+def _terms(query: str) -> List[str]:
+    return re.findall(r"\w+", query.lower())
+
+
+def _match_sql(query: str) -> Optional[tuple]:
+    """Bygg MATCH-uttrykk og parametere. Hvert ord matches som prefiks."""
+    terms = _terms(query)
+    if not terms:
+        return None
+    if _dialect == "sqlite":
+        return f"{SEARCH_TABLE} MATCH :query", " ".join(f'"{t}"*' for t in terms)
+    return (
+        "document @@ to_tsquery('norwegian', :query)",
+        " & ".join(f"{t}:*" for t in terms),
+    )
+
+
+def matching_hunt_ids(user_id: str, query: str):
+    """
+    Returner en SELECT over hunt_id for treff, til bruk i `Hunt.id.in_(...)`.
+    Returnerer None hvis søket ikke inneholder ord; det gir ingen treff.
+    """
+    match = _match_sql(query)
+    if match is None:
+        return None
+    condition, query_param = match
+    return (
+        text(f"SELECT hunt_id FROM {SEARCH_TABLE} WHERE {condition} AND user_id = :user_id")
+        .bindparams(query=query_param, user_id=str(user_id))
+        .columns(hunt_id=Hunt.id.type)
+    )
+
+
+def _highlight(fragment: Optional[str]) -> str:
+    """HTML-escape utdraget og gjør markeringene om til <mark>-tagger."""
+    return (
+        html.escape(fragment or "")
+        .replace(_MARK_START, HIGHLIGHT_START)
+        .replace(_MARK_END, HIGHLIGHT_END)
+    )
+
+
+def search_hunts(db: Session, user_id: str, query: str, limit: int = 20) -> List[dict]:
+    """
+    Rangert søk med utheving av treff.
+
+    Returns:
+        list: Treff med hunt_id, rank og highlight, best treff først.
+        highlight er HTML-escapet tekst der bare <mark>-taggene er HTML.
+    """
+    match = _match_sql(query)
+    if match is None:
+        return []
+    condition, query_param = match
+    params = {
+        "query": query_param,
+        "user_id": str(user_id),
+        "limit": limit,
+        "mark_start": _MARK_START,
+        "mark_end": _MARK_END,
+    }
+
+    if _dialect == "sqlite":
+        # bm25 gir lavere verdi for bedre treff; vektlegg tittel, tagger og sted
+        sql = (
+            f"SELECT hunt_id, -bm25({SEARCH_TABLE}, 0, 0, 10.0, 2.0, 3.0, 5.0, 5.0, 5.0) AS rank, "
+            f"snippet({SEARCH_TABLE}, -1, :mark_start, :mark_end, '…', 12) AS highlight "
+            f"FROM {SEARCH_TABLE} WHERE {condition} AND user_id = :user_id "
+            "ORDER BY rank DESC LIMIT :limit"
+        )
+    else:
+        sql = (
+            "SELECT hunt_id, ts_rank(document, to_tsquery('norwegian', :query)) AS rank, "
+            "ts_headline('norwegian', title || ' ' || body, to_tsquery('norwegian', :query), "
+            "'StartSel=' || :mark_start || ', StopSel=' || :mark_end || ', MaxWords=20, MinWords=8') AS highlight "
+            f"FROM {SEARCH_TABLE} WHERE {condition} AND user_id = :user_id "
+            "ORDER BY rank DESC LIMIT :limit"
+        )
+
+    return [
+        {"hunt_id": row.hunt_id, "rank": float(row.rank), "highlight": _highlight(row.highlight)}
+        for row in db.execute(text(sql), params)
+    ]
@@ -0,0 +1,147 @@
+"""
+Rask JSON-serialisering for geometritunge svar.
+
+Sporgeometri leses som rå JSON-tekst fra databasen og skjøtes direkte inn i
+svaret, uten å parses til Python-objekter, valideres av Pydantic og kodes
+på nytt. orjson brukes når det er installert, ellers standardbiblioteket.
+"""
+
+import json
+from datetime import date, datetime, time
+from typing import Dict, Iterable, List
+
+from fastapi.responses import Response
+from sqlalchemy import Text, cast, select
+from sqlalchemy.orm import Session
+
+from models import Hunt, Track
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - valgfri avhengighet
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    raise TypeError(f"Kan ikke serialisere {type(value).__name__}")
+
+
+def dumps(value) -> bytes:
+    """Serialiser til JSON-bytes."""
+    if orjson is not None:
+        return orjson.dumps(value, default=_default)
+    return json.dumps(value, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def loads(data):
+    """Parse JSON-tekst eller -bytes."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def splice(obj: dict, key: str, raw: bytes) -> bytes:
+    """Serialiser `obj` og legg til `key` med ferdig serialisert JSON som verdi."""
+    encoded = dumps(obj)
+    if encoded == b"{}":
+        return b'{"' + key.encode() + b'":' + raw + b"}"
+    return encoded[:-1] + b',"' + key.encode() + b'":' + raw + b"}"
+
+
+def json_array(items: Iterable[bytes]) -> bytes:
+    return b"[" + b",".join(items) + b"]"
+
+
+class RawJSONResponse(Response):
+    """Svar med ferdig serialisert JSON. Omgår response_model-validering."""
+
+    media_type = "application/json"
+
+
+def load_track_blobs(db: Session, hunt_ids: List[str]) -> Dict[str, List[bytes]]:
+    """
+    Hent serialiserte spor for jaktturene, med geometrien som rå JSON-tekst.
+
+    Returns:
+        dict: hunt_id -> liste med ferdige JSON-objekter for sporene
+    """
+    if not hunt_ids:
+        return {}
+
+    rows = db.execute(
+        select(
+            Track.id,
+            Track.hunt_id,
+            Track.name,
+            Track.color,
+            Track.statistics,
+            cast(Track.geojson, Text).label("geojson"),
+        )
+        .where(Track.hunt_id.in_(hunt_ids))
+        .order_by(Track.start_time)
+    ).all()
+
+    blobs: Dict[str, List[bytes]] = {}
+    for row in rows:
+        meta = {
+            "id": str(row.id),
+            "name": row.name,
+            "color": row.color,
+            "statistics": row.statistics,
+        }
+        geojson = row.geojson.encode() if row.geojson else b"null"
+        blobs.setdefault(row.hunt_id, []).append(splice(meta, "geojson", geojson))
+    return blobs
+
+
+def hunt_fields(hunt: Hunt) -> dict:
+    """Jakttur-feltene i HuntResponse, unntatt spor."""
+    return {
+        "id": str(hunt.id),
+        "user_id": str(hunt.user_id),
+        "title": hunt.title,
+        "date": hunt.date,
+        "start_time": hunt.start_time,
+        "end_time": hunt.end_time,
+        "location": hunt.location,
+        "weather": hunt.weather,
+        "game_type": hunt.game_type or [],
+        "game_seen": hunt.game_seen or [],
+        "game_harvested": hunt.game_harvested or [],
+        "dogs": [
+            {
+                "id": str(d.id),
+                "name": d.name,
+                "breed": d.breed,
+                "color": d.color,
+                "photo_url": d.photo_url,
+            }
+            for d in hunt.dogs
+        ],
+        "photos": [
+            {
+                "id": str(p.id),
+                "url": p.url,
+                "thumbnail_url": p.thumbnail_url,
+                "caption": p.caption,
+            }
+            for p in hunt.photos
+        ],
+        "notes": hunt.notes,
+        "summary": hunt.summary,
+        "tags": hunt.tags or [],
+        "is_favorite": hunt.is_favorite,
+        "created_at": hunt.created_at,
+        "updated_at": hunt.updated_at,
+    }
+
+
+def render_hunts(db: Session, hunts: List[Hunt]) -> List[bytes]:
+    """Serialiser jaktturer i HuntResponse-format med et fast antall spørringer for sporene."""
+    blobs = load_track_blobs(db, [h.id for h in hunts])
+    return [
+        splice(hunt_fields(h), "tracks", json_array(blobs.get(h.id, [])))
+        for h in hunts
+    ]
@@ -0,0 +1,205 @@
+"""
+Servering av filene under /uploads.
+
+Alle filer under UPLOAD_DIR skrives én gang og endres aldri: bilder og
+varianter har navn etter tilfeldige bilde-id-er som ikke gjenbrukes, og
+GPX-lageret er innholdsadressert. Filene sendes derfor med
+`Cache-Control: immutable`, slik at nettlesere og CDN-er aldri henter dem
+på nytt. I tillegg støttes byteområder (Range), og for GPX og GeoJSON
+sendes forhåndskomprimerte søsterfiler (.br, .gz) når klienten godtar dem.
+"""
+
+import gzip
+import mimetypes
+import os
+import stat
+from typing import Iterator, Optional, Set, Tuple
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response, StreamingResponse
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Receive, Scope, Send
+
+# Innholdet bak en gitt URL endres aldri; filer byttes ikke ut, bare slettes
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+mimetypes.add_type("application/gpx+xml", ".gpx")
+mimetypes.add_type("application/geo+json", ".geojson")
+mimetypes.add_type("application/vnd.google-earth.kml+xml", ".kml")
+
+# Filtyper som kan ha forhåndskomprimerte søsterfiler
+PRECOMPRESSED_TYPES = {".gpx", ".geojson", ".json", ".kml"}
+
+# Content-Encoding -> filendelse, i prioritert rekkefølge
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def accepted_encodings(header: Optional[str]) -> Set[str]:
+    """Kodingene i en Accept-Encoding-header som ikke har q=0."""
+    accepted = set()
+    for part in (header or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Første og siste byte fra en Range-header med ett område. Flere områder
+    eller ugyldig syntaks gir None, og hele filen sendes.
+
+    Raises:
+        ValueError: Området ligger utenfor filen (416)
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    start_text, sep, end_text = header[len("bytes="):].strip().partition("-")
+    if not sep:
+        return None
+    try:
+        start = int(start_text) if start_text else None
+        end = int(end_text) if end_text else None
+    except ValueError:
+        return None
+    if start is None:
+        # bytes=-N: de siste N bytene
+        if end is None:
+            return None
+        if end == 0 or size == 0:
+            raise ValueError("Tomt byteområde")
+        return max(size - end, 0), size - 1
+    if end is not None and end < start:
+        return None
+    if start >= size:
+        raise ValueError("Byteområdet ligger utenfor filen")
+    return start, size - 1 if end is None else min(end, size - 1)
+
+
+class RangeFileResponse(FileResponse):
+    """FileResponse som bare sender bytene fra `start` til og med `end`."""
+
+    def __init__(self, path: str, start: int, end: int, stat_result: os.stat_result, **kwargs):
+        super().__init__(path, status_code=206, stat_result=stat_result, **kwargs)
+        self.start = start
+        self.end = end
+        self.headers["content-length"] = str(end - start + 1)
+        self.headers["content-range"] = f"bytes {start}-{end}/{stat_result.st_size}"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if not self.send_header_only:
+            async with await anyio.open_file(self.path, mode="rb") as file:
+                await file.seek(self.start)
+                remaining = self.end - self.start + 1
+                while remaining > 0:
+                    chunk = await file.read(min(self.chunk_size, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def _gunzip(path: str, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    with gzip.open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            yield chunk
+
+
+class UploadFiles(StaticFiles):
+    """
+    StaticFiles med immutable-caching, Range og forhåndskomprimerte filer.
+
+    For `spor.gpx` velges `spor.gpx.br` eller `spor.gpx.gz` når klienten
+    godtar kodingen. GPX-lageret har bare `.gpx.gz`; klienter uten gzip får
+    da filen dekomprimert underveis.
+    """
+
+    def _select(self, path: str, encodings: Set[str]):
+        """(filsti, stat, koding) for beste representasjon, eller None."""
+        if os.path.splitext(path)[1].lower() in PRECOMPRESSED_TYPES:
+            for encoding, suffix in ENCODINGS:
+                if encoding in encodings:
+                    full_path, stat_result = self.lookup_path(path + suffix)
+                    if stat_result and stat.S_ISREG(stat_result.st_mode):
+                        return full_path, stat_result, encoding
+        full_path, stat_result = self.lookup_path(path)
+        if stat_result and stat.S_ISREG(stat_result.st_mode):
+            return full_path, stat_result, None
+        if os.path.splitext(path)[1].lower() in PRECOMPRESSED_TYPES:
+            # Bare den komprimerte filen finnes, og klienten godtar ikke gzip
+            full_path, stat_result = self.lookup_path(path + ".gz")
+            if stat_result and stat.S_ISREG(stat_result.st_mode):
+                return full_path, stat_result, "identity"
+        return None
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if scope["method"] not in ("GET", "HEAD"):
+            raise HTTPException(status_code=405)
+        request_headers = Headers(scope=scope)
+        encodings = accepted_encodings(request_headers.get("accept-encoding"))
+        try:
+            selected = await anyio.to_thread.run_sync(self._select, path, encodings)
+        except PermissionError:
+            raise HTTPException(status_code=401)
+        if selected is None:
+            raise HTTPException(status_code=404)
+
+        full_path, stat_result, encoding = selected
+        media_type, file_encoding = mimetypes.guess_type(path)
+        if file_encoding:
+            # Komprimert fil bedt om direkte (f.eks. spor.gpx.gz): sendes som den er
+            media_type = "application/gzip" if file_encoding == "gzip" else None
+        media_type = media_type or "application/octet-stream"
+        headers = {"cache-control": IMMUTABLE, "accept-ranges": "bytes"}
+        if os.path.splitext(path)[1].lower() in PRECOMPRESSED_TYPES:
+            headers["vary"] = "Accept-Encoding"
+
+        if encoding == "identity":
+            headers.pop("accept-ranges")
+            return StreamingResponse(_gunzip(full_path), media_type=media_type, headers=headers)
+        if encoding:
+            headers["content-encoding"] = encoding
+
+        response = FileResponse(
+            full_path,
+            stat_result=stat_result,
+            method=scope["method"],
+            media_type=media_type,
+            headers=headers,
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+
+        range_header = request_headers.get("range")
+        if_range = request_headers.get("if-range")
+        if if_range and if_range not in (response.headers["etag"], response.headers["last-modified"]):
+            # Filen er endret siden klienten hentet første del: send hele
+            range_header = None
+        try:
+            byte_range = parse_range(range_header, stat_result.st_size)
+        except ValueError:
+            return Response(
+                status_code=416,
+                headers={"content-range": f"bytes */{stat_result.st_size}"},
+            )
+        if byte_range is None:
+            return response
+        return RangeFileResponse(
+            full_path,
+            *byte_range,
+            stat_result=stat_result,
+            method=scope["method"],
+            media_type=media_type,
+            headers=headers,
+        )
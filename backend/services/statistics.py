@@ -0,0 +1,349 @@
+"""
+Inkrementelt vedlikeholdt statistikk per bruker.
+
+Skriverutene kaller record_hunt_*() og apply_delta() i samme transaksjon som
+endringen, slik at Dashboard og statistikksidene leser ferdige rader i stedet
+for å summere alle jaktturer, spor og bilder. rebuild_user_statistics()
+beregner alt på nytt ved avvik.
+
+Sesongtallene i season_rollups vedlikeholdes bare for brukere som har en
+rad i user_statistics; begge bygges samtidig ved første lesing.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models import Dog, Hunt, Photo, Track, UserStatistics, SeasonRollup
+
+COUNTERS = (
+    "total_hunts",
+    "total_distance_km",
+    "total_duration_minutes",
+    "total_photos",
+    "active_dogs",
+)
+
+SEASON_COUNTERS = (
+    "hunts",
+    "successful_hunts",
+    "game_seen",
+    "game_harvested",
+    "distance_km",
+)
+
+# (sesong, dimensjon, nøkkel) -> tellere
+SeasonRows = List[Tuple[Tuple[int, str, str], dict]]
+
+
+def _track_distance():
+    return func.coalesce(func.sum(Track.statistics["distance_km"].as_float()), 0)
+
+
+def _track_duration():
+    return func.coalesce(func.sum(Track.statistics["duration_minutes"].as_float()), 0)
+
+
+def apply_delta(db: Session, user_id: str, **deltas) -> bool:
+    """
+    Legg deltaer til brukerens tellere med en atomisk UPDATE.
+
+    Finnes ingen rad ennå, gjøres ingenting; raden bygges fra grunnen ved
+    første lesing i get_user_statistics().
+
+    Returns:
+        bool: True hvis brukeren har en statistikkrad
+    """
+    values = {
+        name: getattr(UserStatistics, name) + delta
+        for name, delta in deltas.items()
+        if delta
+    }
+    if not values:
+        return db.get(UserStatistics, user_id) is not None
+    unknown = set(values) - set(COUNTERS)
+    if unknown:
+        raise ValueError(f"Ukjente tellere: {', '.join(sorted(unknown))}")
+    result = db.execute(
+        update(UserStatistics).where(UserStatistics.user_id == user_id).values(**values)
+    )
+    return result.rowcount > 0
+
+
+def hunt_contribution(db: Session, hunt_id: str) -> dict:
+    """Beregn hvor mye en jakttur bidrar med til brukerens tellere."""
+    distance, duration = db.execute(
+        select(_track_distance(), _track_duration()).where(Track.hunt_id == hunt_id)
+    ).one()
+    photos = db.scalar(select(func.count(Photo.id)).where(Photo.hunt_id == hunt_id))
+    return {
+        "total_hunts": 1,
+        "total_distance_km": float(distance),
+        "total_duration_minutes": float(duration),
+        "total_photos": photos,
+    }
+
+
+def negate(contribution: dict) -> dict:
+    return {name: -value for name, value in contribution.items()}
+
+
+def _observed(observations: Optional[list]) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for observation in observations or []:
+        game = observation.get("type")
+        if game:
+            counts[game] = counts.get(game, 0) + int(observation.get("count") or 0)
+    return counts
+
+
+def season_contribution(hunt: Hunt, distance_km: float) -> SeasonRows:
+    """
+    Beregn en jakttur sine bidrag til sesongtallene. Sesongen er kalenderåret,
+    som i Statistics.tsx.
+    """
+    season = hunt.date.year
+    seen = _observed(hunt.game_seen)
+    harvested = _observed(hunt.game_harvested)
+
+    def counters(seen_count: int, harvested_count: int) -> dict:
+        return {
+            "hunts": 1,
+            "successful_hunts": 1 if harvested_count > 0 else 0,
+            "game_seen": seen_count,
+            "game_harvested": harvested_count,
+            "distance_km": distance_km,
+        }
+
+    totals = counters(sum(seen.values()), sum(harvested.values()))
+    rows = [
+        ((season, "total", ""), totals),
+        ((season, "month", f"{hunt.date.month:02d}"), totals),
+    ]
+
+    location = (hunt.location or {}).get("name")
+    if location:
+        rows.append(((season, "location", str(location)[:255]), totals))
+
+    game_types = dict.fromkeys(list(hunt.game_type or []) + list(seen) + list(harvested))
+    for game in game_types:
+        rows.append(
+            ((season, "game_type", game), counters(seen.get(game, 0), harvested.get(game, 0)))
+        )
+    return rows
+
+
+def _hunt_distance(db: Session, hunt_id: str) -> float:
+    return float(db.scalar(select(_track_distance()).where(Track.hunt_id == hunt_id)))
+
+
+def hunt_distances(db: Session, hunt_ids: List[str]) -> Dict[str, float]:
+    """Samlet spordistanse per jakttur i én spørring. Jaktturer uten spor mangler."""
+    if not hunt_ids:
+        return {}
+    return {
+        hunt_id: float(distance)
+        for hunt_id, distance in db.execute(
+            select(Track.hunt_id, _track_distance())
+            .where(Track.hunt_id.in_(hunt_ids))
+            .group_by(Track.hunt_id)
+        )
+    }
+
+
+def apply_season_rows(db: Session, user_id: str, rows: SeasonRows, sign: int = 1) -> None:
+    """
+    Legg til (sign=1) eller trekk fra (sign=-1) sesongbidrag med atomiske
+    oppdateringer. Nye rader opprettes med INSERT ... ON CONFLICT, så to
+    samtidige første bidrag til samme sesongrad ikke kolliderer.
+    """
+    dialect_insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    for (season, dimension, key), counters in rows:
+        if sign > 0:
+            stmt = dialect_insert(SeasonRollup).values(
+                user_id=user_id, season=season, dimension=dimension, key=key, **counters
+            )
+            db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[
+                        SeasonRollup.user_id,
+                        SeasonRollup.season,
+                        SeasonRollup.dimension,
+                        SeasonRollup.key,
+                    ],
+                    set_={
+                        name: getattr(SeasonRollup, name) + getattr(stmt.excluded, name)
+                        for name in counters
+                    },
+                )
+            )
+            continue
+
+        pk = (
+            SeasonRollup.user_id == user_id,
+            SeasonRollup.season == season,
+            SeasonRollup.dimension == dimension,
+            SeasonRollup.key == key,
+        )
+        db.execute(
+            update(SeasonRollup)
+            .where(*pk)
+            .values(**{name: getattr(SeasonRollup, name) - value for name, value in counters.items()})
+        )
+        db.execute(delete(SeasonRollup).where(*pk, SeasonRollup.hunts <= 0))
+
+
+def season_snapshot(db: Session, hunt: Hunt) -> SeasonRows:
+    """Ta vare på en jakttur sine sesongbidrag før den endres."""
+    return season_contribution(hunt, _hunt_distance(db, hunt.id))
+
+
+def record_hunt_created(db: Session, hunt: Hunt) -> None:
+    """Oppdater tellere for en ny jakttur (som ennå ikke har spor eller bilder)."""
+    if apply_delta(db, hunt.user_id, total_hunts=1):
+        apply_season_rows(db, hunt.user_id, season_contribution(hunt, 0.0))
+
+
+def record_hunt_updated(db: Session, hunt: Hunt, previous: SeasonRows) -> None:
+    """
+    Erstatt sesongbidragene til en endret jakttur. Sporene endres ikke sammen
+    med jaktturen, så distansen hentes fra de forrige bidragene.
+    """
+    if db.get(UserStatistics, hunt.user_id) is None:
+        return
+    distance_km = next(
+        (counters["distance_km"] for (_, dimension, _), counters in previous if dimension == "total"),
+        0.0,
+    )
+    apply_season_rows(db, hunt.user_id, previous, sign=-1)
+    apply_season_rows(db, hunt.user_id, season_contribution(hunt, distance_km))
+
+
+def record_hunt_deleted(db: Session, hunt: Hunt) -> None:
+    """Trekk en jakttur, med spor og bilder, fra tellerne før den slettes."""
+    contribution = hunt_contribution(db, hunt.id)
+    if apply_delta(db, hunt.user_id, **negate(contribution)):
+        apply_season_rows(
+            db,
+            hunt.user_id,
+            season_contribution(hunt, contribution["total_distance_km"]),
+            sign=-1,
+        )
+
+
+def rebuild_user_statistics(db: Session, user_id: Optional[str] = None) -> int:
+    """
+    Beregn statistikk på nytt fra grunntabellene med grupperte spørringer.
+
+    Args:
+        user_id: Kun denne brukeren, eller alle brukere hvis None
+
+    Returns:
+        int: Antall oppdaterte brukere
+    """
+
+    def scoped(query, column):
+        return query.where(column == user_id) if user_id else query
+
+    rows: dict = {}
+
+    def row(uid: str) -> dict:
+        return rows.setdefault(uid, {name: 0 for name in COUNTERS})
+
+    for uid, count in db.execute(
+        scoped(select(Hunt.user_id, func.count(Hunt.id)), Hunt.user_id).group_by(Hunt.user_id)
+    ):
+        row(uid)["total_hunts"] = count
+
+    for uid, distance, duration in db.execute(
+        scoped(
+            select(Hunt.user_id, _track_distance(), _track_duration()).join(
+                Track, Track.hunt_id == Hunt.id
+            ),
+            Hunt.user_id,
+        ).group_by(Hunt.user_id)
+    ):
+        row(uid)["total_distance_km"] = float(distance)
+        row(uid)["total_duration_minutes"] = float(duration)
+
+    for uid, count in db.execute(
+        scoped(
+            select(Hunt.user_id, func.count(Photo.id)).join(Photo, Photo.hunt_id == Hunt.id),
+            Hunt.user_id,
+        ).group_by(Hunt.user_id)
+    ):
+        row(uid)["total_photos"] = count
+
+    for uid, count in db.execute(
+        scoped(
+            select(Dog.user_id, func.count(Dog.id)).where(Dog.is_active.is_(True)),
+            Dog.user_id,
+        ).group_by(Dog.user_id)
+    ):
+        row(uid)["active_dogs"] = count
+
+    if user_id:
+        row(user_id)
+
+    # Sesongtall: summer bidragene fra hver jakttur
+    distances = dict(
+        db.execute(
+            scoped(
+                select(Track.hunt_id, _track_distance()).join(Hunt, Hunt.id == Track.hunt_id),
+                Hunt.user_id,
+            ).group_by(Track.hunt_id)
+        ).all()
+    )
+    rollups: dict = {}
+    for hunt in db.scalars(scoped(select(Hunt), Hunt.user_id).execution_options(yield_per=500)):
+        for key, counters in season_contribution(hunt, float(distances.get(hunt.id, 0))):
+            totals = rollups.setdefault(
+                (hunt.user_id,) + key, {name: 0 for name in SEASON_COUNTERS}
+            )
+            for name, value in counters.items():
+                totals[name] += value
+
+    # Fjern gamle rader og skriv nye
+    for model in (UserStatistics, SeasonRollup):
+        stale = delete(model)
+        if user_id:
+            stale = stale.where(model.user_id == user_id)
+        db.execute(stale)
+    db.add_all(UserStatistics(user_id=uid, **counters) for uid, counters in rows.items())
+    db.add_all(
+        SeasonRollup(user_id=uid, season=season, dimension=dimension, key=key, **counters)
+        for (uid, season, dimension, key), counters in rollups.items()
+    )
+    db.flush()
+    return len(rows)
+
+
+def get_user_statistics(db: Session, user_id: str) -> UserStatistics:
+    """
+    Hent statistikkraden for en bruker, og bygg den ved første lesing.
+
+    Bygges raden samtidig av en annen forespørsel, feiler innsettingen på
+    primærnøkkelen. Da rulles bare savepointet tilbake, og raden den andre
+    forespørselen lagret leses i stedet.
+    """
+    stats = db.get(UserStatistics, user_id)
+    if stats is None:
+        try:
+            with db.begin_nested():
+                rebuild_user_statistics(db, user_id)
+        except IntegrityError:
+            pass
+        stats = db.get(UserStatistics, user_id)
+    return stats
+
+
+def get_season_rollups(db: Session, user_id: str, season: Optional[int] = None) -> List[SeasonRollup]:
+    """Hent sesongtall for en bruker, for én sesong eller alle."""
+    get_user_statistics(db, user_id)
+    query = select(SeasonRollup).where(SeasonRollup.user_id == user_id)
+    if season is not None:
+        query = query.where(SeasonRollup.season == season)
+    return list(db.scalars(query.order_by(SeasonRollup.season.desc(), SeasonRollup.key)))
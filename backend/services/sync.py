@@ -0,0 +1,194 @@
+"""
+Deltasynkronisering for offline-klienter.
+
+Endringer logges automatisk i change_log (se models/change_log.py) med et
+stigende endringsnummer per bruker. Klienten sender siste nummer den har
+sett og får bare objektene som er endret eller slettet etter det.
+"""
+
+from typing import Dict, List
+
+from sqlalchemy import Text, cast, insert, select
+from sqlalchemy.orm import Session, selectinload
+
+from models import ChangeLog, Dog, Hunt, Photo, SyncState, Track
+from services.serialization import dumps, hunt_fields, json_array, splice
+
+ENTITIES = ("hunt", "track", "dog", "photo")
+
+
+def backfill_change_log(db: Session) -> int:
+    """
+    Logg objekter som fantes før endringsloggen, slik at `since=0` gir alt.
+    Objekter som allerede er logget hoppes over.
+
+    Returns:
+        int: Antall nye rader i endringsloggen
+    """
+    sources = (
+        ("hunt", select(Hunt.user_id, Hunt.id)),
+        ("dog", select(Dog.user_id, Dog.id)),
+        ("track", select(Hunt.user_id, Track.id).join(Hunt, Hunt.id == Track.hunt_id)),
+        ("photo", select(Hunt.user_id, Photo.id).join(Hunt, Hunt.id == Photo.hunt_id)),
+    )
+    logged = set(db.execute(select(ChangeLog.entity, ChangeLog.entity_id)).all())
+    pending: Dict[str, list] = {}
+    for entity, query in sources:
+        for user_id, entity_id in db.execute(query):
+            if (entity, entity_id) not in logged:
+                pending.setdefault(user_id, []).append((entity, entity_id))
+
+    count = 0
+    for user_id, entities in pending.items():
+        state = db.get(SyncState, user_id)
+        if state is None:
+            state = SyncState(user_id=user_id, last_seq=0)
+            db.add(state)
+        first_seq = state.last_seq + 1
+        state.last_seq += len(entities)
+        db.execute(
+            insert(ChangeLog),
+            [
+                {"user_id": user_id, "entity": entity, "entity_id": entity_id, "seq": first_seq + i}
+                for i, (entity, entity_id) in enumerate(entities)
+            ],
+        )
+        count += len(entities)
+    db.flush()
+    return count
+
+
+def _track_blobs(db: Session, track_ids: List[str]) -> List[bytes]:
+    """Spor med geometrien skjøtet inn som rå JSON."""
+    if not track_ids:
+        return []
+    rows = db.execute(
+        select(
+            Track.id,
+            Track.hunt_id,
+            Track.dog_id,
+            Track.name,
+            Track.source,
+            Track.color,
+            Track.statistics,
+            Track.start_time,
+            Track.end_time,
+            cast(Track.geojson, Text).label("geojson"),
+        ).where(Track.id.in_(track_ids))
+    ).all()
+    blobs = []
+    for row in rows:
+        meta = {
+            "id": row.id,
+            "hunt_id": row.hunt_id,
+            "dog_id": row.dog_id,
+            "name": row.name,
+            "source": row.source,
+            "color": row.color,
+            "statistics": row.statistics,
+            "start_time": row.start_time,
+            "end_time": row.end_time,
+        }
+        geojson = row.geojson.encode() if row.geojson else b"null"
+        blobs.append(splice(meta, "geojson", geojson))
+    return blobs
+
+
+def _hunts(db: Session, hunt_ids: List[str]) -> List[dict]:
+    if not hunt_ids:
+        return []
+    hunts = db.scalars(
+        select(Hunt)
+        .options(selectinload(Hunt.dogs), selectinload(Hunt.photos))
+        .where(Hunt.id.in_(hunt_ids))
+    )
+    return [hunt_fields(hunt) for hunt in hunts]
+
+
+def _dogs(db: Session, dog_ids: List[str]) -> List[dict]:
+    if not dog_ids:
+        return []
+    return [
+        {
+            "id": dog.id,
+            "name": dog.name,
+            "breed": dog.breed,
+            "birth_date": dog.birth_date,
+            "color": dog.color,
+            "garmin_collar_id": dog.garmin_collar_id,
+            "photo_url": dog.photo_url,
+            "notes": dog.notes,
+            "is_active": dog.is_active,
+            "updated_at": dog.updated_at,
+        }
+        for dog in db.scalars(select(Dog).where(Dog.id.in_(dog_ids)))
+    ]
+
+
+def _photos(db: Session, photo_ids: List[str]) -> List[dict]:
+    if not photo_ids:
+        return []
+    return [
+        {
+            "id": photo.id,
+            "hunt_id": photo.hunt_id,
+            "url": photo.url,
+            "thumbnail_url": photo.thumbnail_url,
+            "caption": photo.caption,
+            "taken_at": photo.taken_at,
+            "location": photo.location,
+            "tags": photo.tags or [],
+            "created_at": photo.created_at,
+        }
+        for photo in db.scalars(select(Photo).where(Photo.id.in_(photo_ids)))
+    ]
+
+
+def changes_since(db: Session, user_id: str, since: int, limit: int = 500) -> bytes:
+    """
+    Hent endringer etter endringsnummer `since`, serialisert til JSON.
+
+    Svaret har `cursor` (sendes som `since` neste gang), `has_more`, `reset`
+    (klienten må laste alt på nytt fordi `since` er ukjent for serveren) og
+    én seksjon per objekttype med `upserted` (fulle objekter) og `deleted`
+    (id-er).
+    """
+    last_seq = db.scalar(select(SyncState.last_seq).where(SyncState.user_id == user_id)) or 0
+    rows = db.execute(
+        select(ChangeLog.entity, ChangeLog.entity_id, ChangeLog.seq, ChangeLog.deleted)
+        .where(ChangeLog.user_id == user_id, ChangeLog.seq > since)
+        .order_by(ChangeLog.seq)
+        .limit(limit + 1)
+    ).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    upserted: Dict[str, List[str]] = {entity: [] for entity in ENTITIES}
+    deleted: Dict[str, List[str]] = {entity: [] for entity in ENTITIES}
+    for row in rows:
+        (deleted if row.deleted else upserted)[row.entity].append(row.entity_id)
+
+    # Et nummer serveren ikke har delt ut (f.eks. etter gjenoppretting av
+    # databasen) betyr at klientens lokale data ikke kan stoles på
+    reset = since > last_seq
+    if reset:
+        cursor = last_seq
+    else:
+        cursor = rows[-1].seq if rows else since
+
+    result = {
+        "cursor": cursor,
+        "has_more": has_more,
+        "reset": reset,
+        "hunts": {"upserted": _hunts(db, upserted["hunt"]), "deleted": deleted["hunt"]},
+        "dogs": {"upserted": _dogs(db, upserted["dog"]), "deleted": deleted["dog"]},
+        "photos": {"upserted": _photos(db, upserted["photo"]), "deleted": deleted["photo"]},
+    }
+    tracks = (
+        b'{"upserted":'
+        + json_array(_track_blobs(db, upserted["track"]))
+        + b',"deleted":'
+        + dumps(deleted["track"])
+        + b"}"
+    )
+    return splice(result, "tracks", tracks)
@@ -0,0 +1,164 @@
+"""
+GPX- og KML-skrivere som lager dokumentet bit for bit.
+
+Skriverne bygger ingen objektgraf (som gpxpy.GPX eller simplekml), men
+skriver XML-tekst direkte fra de lagrede GeoJSON-koordinatene, med
+tidsstempler der sporet har dem. Et spor skrives i biter på
+POINTS_PER_CHUNK punkter, så bare ett spor er i minnet om gangen.
+
+Koordinatene er [lengde, bredde], eventuelt med høyde og/eller
+Unix-tidsstempel til slutt (se garmin/client.py og
+services/dog_analytics.py).
+"""
+
+import time
+from datetime import datetime
+from typing import Iterator, List, Mapping, Optional, Tuple
+from xml.sax.saxutils import escape
+
+from services.dog_analytics import TIMESTAMP_MIN
+
+POINTS_PER_CHUNK = 1000
+
+Point = Tuple[float, float, Optional[float], Optional[float]]
+
+
+def split_coordinate(coord: List[float]) -> Point:
+    """(lengde, bredde, høyde eller None, tidsstempel eller None)."""
+    lon, lat = coord[0], coord[1]
+    elevation = timestamp = None
+    rest = coord[2:]
+    if rest and rest[-1] > TIMESTAMP_MIN:
+        timestamp = rest[-1]
+        rest = rest[:-1]
+    if rest:
+        elevation = rest[0]
+    return lon, lat, elevation, timestamp
+
+
+def _iso(timestamp: float) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(timestamp))
+
+
+def _chunks(coordinates: List[list]) -> Iterator[List[Point]]:
+    for start in range(0, len(coordinates), POINTS_PER_CHUNK):
+        yield [
+            split_coordinate(c)
+            for c in coordinates[start:start + POINTS_PER_CHUNK]
+            if len(c) >= 2
+        ]
+
+
+def track_title(hunt_title: str, track_name: str) -> str:
+    """Navnet på et spor i eksporten, som i Cloud Function-eksporten."""
+    return f"{hunt_title or 'Jakttur'} - {track_name or 'Spor'}"
+
+
+class GPXWriter:
+    """GPX 1.1 med ett <trk> per spor."""
+
+    media_type = "application/gpx+xml"
+    extension = "gpx"
+
+    def header(self, exported_at: datetime) -> str:
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<gpx version="1.1" creator="Jaktopplevelsen" '
+            'xmlns="http://www.topografix.com/GPX/1/1">\n'
+            f"<metadata><name>Jaktopplevelsen</name><time>{_iso(exported_at.timestamp())}</time></metadata>\n"
+        )
+
+    def begin_hunt(self, hunt_title: str) -> str:
+        return ""
+
+    def end_hunt(self) -> str:
+        return ""
+
+    def track(self, hunt_title: str, track: Mapping, coordinates: List[list]) -> Iterator[str]:
+        yield f"<trk><name>{escape(track_title(hunt_title, track['name']))}</name>"
+        if track.get("dog_name"):
+            yield f"<desc>{escape(track['dog_name'])}</desc>"
+        yield f"<type>{'dog' if track['dog_id'] else 'handler'}</type><trkseg>\n"
+        for points in _chunks(coordinates):
+            parts = []
+            for lon, lat, elevation, timestamp in points:
+                parts.append(f'<trkpt lat="{lat}" lon="{lon}">')
+                if elevation is not None:
+                    parts.append(f"<ele>{elevation}</ele>")
+                if timestamp is not None:
+                    parts.append(f"<time>{_iso(timestamp)}</time>")
+                parts.append("</trkpt>\n")
+            yield "".join(parts)
+        yield "</trkseg></trk>\n"
+
+    def footer(self) -> str:
+        return "</gpx>\n"
+
+
+class KMLWriter:
+    """
+    KML 2.2 med én mappe per jakttur og én Placemark per spor. Spor der
+    alle punktene har tidsstempel skrives som gx:Track, slik at Google Earth
+    kan spille dem av; andre som LineString.
+    """
+
+    media_type = "application/vnd.google-earth.kml+xml"
+    extension = "kml"
+
+    def header(self, exported_at: datetime) -> str:
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<kml xmlns="http://www.opengis.net/kml/2.2" xmlns:gx="http://www.google.com/kml/ext/2.2">\n'
+            f"<Document><name>Jaktopplevelsen {exported_at.date().isoformat()}</name>\n"
+        )
+
+    def begin_hunt(self, hunt_title: str) -> str:
+        return f"<Folder><name>{escape(hunt_title or 'Jakttur')}</name>\n"
+
+    def end_hunt(self) -> str:
+        return "</Folder>\n"
+
+    @staticmethod
+    def _color(hex_color: Optional[str]) -> str:
+        """#RRGGBB til KMLs aabbggrr."""
+        value = (hex_color or "").lstrip("#")
+        if len(value) != 6:
+            value = "4ECDC4"
+        return f"ff{value[4:6]}{value[2:4]}{value[0:2]}".lower()
+
+    def track(self, hunt_title: str, track: Mapping, coordinates: List[list]) -> Iterator[str]:
+        yield f"<Placemark><name>{escape(track['name'] or 'Spor')}</name>"
+        if track.get("dog_name"):
+            yield f"<description>{escape(track['dog_name'])}</description>"
+        yield (
+            f"<Style><LineStyle><color>{self._color(track['color'])}</color>"
+            "<width>3</width></LineStyle></Style>"
+        )
+        timed = bool(coordinates) and all(
+            len(c) >= 3 and c[-1] > TIMESTAMP_MIN for c in coordinates
+        )
+        if timed:
+            # Skjemaet krever alle <when> før alle <gx:coord>: to gjennomløp
+            yield "<gx:Track><altitudeMode>clampToGround</altitudeMode>\n"
+            for points in _chunks(coordinates):
+                yield "".join(f"<when>{_iso(t)}</when>" for _, _, _, t in points) + "\n"
+            for points in _chunks(coordinates):
+                yield "".join(
+                    f"<gx:coord>{lon} {lat} {elevation if elevation is not None else 0}</gx:coord>"
+                    for lon, lat, elevation, _ in points
+                ) + "\n"
+            yield "</gx:Track></Placemark>\n"
+        else:
+            yield "<LineString><tessellate>1</tessellate><coordinates>\n"
+            for points in _chunks(coordinates):
+                yield " ".join(
+                    f"{lon},{lat}" if elevation is None else f"{lon},{lat},{elevation}"
+                    for lon, lat, elevation, _ in points
+                ) + "\n"
+            yield "</coordinates></LineString></Placemark>\n"
+
+    def footer(self) -> str:
+        return "</Document>\n</kml>\n"
+
+
+WRITERS = {"gpx": GPXWriter, "kml": KMLWriter}
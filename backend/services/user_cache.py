@@ -0,0 +1,145 @@
+"""
+Hurtigbuffer for brukeroppslag i JWT-autentiseringen.
+
+get_current_user trenger brukeren på hver forespørsel, men brukerraden
+endres nesten aldri. Bufferen holder et øyeblikksbilde av kolonnene i
+USER_CACHE_TTL sekunder, enten i prosessen (standard) eller i Redis når
+USER_CACHE_URL peker dit, slik at flere arbeidsprosesser deler bufferen og
+ser invalideringene til hverandre.
+
+Passordhash og Garmin-legitimasjon bufres ikke. Brukere fra bufferen er
+frakoblet sesjonen; ruter som endrer brukeren må hente den med db.get().
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, Tuple
+
+from sqlalchemy.orm import make_transient_to_detached
+
+from models import User
+from services.serialization import dumps
+
+try:
+    from redis import asyncio as redis_asyncio
+except ImportError:  # pragma: no cover - valgfri avhengighet
+    redis_asyncio = None
+
+logger = logging.getLogger(__name__)
+
+CACHED_FIELDS = ("id", "email", "name", "avatar_url", "settings", "created_at", "updated_at")
+_DATETIME_FIELDS = ("created_at", "updated_at")
+
+
+class MemoryBackend:
+    """Prosesslokal LRU-buffer med utløpstid per oppføring."""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class RedisBackend:
+    """Delt buffer i Redis for oppsett med flere arbeidsprosesser."""
+
+    def __init__(self, url: str):
+        if redis_asyncio is None:
+            raise RuntimeError("USER_CACHE_URL peker til Redis, men redis-pakken er ikke installert")
+        self._client = redis_asyncio.from_url(url)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._client.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self._client.set(key, value, ex=max(int(ttl), 1))
+
+    async def delete(self, key: str) -> None:
+        await self._client.delete(key)
+
+
+class UserCache:
+    """
+    Buffer for brukere nøklet på id. Feil i bakenden logges og behandles
+    som bom, slik at innlogging virker selv om Redis er nede.
+    """
+
+    def __init__(self, backend, ttl: float = 60):
+        self.backend = backend
+        self.ttl = ttl
+
+    @staticmethod
+    def _key(user_id: str) -> str:
+        return f"jaktopplevelsen:user:{user_id}"
+
+    async def get(self, user_id: str) -> Optional[User]:
+        try:
+            raw = await self.backend.get(self._key(user_id))
+        except Exception as e:
+            logger.warning(f"Brukerbufferen er utilgjengelig: {e}")
+            return None
+        if raw is None:
+            return None
+
+        values = json.loads(raw)
+        for field in _DATETIME_FIELDS:
+            if values.get(field):
+                values[field] = datetime.fromisoformat(values[field])
+        user = User(**values)
+        # Behandles som en lagret rad, så et utilsiktet db.add() ikke gir INSERT
+        make_transient_to_detached(user)
+        return user
+
+    async def set(self, user: User) -> None:
+        raw = dumps({field: getattr(user, field) for field in CACHED_FIELDS})
+        try:
+            await self.backend.set(self._key(user.id), raw, self.ttl)
+        except Exception as e:
+            logger.warning(f"Brukerbufferen er utilgjengelig: {e}")
+
+    async def invalidate(self, user_id: str) -> None:
+        """Fjern brukeren fra bufferen. Kalles etter at endringen er lagret."""
+        try:
+            await self.backend.delete(self._key(user_id))
+        except Exception as e:
+            logger.warning(f"Kunne ikke invalidere brukerbufferen: {e}")
+
+
+def _backend_from_env():
+    url = os.getenv("USER_CACHE_URL", "memory")
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend(url)
+    return MemoryBackend(max_entries=int(os.getenv("USER_CACHE_SIZE", "10000")))
+
+
+user_cache = UserCache(
+    _backend_from_env(),
+    ttl=float(os.getenv("USER_CACHE_TTL", "60")),
+)
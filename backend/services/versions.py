@@ -0,0 +1,100 @@
+"""
+Versjoner og ETag-er for betingede GET-forespørsler mot jaktturer, og
+versjonen bildeindeksen i services/duplicates.py merkes med.
+"""
+
+import hashlib
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from models import Hunt, HuntListVersion, Track, Photo, PhotoVersion
+
+
+def make_etag(*parts) -> str:
+    """Lag en sterk ETag fra versjonsdelene."""
+    digest = hashlib.sha256("|".join(str(p) for p in parts).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Sjekk om ETag-en finnes i en If-None-Match-header."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return etag in candidates or f"W/{etag}" in candidates
+
+
+def _get_version(db: Session, model, user_id: str) -> int:
+    version = db.execute(select(model.version).where(model.user_id == user_id)).scalar()
+    return version or 0
+
+
+def _bump_version(db: Session, model, user_id: str) -> None:
+    """
+    Øk en versjonsteller per bruker. Raden opprettes eller økes i én
+    INSERT ... ON CONFLICT, så to samtidige første endringer for samme
+    bruker ikke kolliderer på primærnøkkelen.
+    """
+    dialect_insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    stmt = dialect_insert(model).values(user_id=user_id, version=1, updated_at=datetime.utcnow())
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[model.user_id],
+            set_={"version": model.version + 1, "updated_at": stmt.excluded.updated_at},
+        )
+    )
+
+
+def get_list_version(db: Session, user_id: str) -> int:
+    """Hent listeversjonen for en bruker (én primærnøkkeloppslag)."""
+    return _get_version(db, HuntListVersion, user_id)
+
+
+def bump_list_version(db: Session, user_id: str) -> None:
+    """Øk listeversjonen for en bruker. Kalles i samme transaksjon som endringen."""
+    _bump_version(db, HuntListVersion, user_id)
+
+
+def get_photo_version(db: Session, user_id: str) -> int:
+    """Hent bildeversjonen for en bruker, som bildeindeksen merkes med."""
+    return _get_version(db, PhotoVersion, user_id)
+
+
+def bump_photo_version(db: Session, user_id: str) -> None:
+    """Øk bildeversjonen for en bruker. Kalles i samme transaksjon som endringen."""
+    _bump_version(db, PhotoVersion, user_id)
+
+
+def hunt_version(db: Session, hunt_id: str, user_id: str) -> Optional[tuple]:
+    """
+    Hent versjonsdelene for en jakttur i én spørring: updated_at samt antall
+    og siste updated_at for spor og bilder. Antallet fanger opp slettinger,
+    updated_at både nye og endrede spor og bilder.
+
+    Returns:
+        tuple eller None hvis jaktturen ikke finnes
+    """
+    def child_aggregate(model, aggregate):
+        return (
+            select(aggregate)
+            .where(model.hunt_id == Hunt.id)
+            .correlate(Hunt)
+            .scalar_subquery()
+        )
+
+    row = db.execute(
+        select(
+            Hunt.updated_at,
+            child_aggregate(Track, func.count(Track.id)),
+            child_aggregate(Track, func.max(Track.updated_at)),
+            child_aggregate(Photo, func.count(Photo.id)),
+            child_aggregate(Photo, func.max(Photo.updated_at)),
+        ).where(Hunt.id == hunt_id, Hunt.user_id == user_id)
+    ).first()
+    return tuple(row) if row else None
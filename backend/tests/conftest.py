@@ -0,0 +1,78 @@
+"""
+Felles oppsett for testene.
+
+Databasen og opplastingsmappen legges i en midlertidig katalog. Miljøet må
+settes før models importeres, siden motorene lages ved import.
+"""
+
+import os
+import tempfile
+import uuid
+
+_tmp = tempfile.mkdtemp(prefix="jaktopplevelsen-test-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'test.db')}"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+os.environ["UPLOAD_DIR"] = os.path.join(_tmp, "uploads")
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+
+import main
+from api.routes.auth import create_access_token
+from models import SessionLocal, User
+
+
+@pytest.fixture(scope="session")
+def client():
+    """TestClient med oppstart og avslutning av appen."""
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def db(client):
+    """Synkron sesjon mot testdatabasen, etter at appen har opprettet tabellene."""
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        # En åpen lesetransaksjon låser SQLite-databasen for rutene
+        session.rollback()
+        session.close()
+
+
+@pytest.fixture
+def user_id(db) -> str:
+    """En ny bruker uten data."""
+    new_id = str(uuid.uuid4())
+    db.execute(insert(User), [{
+        "id": new_id, "email": f"{new_id}@example.com", "password_hash": "x", "name": "Jeger",
+    }])
+    db.commit()
+    return new_id
+
+
+@pytest.fixture
+def headers(user_id) -> dict:
+    """Autorisasjon som brukeren fra `user_id`."""
+    return {"Authorization": f"Bearer {create_access_token({'sub': user_id})}"}
+
+
+@pytest.fixture
+def create_hunt(client, headers):
+    """Opprett en jakttur for brukeren via API-et; felter kan overstyres."""
+
+    def _create(**fields) -> dict:
+        payload = {
+            "title": "Jakt",
+            "date": "2024-10-05",
+            "start_time": "07:00:00",
+            "location": {"name": "Finnskogen", "coordinates": [60.6, 12.4]},
+            **fields,
+        }
+        response = client.post("/api/v1/hunts/", json=payload, headers=headers)
+        assert response.status_code == 201, response.text
+        return response.json()
+
+    return _create
@@ -0,0 +1,64 @@
+"""Dublettsjekk for bilder."""
+
+import io
+
+from PIL import Image, ImageDraw
+from sqlalchemy import update
+
+from models import Photo
+from services import duplicates, versions
+
+
+def jpeg(size=(640, 480), quality=90, shade=0) -> bytes:
+    """Et motiv med grove former, så den perseptuelle hashen er stabil."""
+    image = Image.new("RGB", size, (40 + shade, 90, 40))
+    draw = ImageDraw.Draw(image)
+    w, h = size
+    draw.rectangle([w // 8, h // 6, w // 2, h // 2], fill=(200, 180, 60))
+    draw.ellipse([w // 2, h // 2, w - w // 10, h - h // 10], fill=(30, 30, 120))
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def upload(client, headers, hunt_id, *contents):
+    files = [("files", (f"bilde{i}.jpg", content, "image/jpeg")) for i, content in enumerate(contents)]
+    return client.post("/api/v1/photos/upload", data={"hunt_id": hunt_id}, files=files, headers=headers)
+
+
+def test_similar_photos_in_same_upload(client, headers, create_hunt):
+    hunt = create_hunt()
+
+    response = upload(client, headers, hunt["id"], jpeg(), jpeg(size=(320, 240), quality=60))
+
+    assert response.status_code == 201, response.text
+    first, second = response.json()["photos"]
+    assert first["similar_to"] == []
+    assert second["similar_to"] == [first["id"]]
+
+
+def test_hunt_edits_keep_photo_index(client, db, headers, user_id, create_hunt):
+    hunt = create_hunt()
+    assert upload(client, headers, hunt["id"], jpeg()).status_code == 201
+    version, tree = duplicates.photo_index.tree(db, user_id)
+    db.rollback()
+
+    response = client.put(f"/api/v1/hunts/{hunt['id']}", json={"title": "Ny tittel"}, headers=headers)
+    assert response.status_code == 200
+
+    assert duplicates.photo_index.tree(db, user_id) == (version, tree)
+
+
+def test_backfill_hashes_bumps_photo_version(client, db, headers, user_id, create_hunt):
+    hunt = create_hunt()
+    (photo,) = upload(client, headers, hunt["id"], jpeg()).json()["photos"]
+    db.execute(update(Photo).where(Photo.id == photo["id"]).values(content_hash=None, phash=None))
+    db.commit()
+    version, tree = duplicates.photo_index.tree(db, user_id)
+
+    duplicates.backfill_hashes(db)
+
+    assert versions.get_photo_version(db, user_id) == version + 1
+    new_version, new_tree = duplicates.photo_index.tree(db, user_id)
+    assert new_version == version + 1
+    assert new_tree is not tree and new_tree.size == 1
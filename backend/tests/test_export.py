@@ -0,0 +1,155 @@
+"""Eksport av jaktdata."""
+
+import json
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+
+import pytest
+
+from models import Photo, Track
+from services.track_writers import GPXWriter, KMLWriter
+
+COORDINATES = [[12.40, 60.60, 210.0, 1728111600], [12.41, 60.61, 215.0, 1728111660]]
+
+NS = {
+    "gpx": "http://www.topografix.com/GPX/1/1",
+    "kml": "http://www.opengis.net/kml/2.2",
+    "gx": "http://www.google.com/kml/ext/2.2",
+}
+
+
+@pytest.fixture
+def exported_hunts(db, create_hunt):
+    """To jaktturer, der den første har ett spor og ett bilde."""
+    hunt = create_hunt(title="Elgjakt")
+    other = create_hunt(title="Rypejakt", date="2024-11-02")
+    db.add(Track(
+        hunt_id=hunt["id"], name="Bamse", source="garmin", color="#FF6B6B",
+        geojson={"type": "LineString", "coordinates": COORDINATES},
+        statistics={"distance_km": 1.2, "duration_minutes": 1},
+        start_time=datetime(2024, 10, 5, 7), end_time=datetime(2024, 10, 5, 7, 1),
+    ))
+    db.add(Photo(
+        hunt_id=hunt["id"], filename="a.jpg", original_filename="elg.jpg", file_size=1,
+        mime_type="image/jpeg", url="/uploads/a.jpg", thumbnail_url="/uploads/a_thumb.jpg",
+    ))
+    db.commit()
+    return hunt, other
+
+
+def test_export_json(client, headers, exported_hunts):
+    hunt, other = exported_hunts
+
+    response = client.get("/api/v1/exports/", params={"format": "json"}, headers=headers)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/json")
+    data = response.json()
+    assert data["format"] == "jaktopplevelsen-export"
+    assert [h["id"] for h in data["hunts"]] == [hunt["id"], other["id"]]
+    assert [t["hunt_id"] for t in data["tracks"]] == [hunt["id"]]
+    assert data["tracks"][0]["geojson"]["coordinates"] == COORDINATES
+    assert [(p["hunt_id"], p["original_filename"]) for p in data["photos"]] == [(hunt["id"], "elg.jpg")]
+
+
+def test_export_ndjson(client, headers, exported_hunts):
+    hunt, other = exported_hunts
+
+    response = client.get("/api/v1/exports/", params={"format": "ndjson"}, headers=headers)
+
+    assert response.status_code == 200
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert records[0]["type"] == "export"
+    by_type = {}
+    for record in records[1:]:
+        by_type.setdefault(record.pop("type"), []).append(record)
+    assert [h["id"] for h in by_type["hunt"]] == [hunt["id"], other["id"]]
+    assert by_type["track"][0]["geojson"]["coordinates"] == COORDINATES
+    assert [p["hunt_id"] for p in by_type["photo"]] == [hunt["id"]]
+
+
+def test_export_hunt_id_filter(client, headers, exported_hunts):
+    hunt, other = exported_hunts
+
+    only_other = client.get(
+        "/api/v1/exports/", params={"format": "json", "hunt_id": other["id"]}, headers=headers
+    ).json()
+    only_hunt = client.get(
+        "/api/v1/exports/", params={"format": "json", "hunt_id": hunt["id"]}, headers=headers
+    ).json()
+
+    assert [h["id"] for h in only_other["hunts"]] == [other["id"]]
+    assert only_other["tracks"] == [] and only_other["photos"] == []
+    assert [h["id"] for h in only_hunt["hunts"]] == [hunt["id"]]
+    assert len(only_hunt["tracks"]) == 1 and len(only_hunt["photos"]) == 1
+
+
+def test_export_unknown_format(client, headers):
+    response = client.get("/api/v1/exports/", params={"format": "csv"}, headers=headers)
+
+    assert response.status_code == 400
+
+
+def write(writer, coordinates, hunt_title="Elgjakt", **track) -> ET.Element:
+    """Skriv ett spor som et helt dokument og parse det."""
+    track = {"name": "Bamse", "dog_id": "hund", "color": "#FF6B6B", **track}
+    parts = [writer.header(datetime(2024, 10, 5, tzinfo=timezone.utc)), writer.begin_hunt(hunt_title)]
+    parts.extend(writer.track(hunt_title, track, coordinates))
+    parts += [writer.end_hunt(), writer.footer()]
+    return ET.fromstring("".join(parts).encode())
+
+
+def test_gpx_escapes_titles():
+    root = write(GPXWriter(), COORDINATES, hunt_title="Elg & <rype>", name='Bamse "B"', dog_name="Tass & Co")
+
+    trk = root.find("gpx:trk", NS)
+    assert trk.find("gpx:name", NS).text == 'Elg & <rype> - Bamse "B"'
+    assert trk.find("gpx:desc", NS).text == "Tass & Co"
+
+
+def test_gpx_time_only_on_timed_points():
+    root = write(GPXWriter(), [COORDINATES[0], [12.42, 60.62, 220.0], [12.43, 60.63]])
+
+    points = root.findall(".//gpx:trkpt", NS)
+    assert [p.findtext("gpx:time", namespaces=NS) for p in points] == ["2024-10-05T07:00:00Z", None, None]
+    assert [p.findtext("gpx:ele", namespaces=NS) for p in points] == ["210.0", "220.0", None]
+    assert points[0].get("lat") == "60.6" and points[0].get("lon") == "12.4"
+
+
+def test_kml_escapes_titles():
+    root = write(KMLWriter(), COORDINATES, hunt_title="Elg & <rype>", name="<Bamse>")
+
+    folder = root.find("kml:Document/kml:Folder", NS)
+    assert folder.findtext("kml:name", namespaces=NS) == "Elg & <rype>"
+    assert folder.findtext("kml:Placemark/kml:name", namespaces=NS) == "<Bamse>"
+
+
+def test_kml_uses_gx_track_when_all_points_are_timed():
+    placemark = write(KMLWriter(), COORDINATES).find(".//kml:Placemark", NS)
+
+    track = placemark.find("gx:Track", NS)
+    assert placemark.find("kml:LineString", NS) is None
+    assert [w.text for w in track.findall("kml:when", NS)] == ["2024-10-05T07:00:00Z", "2024-10-05T07:01:00Z"]
+    assert [c.text for c in track.findall("gx:coord", NS)] == ["12.4 60.6 210.0", "12.41 60.61 215.0"]
+
+
+def test_kml_uses_line_string_when_a_point_lacks_time():
+    placemark = write(KMLWriter(), [COORDINATES[0], [12.42, 60.62, 220.0]]).find(".//kml:Placemark", NS)
+
+    assert placemark.find("gx:Track", NS) is None
+    coordinates = placemark.findtext("kml:LineString/kml:coordinates", namespaces=NS)
+    assert coordinates.split() == ["12.4,60.6,210.0", "12.42,60.62,220.0"]
+
+
+@pytest.mark.parametrize(
+    "hex_color, expected",
+    [
+        ("#112233", "ff332211"),
+        ("#FF6B6B", "ff6b6bff"),
+        ("abcdef", "ffefcdab"),
+        (None, "ffc4cd4e"),
+        ("#fff", "ffc4cd4e"),
+    ],
+)
+def test_kml_color(hex_color, expected):
+    assert KMLWriter._color(hex_color) == expected
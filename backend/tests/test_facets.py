@@ -0,0 +1,40 @@
+"""Filtertabellene for tagger og vilttyper."""
+
+import uuid
+from datetime import date, time
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from models import Base, Hunt, HuntGameType, HuntTag, User
+from services import facets
+
+
+def test_ensure_facets_backfills_existing_hunts(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'facets.db'}")
+    Base.metadata.create_all(engine)
+    user_id, hunt_id = str(uuid.uuid4()), str(uuid.uuid4())
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"id": user_id, "email": "a@example.com", "password_hash": "x", "name": "A"}])
+        # Jaktturer fra før filtertabellene fantes: bare JSON-kolonnene er satt
+        conn.execute(insert(Hunt), [
+            {"id": hunt_id, "user_id": user_id, "title": "Jakt", "date": date(2024, 10, 5),
+             "start_time": time(7), "location": {"name": "Finnskogen"},
+             "game_type": ["elg"], "tags": ["høst", "fjell"]},
+            {"id": str(uuid.uuid4()), "user_id": user_id, "title": "Tur", "date": date(2024, 10, 6),
+             "start_time": time(7), "location": {"name": "Finnskogen"}, "game_type": [], "tags": []},
+        ])
+
+    facets.ensure_facets(engine)
+
+    with Session(engine) as db:
+        assert sorted(db.scalars(select(HuntTag.tag))) == ["fjell", "høst"]
+        assert db.execute(select(HuntGameType.hunt_id, HuntGameType.game_type)).all() == [(hunt_id, "elg")]
+        counts = facets.facet_counts(db, user_id)
+    assert counts["game_types"] == [{"value": "elg", "count": 1}]
+
+    # Allerede fylt: ingenting endres ved neste oppstart
+    facets.ensure_facets(engine)
+    with Session(engine) as db:
+        assert db.query(HuntTag).count() == 2
+    engine.dispose()
@@ -0,0 +1,56 @@
+"""Alembic-revisjonene mot nye og eldre databaser."""
+
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, inspect, text
+
+from models import Base
+from models.migrations import alembic_config, run_migrations
+
+BASELINE = "1f0c3b8e2d71"
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+    yield engine
+    engine.dispose()
+
+
+def schema_differences(engine) -> list:
+    """Forskjeller mellom databasen og modellene, utenom tabeller modellene ikke kjenner."""
+    with engine.connect() as conn:
+        diffs = compare_metadata(MigrationContext.configure(conn), Base.metadata)
+    return [diff for diff in diffs if not (diff[0] == "remove_table" and diff[1].name not in Base.metadata.tables)]
+
+
+def test_new_database_matches_models(engine):
+    run_migrations(engine)
+
+    assert schema_differences(engine) == []
+    assert inspect(engine).has_table("hunt_search")
+
+
+def test_upgrade_database_from_before_alembic(engine):
+    # Databaser fra før Alembic har bare de opprinnelige tabellene og ingen alembic_version
+    with engine.begin() as conn:
+        command.upgrade(alembic_config(conn), BASELINE)
+        conn.execute(text("DROP TABLE alembic_version"))
+
+    run_migrations(engine)
+
+    assert schema_differences(engine) == []
+    indexes = {index["name"] for index in inspect(engine).get_indexes("photos")}
+    assert "idx_photos_content_hash" in indexes
+
+
+def test_upgrade_database_created_by_create_all(engine):
+    # Tabeller, kolonner og indekser som finnes fra før hoppes over
+    Base.metadata.create_all(engine)
+
+    run_migrations(engine)
+    run_migrations(engine)
+
+    assert schema_differences(engine) == []
@@ -0,0 +1,165 @@
+"""
+Spørreplanene for de mest brukte endepunktene mot en stor database.
+
+Databasen fylles med mange jaktturer, endepunktene kalles og hver SELECT de
+sender kjøres med EXPLAIN QUERY PLAN. Ingen av dem skal lese en hel tabell
+som vokser med antall jaktturer, eller sortere alle brukerens jaktturer i
+et midlertidig B-tre i stedet for å bruke idx_hunts_user_date.
+"""
+
+import re
+import uuid
+from datetime import date, datetime, time, timedelta
+
+import pytest
+from sqlalchemy import event, insert, text
+
+from api.routes.auth import create_access_token
+from models import SessionLocal, async_engine, engine, User, Dog, Hunt, HuntDog, Track, Photo
+from models import HuntTag, HuntGameType
+
+USERS = 6
+HUNTS_PER_USER = 1500
+
+# Tabeller som vokser med antall jaktturer og aldri skal leses i sin helhet
+LARGE_TABLES = {"hunts", "tracks", "photos", "hunt_dogs", "hunt_tags", "hunt_game_types", "dogs"}
+
+SCAN = re.compile(r"^SCAN (\w+)")
+
+REQUESTS = [
+    ("/api/v1/hunts/", {"page_size": 20}),
+    ("/api/v1/hunts/", {"page_size": 20, "view": "summary"}),
+    ("/api/v1/hunts/", {"page_size": 20, "cursor": "{next_cursor}"}),
+    ("/api/v1/hunts/", {"page": 5, "page_size": 20}),
+    ("/api/v1/hunts/", {"date_from": "2016-01-01", "date_to": "2016-12-31"}),
+    ("/api/v1/hunts/", {"tags": "høst"}),
+    ("/api/v1/hunts/", {"game_types": "elg,rype"}),
+    ("/api/v1/hunts/facets", {}),
+    ("/api/v1/hunts/{hunt_id}", {}),
+    ("/api/v1/hunts/{hunt_id}/tracks", {}),
+    ("/api/v1/statistics/", {}),
+    ("/api/v1/statistics/seasons", {}),
+    ("/api/v1/statistics/dogs", {"dog_ids": "{dog_id}", "seasons": 2016}),
+]
+
+
+def seed(users: int, hunts_per_user: int) -> list:
+    """Fyll databasen med kjerneinnsett. Returnerer (bruker-id, hund-id) per bruker."""
+    db = SessionLocal()
+    owners = []
+    start = date(2015, 1, 1)
+    for u in range(users):
+        user_id, dog_id = str(uuid.uuid4()), str(uuid.uuid4())
+        db.execute(insert(User), [{
+            "id": user_id, "email": f"{user_id}@example.com", "password_hash": "x", "name": f"Jeger {u}",
+        }])
+        db.execute(insert(Dog), [{"id": dog_id, "user_id": user_id, "name": "Bamse", "breed": "Elghund"}])
+
+        hunts, links, tracks, photos, tags, game_types = [], [], [], [], [], []
+        for i in range(hunts_per_user):
+            hunt_id = str(uuid.uuid4())
+            day = start + timedelta(days=i % 3650)
+            game = ["elg", "rype", "hare"][i % 3]
+            hunts.append({
+                "id": hunt_id, "user_id": user_id, "title": f"Jakt {i}", "date": day,
+                "start_time": time(7), "location": {"name": "Finnskogen"},
+                "game_type": [game], "tags": ["høst"] if i % 2 else [],
+                "game_seen": [], "game_harvested": [], "is_favorite": i % 10 == 0,
+            })
+            links.append({"hunt_id": hunt_id, "dog_id": dog_id})
+            game_types.append({"hunt_id": hunt_id, "game_type": game, "user_id": user_id})
+            if i % 2:
+                tags.append({"hunt_id": hunt_id, "tag": "høst", "user_id": user_id})
+            begin = datetime.combine(day, time(7))
+            tracks.append({
+                "id": str(uuid.uuid4()), "hunt_id": hunt_id, "dog_id": dog_id, "name": "Spor",
+                "source": "garmin", "geojson": {"type": "LineString", "coordinates": []},
+                "statistics": {"distance_km": 5.0, "duration_minutes": 120},
+                "start_time": begin, "end_time": begin + timedelta(hours=2),
+            })
+            photos.append({
+                "id": str(uuid.uuid4()), "hunt_id": hunt_id, "filename": "x.jpg",
+                "original_filename": "x.jpg", "file_size": 1, "mime_type": "image/jpeg",
+                "url": "/uploads/x.jpg", "thumbnail_url": "/uploads/x_thumb.jpg",
+            })
+        db.execute(insert(Hunt), hunts)
+        db.execute(HuntDog.insert(), links)
+        db.execute(insert(Track), tracks)
+        db.execute(insert(Photo), photos)
+        db.execute(insert(HuntTag), tags)
+        db.execute(insert(HuntGameType), game_types)
+        owners.append((user_id, dog_id))
+    db.commit()
+    db.close()
+
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+    return owners
+
+
+def problems(plan: list) -> list:
+    """
+    Finn fulle tabellskanninger, og sortering når spørringen går gjennom alle
+    brukerens jaktturer. Sortering av et begrenset utvalg (spor for en side,
+    treff fra taggfilteret) er greit.
+    """
+    walks_user_hunts = any(
+        detail.startswith("SEARCH hunts") and "(user_id=" in detail for detail in plan
+    )
+    found = []
+    for detail in plan:
+        match = SCAN.match(detail)
+        if match and match.group(1) in LARGE_TABLES:
+            found.append(detail)
+        if walks_user_hunts and "USE TEMP B-TREE FOR ORDER BY" in detail:
+            found.append(detail)
+    return found
+
+
+@pytest.fixture(scope="module")
+def seeded(client):
+    """Innlogget bruker midt i en stor database, med verdier til forespørslene."""
+    owners = seed(USERS, HUNTS_PER_USER)
+    user_id, dog_id = owners[len(owners) // 2]
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': user_id})}"}
+    first = client.get("/api/v1/hunts/", params={"page_size": 20}, headers=headers).json()
+    values = {"hunt_id": first["items"][0]["id"], "next_cursor": first["next_cursor"], "dog_id": dog_id}
+    return headers, values
+
+
+@pytest.fixture
+def captured():
+    """SELECT-spørringene som sendes via den asynkrone motoren under testen."""
+    statements = []
+    target = async_engine.sync_engine
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            statements.append((statement, parameters))
+
+    event.listen(target, "before_cursor_execute", _capture)
+    yield statements
+    event.remove(target, "before_cursor_execute", _capture)
+
+
+@pytest.mark.parametrize(
+    "path, params", REQUESTS, ids=[f"{path} {params}" for path, params in REQUESTS]
+)
+def test_no_full_scans(client, seeded, captured, path, params):
+    headers, values = seeded
+    path = path.format(**values)
+    params = {key: str(value).format(**values) for key, value in params.items()}
+
+    response = client.get(path, params=params, headers=headers)
+    assert response.status_code == 200, response.text
+    assert captured, "ingen spørringer fanget opp"
+
+    failures = []
+    with engine.connect() as conn:
+        raw = conn.connection.dbapi_connection
+        for statement, parameters in dict.fromkeys(captured):
+            plan = [row[3] for row in raw.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+            bad = problems(plan)
+            if bad:
+                failures.append(" ".join(statement.split())[:200] + "\n    " + "\n    ".join(plan))
+    assert not failures, "\n\n".join(failures)
@@ -0,0 +1,45 @@
+"""Fulltekstsøk i jaktturer."""
+
+
+def test_highlight_marks_terms(client, headers, create_hunt):
+    hunt = create_hunt(title="Elgjakt på Finnskogen", notes="Stor okse ved myra")
+
+    hits = client.get("/api/v1/hunts/search", params={"q": "okse"}, headers=headers).json()
+
+    assert [hit["id"] for hit in hits] == [hunt["id"]]
+    assert "<mark>okse</mark>" in hits[0]["highlight"]
+
+
+def test_highlight_escapes_html(client, headers, create_hunt):
+    create_hunt(title="<script>alert(1)</script> elg", notes='<img src=x onerror="alert(2)">')
+
+    hits = client.get("/api/v1/hunts/search", params={"q": "elg"}, headers=headers).json()
+
+    highlight = hits[0]["highlight"]
+    assert "<script>" not in highlight and "<img" not in highlight
+    assert "&lt;script&gt;" in highlight
+    assert highlight.replace("<mark>", "").replace("</mark>", "").count("<") == 0
+    assert "<mark>elg</mark>" in highlight
+
+
+def test_list_search_without_words_returns_nothing(client, headers, create_hunt):
+    create_hunt(title="Rypejakt")
+
+    page = client.get("/api/v1/hunts/", params={"search": "!!!"}, headers=headers).json()
+
+    assert page["items"] == [] and page["total"] == 0
+
+
+def test_index_follows_updates_and_deletes(client, headers, create_hunt):
+    hunt = create_hunt(title="Harejakt i lia")
+    other = create_hunt(title="Harejakt ved vannet")
+
+    updated = client.put(f"/api/v1/hunts/{hunt['id']}", json={"title": "Revejakt i lia"}, headers=headers)
+    assert updated.status_code == 200
+    client.delete(f"/api/v1/hunts/{other['id']}", headers=headers)
+
+    def search(q):
+        return [hit["id"] for hit in client.get("/api/v1/hunts/search", params={"q": q}, headers=headers).json()]
+
+    assert search("harejakt") == []
+    assert search("revejakt") == [hunt["id"]]
@@ -0,0 +1,35 @@
+"""Statistikkrutene."""
+
+import pytest
+
+from models import SeasonRollup
+from services.statistics import apply_season_rows
+
+
+@pytest.mark.parametrize("params", [{}, {"dog_ids": ""}], ids=["omitted", "empty"])
+def test_compare_dogs_requires_dog_ids(client, headers, params):
+    response = client.get("/api/v1/statistics/dogs", params=params, headers=headers)
+
+    assert response.status_code == 422
+    assert response.json()["detail"] == "Velg minst én hund å sammenligne"
+
+
+def test_compare_dogs_unknown_dog(client, headers):
+    response = client.get("/api/v1/statistics/dogs", params={"dog_ids": "finnes-ikke"}, headers=headers)
+
+    assert response.status_code == 404
+
+
+def test_season_rows_add_up_and_disappear(db, user_id):
+    key = (2026, "total", "")
+    counters = {"hunts": 1, "successful_hunts": 0, "game_seen": 2, "game_harvested": 0, "distance_km": 4.5}
+
+    apply_season_rows(db, user_id, [(key, counters)])
+    apply_season_rows(db, user_id, [(key, counters)])
+    row = db.get(SeasonRollup, (user_id, *key))
+    assert (row.hunts, row.game_seen, row.distance_km) == (2, 4, 9.0)
+
+    apply_season_rows(db, user_id, [(key, counters)], sign=-1)
+    apply_season_rows(db, user_id, [(key, counters)], sign=-1)
+    db.expire_all()
+    assert db.get(SeasonRollup, (user_id, *key)) is None
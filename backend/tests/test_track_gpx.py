@@ -0,0 +1,65 @@
+"""Nedlasting av rå GPX for spor."""
+
+import uuid
+from datetime import datetime
+
+import pytest
+from sqlalchemy import insert
+
+from api.routes.auth import create_access_token
+from models import Track, User
+from services import gpx_store
+
+GPX = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n<gpx version="1.1"><trk><trkseg>'
+    + "".join(f'<trkpt lat="60.{i:04d}" lon="12.4"/>' for i in range(5000))
+    + "</trkseg></trk></gpx>\n"
+)
+
+
+def add_track(db, hunt_id: str, **fields) -> str:
+    track_id = str(uuid.uuid4())
+    db.execute(insert(Track), [{
+        "id": track_id, "hunt_id": hunt_id, "name": "Spor", "source": "gpx_import",
+        "geojson": {"type": "LineString", "coordinates": []}, "statistics": {},
+        "start_time": datetime(2024, 10, 5, 7), "end_time": datetime(2024, 10, 5, 9),
+        **fields,
+    }])
+    db.commit()
+    return track_id
+
+
+@pytest.mark.parametrize("stored", ["gpx_ref", "gpx_data"])
+def test_download_track_gpx(client, db, headers, create_hunt, stored):
+    hunt = create_hunt()
+    value = gpx_store.put(GPX) if stored == "gpx_ref" else GPX
+    track_id = add_track(db, hunt["id"], **{stored: value})
+
+    response = client.get(f"/api/v1/hunts/{hunt['id']}/tracks/{track_id}/gpx", headers=headers)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/gpx+xml")
+    assert f'filename="{track_id}.gpx"' in response.headers["content-disposition"]
+    assert response.text == GPX
+
+
+def test_download_track_gpx_other_user(client, db, create_hunt):
+    hunt = create_hunt()
+    track_id = add_track(db, hunt["id"], gpx_ref=gpx_store.put(GPX))
+    other_id = str(uuid.uuid4())
+    db.execute(insert(User), [{"id": other_id, "email": f"{other_id}@example.com", "password_hash": "x", "name": "B"}])
+    db.commit()
+    other = {"Authorization": f"Bearer {create_access_token({'sub': other_id})}"}
+
+    response = client.get(f"/api/v1/hunts/{hunt['id']}/tracks/{track_id}/gpx", headers=other)
+
+    assert response.status_code == 404
+
+
+def test_download_track_without_gpx(client, db, headers, create_hunt):
+    hunt = create_hunt()
+    track_id = add_track(db, hunt["id"])
+
+    response = client.get(f"/api/v1/hunts/{hunt['id']}/tracks/{track_id}/gpx", headers=headers)
+
+    assert response.status_code == 404
@@ -0,0 +1,35 @@
+"""Listeversjonen per bruker."""
+
+from models import HuntListVersion, Photo
+from services import versions
+
+
+def test_bump_list_version_creates_and_increments(db, user_id):
+    assert versions.get_list_version(db, user_id) == 0
+
+    versions.bump_list_version(db, user_id)
+    assert versions.get_list_version(db, user_id) == 1
+
+    versions.bump_list_version(db, user_id)
+    versions.bump_list_version(db, user_id)
+    db.commit()
+    assert versions.get_list_version(db, user_id) == 3
+    assert db.query(HuntListVersion).filter_by(user_id=user_id).count() == 1
+
+
+def test_hunt_etag_changes_when_photo_is_edited(client, db, headers, create_hunt):
+    hunt = create_hunt(title="Fuglejakt")
+    photo = Photo(
+        hunt_id=hunt["id"], filename="a.jpg", original_filename="a.jpg", file_size=1,
+        mime_type="image/jpeg", url="/uploads/a.jpg", thumbnail_url="/uploads/a_thumb.jpg",
+    )
+    db.add(photo)
+    db.commit()
+    etag = client.get(f"/api/v1/hunts/{hunt['id']}", headers=headers).headers["etag"]
+
+    photo.caption = "Rype i lyngen"
+    db.commit()
+    response = client.get(f"/api/v1/hunts/{hunt['id']}", headers={**headers, "If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
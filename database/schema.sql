@@ -68,11 +68,29 @@ CREATE TABLE hunts (
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
-CREATE INDEX idx_hunts_user_id ON hunts(user_id);
-CREATE INDEX idx_hunts_date ON hunts(date DESC);
+CREATE INDEX idx_hunts_user_date ON hunts(user_id, date DESC, id DESC);
 CREATE INDEX idx_hunts_tags ON hunts USING GIN(tags);
 CREATE INDEX idx_hunts_game_type ON hunts USING GIN(game_type);
 
+-- Normalized tags and game types for indexed filtering and facets
+CREATE TABLE hunt_tags (
+    hunt_id UUID NOT NULL REFERENCES hunts(id) ON DELETE CASCADE,
+    tag VARCHAR(100) NOT NULL,
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    PRIMARY KEY (hunt_id, tag)
+);
+
+CREATE INDEX idx_hunt_tags_user_tag ON hunt_tags(user_id, tag, hunt_id);
+
+CREATE TABLE hunt_game_types (
+    hunt_id UUID NOT NULL REFERENCES hunts(id) ON DELETE CASCADE,
+    game_type VARCHAR(100) NOT NULL,
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    PRIMARY KEY (hunt_id, game_type)
+);
+
+CREATE INDEX idx_hunt_game_types_user_type ON hunt_game_types(user_id, game_type, hunt_id);
+
 -- Hunt-Dog association table
 CREATE TABLE hunt_dogs (
     hunt_id UUID NOT NULL REFERENCES hunts(id) ON DELETE CASCADE,
@@ -87,7 +105,8 @@ CREATE TABLE tracks (
     dog_id UUID REFERENCES dogs(id) ON DELETE SET NULL,
     name VARCHAR(255) NOT NULL,
     source VARCHAR(50) NOT NULL CHECK (source IN ('garmin', 'gpx_import', 'manual')),
-    gpx_data TEXT, -- Original GPX XML
+    gpx_ref VARCHAR(64), -- SHA-256 of the original GPX in uploads/gpx (gzip)
+    gpx_data TEXT, -- Original GPX XML, only for tracks not yet moved to uploads/gpx
     geojson JSONB NOT NULL, -- GeoJSON LineString
     statistics JSONB NOT NULL, -- distance, duration, elevation, etc.
     color VARCHAR(7) NOT NULL DEFAULT '#4ECDC4',
@@ -96,7 +115,7 @@ CREATE TABLE tracks (
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
-CREATE INDEX idx_tracks_hunt_id ON tracks(hunt_id);
+CREATE INDEX idx_tracks_hunt_id ON tracks(hunt_id, start_time);
 CREATE INDEX idx_tracks_dog_id ON tracks(dog_id);
 
 -- Photos table
@@ -117,9 +136,52 @@ CREATE TABLE photos (
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
-CREATE INDEX idx_photos_hunt_id ON photos(hunt_id);
+CREATE INDEX idx_photos_hunt_id ON photos(hunt_id, created_at);
 CREATE INDEX idx_photos_tags ON photos USING GIN(tags);
 
+-- Incrementally maintained per-user totals (read by the Dashboard instead of user_statistics)
+CREATE TABLE user_statistics (
+    user_id UUID PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    total_hunts INTEGER NOT NULL DEFAULT 0,
+    total_distance_km DOUBLE PRECISION NOT NULL DEFAULT 0,
+    total_duration_minutes DOUBLE PRECISION NOT NULL DEFAULT 0,
+    total_photos INTEGER NOT NULL DEFAULT 0,
+    active_dogs INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Precomputed season figures per month, game type and location (dimension 'total' has key '')
+CREATE TABLE season_rollups (
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    season INTEGER NOT NULL,
+    dimension VARCHAR(20) NOT NULL,
+    key VARCHAR(255) NOT NULL,
+    hunts INTEGER NOT NULL DEFAULT 0,
+    successful_hunts INTEGER NOT NULL DEFAULT 0,
+    game_seen INTEGER NOT NULL DEFAULT 0,
+    game_harvested INTEGER NOT NULL DEFAULT 0,
+    distance_km DOUBLE PRECISION NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, season, dimension, key)
+);
+
+-- Delta sync for offline clients: latest change per object, deletes kept as tombstones
+CREATE TABLE sync_state (
+    user_id UUID PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    last_seq INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE change_log (
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    entity VARCHAR(20) NOT NULL CHECK (entity IN ('hunt', 'track', 'dog', 'photo')),
+    entity_id UUID NOT NULL,
+    seq INTEGER NOT NULL,
+    deleted BOOLEAN NOT NULL DEFAULT FALSE,
+    changed_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (user_id, entity, entity_id)
+);
+
+CREATE INDEX idx_change_log_user_seq ON change_log(user_id, seq);
+
 -- Garmin sync log
 CREATE TABLE garmin_sync_logs (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),